@@ -0,0 +1,77 @@
+import asyncio
+from logging.config import fileConfig
+
+from sqlalchemy.engine import Connection
+
+from alembic import context
+
+from app.core.database import Base, engine
+import app.models  # noqa: F401 - register models on Base.metadata
+
+config = context.config
+
+# Only configure logging when run from the alembic CLI; when the application
+# runs migrations at startup it passes its own connection and logging setup.
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Virtual tables (and their shadow tables) created with raw SQL in migrations
+RAW_SQL_TABLES = ("issues_rtree", "issues_fts")
+
+
+def include_name(name, type_, parent_names):
+    """Keep autogenerate away from tables that are managed by raw SQL"""
+    if type_ == "table":
+        return not name.startswith(RAW_SQL_TABLES)
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode, emitting SQL to the script output"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    # SQLite cannot ALTER constraints in place; batch mode recreates tables
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """Run migrations on the application's async engine"""
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+    else:
+        asyncio.run(run_async_migrations())
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,163 @@
+"""Initial schema
+
+Matches the tables previously created by ``Base.metadata.create_all``.
+Databases created that way are stamped at this revision on startup.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-09-25 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("role", sa.Enum("CITIZEN", "FIELDWORKER", "STAFF", "ADMIN",
+                                  name="userrole"), nullable=False),
+        sa.Column("avatar", sa.String(), nullable=True),
+        sa.Column("points", sa.Integer(), nullable=True),
+        sa.Column("badge_count", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("last_login", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_id", "users", ["id"], unique=False)
+
+    op.create_table(
+        "issues",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("category", sa.Enum("POTHOLE", "STREETLIGHT", "GARBAGE",
+                                      "WATERLOGGING", "OTHER",
+                                      name="issuecategory"), nullable=False),
+        sa.Column("urgency", sa.Integer(), nullable=True),
+        sa.Column("status", sa.Enum("PENDING", "ASSIGNED", "IN_PROGRESS",
+                                    "RESOLVED", "REJECTED",
+                                    name="issuestatus"), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("images", sa.String(), nullable=True),
+        sa.Column("audio_note", sa.String(), nullable=True),
+        sa.Column("tracking_id", sa.String(), nullable=False),
+        sa.Column("reported_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("reporter_id", sa.String(), nullable=False),
+        sa.Column("assignee_id", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["assignee_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["reporter_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("tracking_id"),
+    )
+    op.create_index("ix_issues_id", "issues", ["id"], unique=False)
+
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("token"),
+    )
+    op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"],
+                    unique=False)
+
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("priority", sa.Enum("LOW", "MEDIUM", "HIGH", "CRITICAL",
+                                      name="taskpriority"), nullable=True),
+        sa.Column("status", sa.Enum("NEW", "ACCEPTED", "IN_PROGRESS",
+                                    "COMPLETED", "REJECTED",
+                                    name="taskstatus"), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("images", sa.String(), nullable=True),
+        sa.Column("assigned_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("due_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("issue_id", sa.String(), nullable=False),
+        sa.Column("assignee_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["assignee_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["issue_id"], ["issues.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("issue_id"),
+    )
+    op.create_index("ix_tasks_id", "tasks", ["id"], unique=False)
+
+    op.create_table(
+        "comments",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("issue_id", sa.String(), nullable=False),
+        sa.Column("author_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["author_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["issue_id"], ["issues.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_comments_id", "comments", ["id"], unique=False)
+
+    op.create_table(
+        "votes",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("is_upvote", sa.Boolean(), nullable=True),
+        sa.Column("issue_id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["issue_id"], ["issues.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_votes_id", "votes", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_votes_id", table_name="votes")
+    op.drop_table("votes")
+    op.drop_index("ix_comments_id", table_name="comments")
+    op.drop_table("comments")
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    op.drop_index("ix_refresh_tokens_id", table_name="refresh_tokens")
+    op.drop_table("refresh_tokens")
+    op.drop_index("ix_issues_id", table_name="issues")
+    op.drop_table("issues")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
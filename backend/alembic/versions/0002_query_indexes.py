@@ -0,0 +1,91 @@
+"""Index set for the endpoint queries
+
+Adds the keyset pagination and filter indexes used by the list and stats
+endpoints, and drops the redundant single-column indexes on primary keys.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-01 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Primary keys are already indexed; these duplicates only cost writes
+REDUNDANT_INDEXES = [
+    ("ix_users_id", "users"),
+    ("ix_issues_id", "issues"),
+    ("ix_refresh_tokens_id", "refresh_tokens"),
+    ("ix_tasks_id", "tasks"),
+    ("ix_comments_id", "comments"),
+    ("ix_votes_id", "votes"),
+]
+
+
+def upgrade() -> None:
+    for name, table in REDUNDANT_INDEXES:
+        op.drop_index(name, table_name=table)
+
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"])
+    op.create_index("ix_users_role_created_at_id", "users",
+                    ["role", "created_at", "id"])
+    op.create_index("ix_users_is_active_id", "users", ["is_active", "id"])
+
+    op.create_index("ix_issues_reported_at_id", "issues",
+                    ["reported_at", "id"])
+    op.create_index("ix_issues_reporter_reported_at_id", "issues",
+                    ["reporter_id", "reported_at", "id"])
+    op.create_index("ix_issues_assignee_reported_at_id", "issues",
+                    ["assignee_id", "reported_at", "id"])
+    op.create_index("ix_issues_status_reported_at_id", "issues",
+                    ["status", "reported_at", "id"])
+    op.create_index("ix_issues_category_reported_at_id", "issues",
+                    ["category", "reported_at", "id"])
+
+    op.create_index("ix_tasks_due_date_assigned_at_id", "tasks",
+                    ["due_date", sa.text("assigned_at DESC"),
+                     sa.text("id DESC")])
+    op.create_index("ix_tasks_assignee_due_date_assigned_at_id", "tasks",
+                    ["assignee_id", "due_date", sa.text("assigned_at DESC"),
+                     sa.text("id DESC")])
+    op.create_index("ix_tasks_status_due_date_assigned_at_id", "tasks",
+                    ["status", "due_date", sa.text("assigned_at DESC"),
+                     sa.text("id DESC")])
+    op.create_index("ix_tasks_priority_id", "tasks", ["priority", "id"])
+
+    op.create_index("ix_comments_issue_created_at_id", "comments",
+                    ["issue_id", "created_at", "id"])
+
+    op.create_index("ix_votes_issue_id_user_id", "votes",
+                    ["issue_id", "user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_votes_issue_id_user_id", table_name="votes")
+    op.drop_index("ix_comments_issue_created_at_id", table_name="comments")
+    op.drop_index("ix_tasks_priority_id", table_name="tasks")
+    op.drop_index("ix_tasks_status_due_date_assigned_at_id",
+                  table_name="tasks")
+    op.drop_index("ix_tasks_assignee_due_date_assigned_at_id",
+                  table_name="tasks")
+    op.drop_index("ix_tasks_due_date_assigned_at_id", table_name="tasks")
+    op.drop_index("ix_issues_category_reported_at_id", table_name="issues")
+    op.drop_index("ix_issues_status_reported_at_id", table_name="issues")
+    op.drop_index("ix_issues_assignee_reported_at_id", table_name="issues")
+    op.drop_index("ix_issues_reporter_reported_at_id", table_name="issues")
+    op.drop_index("ix_issues_reported_at_id", table_name="issues")
+    op.drop_index("ix_users_is_active_id", table_name="users")
+    op.drop_index("ix_users_role_created_at_id", table_name="users")
+    op.drop_index("ix_users_created_at_id", table_name="users")
+
+    for name, table in REDUNDANT_INDEXES:
+        op.create_index(name, table, ["id"])
@@ -0,0 +1,93 @@
+"""Persisted vote counters on issues
+
+Adds ``issues.upvotes``/``issues.downvotes``, makes ``(issue_id, user_id)``
+unique on votes and keeps the counters in step with triggers, so a vote is
+one upsert and reading the counts is a primary-key lookup.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-03 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = [
+    """
+    CREATE TRIGGER votes_counters_insert AFTER INSERT ON votes
+    BEGIN
+        UPDATE issues
+        SET upvotes = upvotes + (NEW.is_upvote = 1),
+            downvotes = downvotes + (NEW.is_upvote = 0)
+        WHERE id = NEW.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER votes_counters_update AFTER UPDATE OF is_upvote ON votes
+    WHEN OLD.is_upvote IS NOT NEW.is_upvote
+    BEGIN
+        UPDATE issues
+        SET upvotes = upvotes + (NEW.is_upvote = 1) - (OLD.is_upvote = 1),
+            downvotes = downvotes + (NEW.is_upvote = 0) - (OLD.is_upvote = 0)
+        WHERE id = NEW.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER votes_counters_delete AFTER DELETE ON votes
+    BEGIN
+        UPDATE issues
+        SET upvotes = upvotes - (OLD.is_upvote = 1),
+            downvotes = downvotes - (OLD.is_upvote = 0)
+        WHERE id = OLD.issue_id;
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    op.add_column("issues", sa.Column("upvotes", sa.Integer(),
+                                      server_default="0", nullable=False))
+    op.add_column("issues", sa.Column("downvotes", sa.Integer(),
+                                      server_default="0", nullable=False))
+
+    # Keep the latest vote where a race stored more than one per user
+    op.execute(
+        "DELETE FROM votes WHERE rowid NOT IN "
+        "(SELECT max(rowid) FROM votes GROUP BY issue_id, user_id)"
+    )
+    op.drop_index("ix_votes_issue_id_user_id", table_name="votes")
+    op.create_index("uq_votes_issue_id_user_id", "votes",
+                    ["issue_id", "user_id"], unique=True)
+
+    op.execute(
+        "UPDATE issues SET upvotes = v.up, downvotes = v.down "
+        "FROM (SELECT issue_id, sum(is_upvote = 1) AS up, "
+        "sum(is_upvote = 0) AS down FROM votes GROUP BY issue_id) AS v "
+        "WHERE v.issue_id = issues.id"
+    )
+
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER votes_counters_delete")
+    op.execute("DROP TRIGGER votes_counters_update")
+    op.execute("DROP TRIGGER votes_counters_insert")
+
+    op.drop_index("uq_votes_issue_id_user_id", table_name="votes")
+    op.create_index("ix_votes_issue_id_user_id", "votes",
+                    ["issue_id", "user_id"])
+
+    with op.batch_alter_table("issues") as batch_op:
+        batch_op.drop_column("downvotes")
+        batch_op.drop_column("upvotes")
@@ -0,0 +1,86 @@
+"""R*Tree spatial index over issue coordinates
+
+Adds ``issues.spatial_id``, a stable integer key (rowids of tables without an
+INTEGER PRIMARY KEY may change on VACUUM), and the ``issues_rtree`` virtual
+table keyed on it. Triggers keep the tree in step with inserts, coordinate
+updates and deletes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-06 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = [
+    """
+    CREATE TRIGGER issues_spatial_insert AFTER INSERT ON issues
+    BEGIN
+        UPDATE issues
+        SET spatial_id = (SELECT coalesce(max(spatial_id), 0) + 1 FROM issues)
+        WHERE rowid = NEW.rowid;
+        INSERT INTO issues_rtree (id, min_lat, max_lat, min_lng, max_lng)
+        SELECT spatial_id, latitude, latitude, longitude, longitude
+        FROM issues WHERE rowid = NEW.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_spatial_update AFTER UPDATE OF latitude, longitude
+    ON issues
+    BEGIN
+        UPDATE issues_rtree
+        SET min_lat = NEW.latitude, max_lat = NEW.latitude,
+            min_lng = NEW.longitude, max_lng = NEW.longitude
+        WHERE id = NEW.spatial_id;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_spatial_delete AFTER DELETE ON issues
+    BEGIN
+        DELETE FROM issues_rtree WHERE id = OLD.spatial_id;
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    op.add_column("issues", sa.Column("spatial_id", sa.Integer(),
+                                      nullable=True))
+    op.execute("UPDATE issues SET spatial_id = rowid")
+    op.create_index("uq_issues_spatial_id", "issues", ["spatial_id"],
+                    unique=True)
+
+    op.execute(
+        "CREATE VIRTUAL TABLE issues_rtree "
+        "USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+    )
+    op.execute(
+        "INSERT INTO issues_rtree (id, min_lat, max_lat, min_lng, max_lng) "
+        "SELECT spatial_id, latitude, latitude, longitude, longitude "
+        "FROM issues"
+    )
+
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER issues_spatial_delete")
+    op.execute("DROP TRIGGER issues_spatial_update")
+    op.execute("DROP TRIGGER issues_spatial_insert")
+    op.execute("DROP TABLE issues_rtree")
+
+    op.drop_index("uq_issues_spatial_id", table_name="issues")
+    # Plain DROP COLUMN (SQLite 3.35+) rather than a batch table rebuild,
+    # whose rename of the old table trips the votes_counters_* triggers
+    op.execute("ALTER TABLE issues DROP COLUMN spatial_id")
@@ -0,0 +1,65 @@
+"""Multi-resolution issue grid for map clustering
+
+Creates ``issue_grid_cells`` and fills it from the existing issues at every
+grid level. The application keeps it up to date as issues are created or
+change status, category or position.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-08 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GRID_LEVELS = (2, 4, 6, 8, 10, 12, 14, 16)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "issue_grid_cells",
+        sa.Column("level", sa.Integer(), nullable=False),
+        sa.Column("cell_x", sa.Integer(), nullable=False),
+        sa.Column("cell_y", sa.Integer(), nullable=False),
+        sa.Column("category", sa.Enum("POTHOLE", "STREETLIGHT", "GARBAGE",
+                                      "WATERLOGGING", "OTHER",
+                                      name="issuecategory"), nullable=False),
+        sa.Column("status", sa.Enum("PENDING", "ASSIGNED", "IN_PROGRESS",
+                                    "RESOLVED", "REJECTED",
+                                    name="issuestatus"), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("latitude_sum", sa.Float(), nullable=False),
+        sa.Column("longitude_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("level", "cell_x", "cell_y", "category",
+                                "status"),
+        sqlite_with_rowid=False,
+    )
+
+    for level in GRID_LEVELS:
+        size = 360.0 / (1 << level)
+        last = (1 << level) - 1
+        op.execute(f"""
+            INSERT INTO issue_grid_cells
+                (level, cell_x, cell_y, category, status,
+                 count, latitude_sum, longitude_sum)
+            SELECT {level},
+                   min(CAST((longitude + 180.0) / {size!r} AS INTEGER), {last}),
+                   min(CAST((latitude + 90.0) / {size!r} AS INTEGER), {last}),
+                   category, coalesce(status, 'PENDING'),
+                   count(*), sum(latitude), sum(longitude)
+            FROM issues
+            GROUP BY 2, 3, 4, 5
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("issue_grid_cells")
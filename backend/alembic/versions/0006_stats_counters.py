@@ -0,0 +1,80 @@
+"""Rollup counters for the stats endpoints
+
+Creates ``stats_counters`` and adds ``issues.resolved_at``, so the overview
+endpoints read a handful of counter rows instead of grouping whole tables
+and the average resolution time no longer needs ``extract('epoch')``,
+which SQLite cannot evaluate. Issues that are already resolved take their
+last update as the resolution time.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-09 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+    INSERT INTO stats_counters (scope, key, count, total)
+    SELECT 'issues.status', lower(coalesce(status, 'PENDING')), count(*), 0
+    FROM issues GROUP BY 2
+    UNION ALL
+    SELECT 'issues.category', lower(category), count(*), 0
+    FROM issues GROUP BY 2
+    UNION ALL
+    SELECT 'issues.resolution', 'resolved', count(*),
+           sum((julianday(resolved_at) - julianday(reported_at)) * 86400.0)
+    FROM issues
+    WHERE status = 'RESOLVED' AND resolved_at IS NOT NULL
+      AND reported_at IS NOT NULL
+    HAVING count(*) > 0
+    UNION ALL
+    SELECT 'tasks.status', lower(coalesce(status, 'NEW')), count(*), 0
+    FROM tasks GROUP BY 2
+    UNION ALL
+    SELECT 'tasks.priority', lower(coalesce(priority, 'MEDIUM')), count(*), 0
+    FROM tasks GROUP BY 2
+    UNION ALL
+    SELECT 'users.role', lower(role), count(*), 0
+    FROM users GROUP BY 2
+    UNION ALL
+    SELECT 'users.active', 'true', count(*), 0
+    FROM users WHERE is_active IS NOT 0
+    HAVING count(*) > 0
+"""
+
+
+def upgrade() -> None:
+    op.add_column("issues", sa.Column("resolved_at", sa.DateTime(timezone=True),
+                                      nullable=True))
+    op.execute("""
+        UPDATE issues SET resolved_at = coalesce(updated_at, reported_at)
+        WHERE status = 'RESOLVED'
+    """)
+
+    op.create_table(
+        "stats_counters",
+        sa.Column("scope", sa.String(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("scope", "key"),
+        sqlite_with_rowid=False,
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_table("stats_counters")
+    # Plain DROP COLUMN (SQLite 3.35+) rather than a batch table rebuild,
+    # which would drop the issues_spatial_* triggers from 0004
+    op.execute("ALTER TABLE issues DROP COLUMN resolved_at")
@@ -0,0 +1,35 @@
+"""Ordered index for the task priority filter
+
+Replaces ``ix_tasks_priority_id`` with an index in the task list order, so
+GET /tasks and the task export filtered by priority walk the index instead
+of sorting every matching row.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-10-10 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tasks_priority_due_date_assigned_at_id", "tasks",
+                    ["priority", "due_date", sa.text("assigned_at DESC"),
+                     sa.text("id DESC")])
+    op.drop_index("ix_tasks_priority_id", table_name="tasks")
+
+
+def downgrade() -> None:
+    op.create_index("ix_tasks_priority_id", "tasks", ["priority", "id"])
+    op.drop_index("ix_tasks_priority_due_date_assigned_at_id",
+                  table_name="tasks")
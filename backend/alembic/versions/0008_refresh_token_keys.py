@@ -0,0 +1,93 @@
+"""Key refresh tokens by digest
+
+Rebuilds ``refresh_tokens`` as a WITHOUT ROWID table keyed by the first 16
+bytes of the SHA-256 of each token instead of storing the token itself
+under a unique index, and adds the indexes behind the per-user session cap
+and the expiry sweeper. Live sessions are carried over, so signed-in
+clients keep working; expired ones are dropped.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-10-13 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+
+def token_key(token: str) -> bytes:
+    # Must match app.services.sessions.token_key
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refresh_tokens_new",
+        sa.Column("token_hash", sa.LargeBinary(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("token_hash"),
+        sqlite_with_rowid=False,
+    )
+
+    conn = op.get_bind()
+    result = conn.execute(sa.text("""
+        SELECT token, expires_at, created_at, user_id FROM refresh_tokens
+        WHERE expires_at > strftime('%Y-%m-%d %H:%M:%f', 'now')
+    """))
+    insert = sa.text("""
+        INSERT OR IGNORE INTO refresh_tokens_new
+            (token_hash, expires_at, created_at, user_id)
+        VALUES (:token_hash, :expires_at, :created_at, :user_id)
+    """)
+    while True:
+        rows = result.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        conn.execute(insert, [
+            {"token_hash": token_key(token), "expires_at": expires_at,
+             "created_at": created_at, "user_id": user_id}
+            for token, expires_at, created_at, user_id in rows
+        ])
+
+    op.drop_table("refresh_tokens")
+    op.rename_table("refresh_tokens_new", "refresh_tokens")
+    op.create_index("ix_refresh_tokens_user_id_created_at", "refresh_tokens",
+                    ["user_id", "created_at"])
+    op.create_index("ix_refresh_tokens_expires_at", "refresh_tokens",
+                    ["expires_at"])
+
+
+def downgrade() -> None:
+    # Tokens cannot be recovered from their digests, so every session ends
+    op.drop_index("ix_refresh_tokens_expires_at", table_name="refresh_tokens")
+    op.drop_index("ix_refresh_tokens_user_id_created_at",
+                  table_name="refresh_tokens")
+    op.drop_table("refresh_tokens")
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("token", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True),
+                  server_default=sa.text("(CURRENT_TIMESTAMP)"), nullable=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("token"),
+    )
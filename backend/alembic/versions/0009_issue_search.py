@@ -0,0 +1,83 @@
+"""Full-text index over issue title, description and address
+
+Adds ``issues_fts``, an external-content FTS5 table over the issue text
+keyed by ``issues.spatial_id``, so the text is stored once, in ``issues``.
+Words are stemmed (porter) and folded (unicode61 without diacritics), and
+results rank by BM25 with the title weighted above the address and the
+address above the description. Triggers keep the index in step with the
+table; existing issues are indexed by a rebuild.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-10-14 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGGERS = [
+    # spatial_id is assigned by issues_spatial_insert just after the row is
+    # inserted, so a new issue is indexed once it has its key
+    """
+    CREATE TRIGGER issues_fts_insert AFTER UPDATE OF spatial_id ON issues
+    WHEN OLD.spatial_id IS NULL AND NEW.spatial_id IS NOT NULL
+    BEGIN
+        INSERT INTO issues_fts (rowid, title, description, address)
+        VALUES (NEW.spatial_id, NEW.title, NEW.description, NEW.address);
+    END
+    """,
+    """
+    CREATE TRIGGER issues_fts_update
+    AFTER UPDATE OF title, description, address ON issues
+    WHEN OLD.spatial_id IS NOT NULL
+    BEGIN
+        INSERT INTO issues_fts (issues_fts, rowid, title, description, address)
+        VALUES ('delete', OLD.spatial_id, OLD.title, OLD.description,
+                OLD.address);
+        INSERT INTO issues_fts (rowid, title, description, address)
+        VALUES (NEW.spatial_id, NEW.title, NEW.description, NEW.address);
+    END
+    """,
+    """
+    CREATE TRIGGER issues_fts_delete AFTER DELETE ON issues
+    WHEN OLD.spatial_id IS NOT NULL
+    BEGIN
+        INSERT INTO issues_fts (issues_fts, rowid, title, description, address)
+        VALUES ('delete', OLD.spatial_id, OLD.title, OLD.description,
+                OLD.address);
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE issues_fts USING fts5("
+        "title, description, address, "
+        "content='issues', content_rowid='spatial_id', "
+        "tokenize='porter unicode61 remove_diacritics 2')"
+    )
+    # Default ranking, in column order: title, description, address
+    op.execute(
+        "INSERT INTO issues_fts (issues_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0, 3.0)')"
+    )
+    op.execute("INSERT INTO issues_fts (issues_fts) VALUES ('rebuild')")
+
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER issues_fts_delete")
+    op.execute("DROP TRIGGER issues_fts_update")
+    op.execute("DROP TRIGGER issues_fts_insert")
+    op.execute("DROP TABLE issues_fts")
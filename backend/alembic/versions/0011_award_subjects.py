@@ -0,0 +1,45 @@
+"""Once-only awards
+
+Creates ``award_subjects``, recording the issues and tasks that have
+already earned their resolution or completion award, so moving one out of
+resolved or completed and back earns nothing more. Issues and tasks that
+are already resolved or completed are recorded as awarded.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2025-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL = """
+    INSERT INTO award_subjects (kind, subject_id)
+    SELECT 'issue_resolved', id FROM issues WHERE status = 'RESOLVED'
+    UNION ALL
+    SELECT 'task_completed', id FROM tasks WHERE status = 'COMPLETED'
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "award_subjects",
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("subject_id", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "subject_id"),
+        sqlite_with_rowid=False,
+    )
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    op.drop_table("award_subjects")
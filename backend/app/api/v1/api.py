@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, issues, tasks
+from app.api.v1.endpoints import auth, users, issues, tasks, exports, events
 
 api_router = APIRouter()
 
@@ -9,3 +9,5 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(issues.router, prefix="/issues", tags=["issues"])
 api_router.include_router(tasks.router, prefix="/tasks", tags=["tasks"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
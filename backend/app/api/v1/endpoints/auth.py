@@ -2,12 +2,13 @@ from datetime import timedelta, datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from typing import Union
 import logging
 import uuid
 
-from app.core.database import get_db
-from app.models import User, RefreshToken
+from app.core.database import get_db, get_read_db
+from app.models import User
 from app.schemas.user import (
     LoginRequest,
     TokenResponse,
@@ -16,15 +17,18 @@ from app.schemas.user import (
     UserCreate,
     ChangePasswordRequest
 )
+from app.auth.hashing import password_hasher
 from app.auth.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     create_refresh_token,
     verify_token
 )
-from app.auth.dependencies import get_current_active_user
+from app.auth.claims import Principal
+from app.auth.dependencies import get_current_principal
 from app.core.config import settings
+from app.services.stats import user_counters, record_stats_change
+from app.services.sessions import store_session, rotate_session, revoke_session
+from app.services.leaderboard import track_leaderboard_change
 
 logger = logging.getLogger(__name__)
 
@@ -34,15 +38,26 @@ router = APIRouter()
 @router.post("/login", response_model=TokenResponse)
 async def login(
     login_data: LoginRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
 ):
-    """Authenticate user and return tokens"""
+    """Authenticate user and return tokens.
+
+    The user is looked up on a reader connection that is released before
+    the password is verified, so no connection is held while it waits for
+    the hashing pool.
+    """
     # Find user by email
     stmt = select(User).where(User.email == login_data.email)
-    result = await db.execute(stmt)
+    result = await read_db.execute(stmt)
     user = result.scalar_one_or_none()
+    await read_db.close()
 
-    if not user or not verify_password(login_data.password, user.password):
+    verified = False
+    if user:
+        verified, new_hash = await password_hasher.verify(
+            login_data.password, user.password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -73,13 +88,16 @@ async def login(
     refresh_token_expires_at = datetime.now(
         timezone.utc) + refresh_token_expires
 
-    # Store refresh token
-    refresh_token_obj = RefreshToken(
-        token=refresh_token,
-        user_id=user.id,
-        expires_at=refresh_token_expires_at
-    )
-    db.add(refresh_token_obj)
+    # Store refresh token, evicting the oldest session beyond the cap
+    await store_session(db, user.id, refresh_token, refresh_token_expires_at)
+
+    # Upgrade a hash made with outdated parameters in the same commit
+    if new_hash:
+        await db.execute(
+            update(User).where(User.id == user.id).values(password=new_hash))
+        logger.info("Password rehashed for user: %s", user.email,
+                    extra={"user_id": user.id})
+
     await db.commit()
 
     # Convert to response schema
@@ -115,20 +133,6 @@ async def refresh_token(
             detail="Invalid refresh token"
         )
 
-    # Check if refresh token exists in database
-    stmt = select(RefreshToken).where(
-        RefreshToken.token == refresh_data.refresh_token,
-        RefreshToken.user_id == user_id
-    )
-    result = await db.execute(stmt)
-    stored_token = result.scalar_one_or_none()
-
-    if not stored_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token not found"
-        )
-
     # Get user
     stmt = select(User).where(User.id == user_id)
     result = await db.execute(stmt)
@@ -155,10 +159,14 @@ async def refresh_token(
         expires_delta=refresh_token_expires
     )
 
-    # Update stored refresh token
+    # Swap the stored refresh token, which must still be live
     new_expires_at = datetime.now(timezone.utc) + refresh_token_expires
-    stored_token.token = new_refresh_token
-    stored_token.expires_at = new_expires_at
+    if not await rotate_session(db, user.id, refresh_data.refresh_token,
+                                new_refresh_token, new_expires_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token not found"
+        )
     await db.commit()
 
     user_response = UserResponse.from_orm(user)
@@ -179,13 +187,7 @@ async def logout(
 ):
     """Logout user by invalidating refresh token"""
     # Remove refresh token from database
-    stmt = select(RefreshToken).where(
-        RefreshToken.token == refresh_data.refresh_token)
-    result = await db.execute(stmt)
-    stored_token = result.scalar_one_or_none()
-
-    if stored_token:
-        await db.delete(stored_token)
+    if await revoke_session(db, refresh_data.refresh_token):
         await db.commit()
 
     return {"message": "Successfully logged out"}
@@ -197,6 +199,9 @@ async def register(
     db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
+    # Hash before touching the database so the writer is not held meanwhile
+    hashed_password = await password_hasher.hash(user_data.password)
+
     # Check if user already exists
     stmt = select(User).where(User.email == user_data.email)
     result = await db.execute(stmt)
@@ -209,7 +214,6 @@ async def register(
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
     user = User(
         email=user_data.email,
         password=hashed_password,
@@ -220,10 +224,13 @@ async def register(
     )
 
     db.add(user)
+    await record_stats_change(db, None, user_counters(user))
+    track_leaderboard_change(db, user)
     await db.commit()
     await db.refresh(user)
 
-    logger.info(f"New user registered: {user.email} with role {user.role}")
+    logger.info("New user registered: %s with role %s", user.email,
+                user.role.value, extra={"user_id": user.id})
 
     return UserResponse.from_orm(user)
 
@@ -231,21 +238,41 @@ async def register(
 @router.post("/change-password")
 async def change_password(
     password_data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Union[Principal, User] = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
 ):
-    """Change user password"""
+    """Change user password.
+
+    As in login, the stored hash is read on a reader connection released
+    before the hashing pool is awaited; the writer is only used for the
+    final update.
+    """
+    result = await read_db.execute(
+        select(User.email, User.password, User.is_active)
+        .where(User.id == current_user.id)
+    )
+    user = result.one_or_none()
+    await read_db.close()
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.password):
+    verified, _ = await password_hasher.verify(
+        password_data.current_password, user.password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
 
     # Update password
-    current_user.password = get_password_hash(password_data.new_password)
+    new_hash = await password_hasher.hash(password_data.new_password)
+    await db.execute(
+        update(User).where(User.id == current_user.id).values(password=new_hash))
     await db.commit()
 
-    logger.info(f"Password changed for user: {current_user.email}")
+    logger.info("Password changed for user: %s", user.email,
+                extra={"user_id": current_user.id})
 
     return {"message": "Password changed successfully"}
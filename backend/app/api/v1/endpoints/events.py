@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import time
+
+from app.core.config import settings
+from app.auth.dependencies import get_stream_principal
+from app.auth.claims import Principal, revocations
+from app.services.events import (
+    RESYNC,
+    Subscription,
+    event_broker,
+    parse_topics,
+    sse_message
+)
+
+router = APIRouter()
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+# Milliseconds an EventSource waits before reconnecting
+RECONNECT_MS = 3000
+
+
+@router.get("/stream")
+async def stream_events(
+    topics: Optional[str] = None,
+    current_user: Principal = Depends(get_stream_principal)
+):
+    """Live issue and task updates as Server-Sent Events.
+
+    ``topics`` is a comma-separated list of ``me`` (the default: the
+    caller's reports and tasks), ``issues``, ``tasks``, ``issue:<id>`` and
+    ``task:<id>``; events the caller could not read through the API are
+    never sent. Events are ``issue.updated``, ``issue.commented``,
+    ``issue.voted``, ``task.updated`` and ``task.assigned``. A client that
+    falls behind gets a ``resync`` event in place of the missed ones and
+    should refetch. The stream ends with ``expired`` when the access token
+    does; reconnect with a fresh one. Pass the token in the Authorization
+    header or, for EventSource, as ``access_token``.
+    """
+    try:
+        keys = parse_topics(topics, current_user)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    async def messages():
+        subscription = Subscription(current_user, keys)
+        event_broker.subscribe(subscription)
+        try:
+            yield f"retry: {RECONNECT_MS}\n\n".encode()
+            yield sse_message("ready", {"topics": sorted(keys)})
+            while True:
+                remaining = current_user.expires_at - time.time()
+                if remaining <= 0 or revocations.is_revoked(current_user):
+                    yield sse_message("expired", {})
+                    return
+
+                batch = await subscription.next_batch(
+                    min(settings.EVENTS_HEARTBEAT_SECONDS, remaining))
+                if batch is None:
+                    yield sse_message(RESYNC, {})
+                elif batch:
+                    yield b"".join(event.message for event in batch)
+                else:
+                    # Keeps proxies from closing an idle stream
+                    yield b": keep-alive\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        messages(),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.database import get_read_db
+from app.models import Issue, Task, Comment
+from app.auth.dependencies import get_admin_principal
+from app.auth.claims import Principal
+from app.services.exports import EXPORT_FORMATS, stream_export
+from app.api.v1.endpoints.issues import apply_issue_filters
+from app.api.v1.endpoints.tasks import apply_task_filters
+
+router = APIRouter()
+
+FORMAT_PATTERN = "^(" + "|".join(EXPORT_FORMATS) + ")$"
+
+# spatial_id is an internal key into issues_rtree
+ISSUE_EXPORT_COLUMNS = [column for column in Issue.__table__.c
+                        if column.name != "spatial_id"]
+
+
+def export_response(db: AsyncSession, query, name: str, export_format: str):
+    """Stream ``query`` as an attachment named after the export and date"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+    return StreamingResponse(
+        stream_export(db, query, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition":
+                 f'attachment; filename="{name}-{stamp}.{export_format}"'}
+    )
+
+
+@router.get("/issues")
+async def export_issues(
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    urgency: Optional[int] = None,
+    assigned_to_me: bool = False,
+    reported_by_me: bool = False,
+    current_user: Principal = Depends(get_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Export issues as CSV or NDJSON (admin only).
+
+    Takes the same filters as GET /issues and streams every matching row,
+    newest first.
+    """
+    query = select(*ISSUE_EXPORT_COLUMNS)
+    query = apply_issue_filters(
+        query, current_user, category, status, urgency,
+        assigned_to_me, reported_by_me
+    )
+    query = query.order_by(desc(Issue.reported_at), desc(Issue.id))
+
+    return export_response(db, query, "issues", format)
+
+
+@router.get("/tasks")
+async def export_tasks(
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assigned_to_me: bool = False,
+    current_user: Principal = Depends(get_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Export tasks as CSV or NDJSON (admin only).
+
+    Takes the same filters as GET /tasks and streams every matching row in
+    the same order.
+    """
+    query = select(*Task.__table__.c)
+    query = apply_task_filters(query, current_user, status, priority,
+                               assigned_to_me)
+    query = query.order_by(Task.due_date, desc(Task.assigned_at), desc(Task.id))
+
+    return export_response(db, query, "tasks", format)
+
+
+@router.get("/comments")
+async def export_comments(
+    format: str = Query("csv", pattern=FORMAT_PATTERN),
+    issue_id: Optional[str] = None,
+    current_user: Principal = Depends(get_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Export comments as CSV or NDJSON (admin only).
+
+    Streams the comments of one issue, or of every issue grouped by issue,
+    oldest first.
+    """
+    query = select(*Comment.__table__.c)
+    if issue_id:
+        query = query.where(Comment.issue_id == issue_id)
+    # Follows ix_comments_issue_created_at_id, so no sort is needed
+    query = query.order_by(Comment.issue_id, Comment.created_at, Comment.id)
+
+    return export_response(db, query, "comments", format)
@@ -1,44 +1,140 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, and_, or_
+from sqlalchemy import select, desc, or_, literal_column
+from sqlalchemy.orm import joinedload, selectinload
 from typing import List, Optional
-import uuid
 import os
 import logging
 import json
+import math
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.config import settings
-from app.models import Issue, User, Comment, Vote
+from app.core.pagination import keyset_column, paginate, next_page
+from app.core.streaming import DuplexStreamingResponse, NDJSON_MEDIA_TYPE, iter_lines
+from app.core.serialization import list_response, response_columns
+from app.services.votes import cast_vote
+from app.services.comments import add_comment_counts
+from app.services.ingest import (
+    BULK_BATCH_SIZE,
+    MAX_LINE_BYTES,
+    insert_issue_batch,
+    new_tracking_id
+)
+from app.services.stats import issue_counters, record_stats_change, get_counters
+from app.services.geo import bounding_box, haversine_m
+from app.services.search import match_expression
+from app.services.duplicates import (
+    find_duplicates,
+    text_signature,
+    track_issue_change
+)
+from app.services.awards import (
+    COMMENT_POSTED,
+    ISSUE_REPORTED,
+    ISSUE_RESOLVED,
+    emit_award,
+    emit_award_once
+)
+from app.services.events import publish_comment, publish_issue_change
+from app.services.clusters import (
+    get_clusters,
+    level_for_zoom,
+    cell_size,
+    cell_of,
+    position_of,
+    record_issue_change,
+    TILE_CELLS
+)
+from app.models import Issue, User, Comment, issues_rtree, issues_fts
 from app.schemas.issue import (
     IssueResponse,
     IssueCreate,
+    IssueCreateResponse,
+    DuplicateCandidate,
     IssueUpdate,
     IssueDetailResponse,
+    NearbyIssueResponse,
+    IssueClusterResponse,
     CommentCreate,
     CommentResponse,
     VoteRequest
 )
 from app.auth.dependencies import (
     get_current_active_user,
+    get_current_principal,
     get_staff_or_admin,
+    get_staff_or_admin_principal,
     get_fieldworker_or_staff_or_admin
 )
+from app.auth.claims import Principal
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Columns read by the list endpoints, which skip ORM instances
+ISSUE_LIST_COLUMNS = response_columns(IssueResponse, Issue.__table__)
+
+# Fractions of the radius /nearby searches in turn; a dense area stops at
+# the first box already holding enough issues
+NEARBY_SEARCH_DIVISORS = (32, 8, 2, 1)
+# Candidates fetched per result, so ordering by flat-earth distance in SQL
+# cannot push one of the nearest issues past the limit
+NEARBY_CANDIDATES_PER_RESULT = 2
+
+
+def apply_issue_filters(
+    query,
+    current_user: User,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    urgency: Optional[int] = None,
+    assigned_to_me: bool = False,
+    reported_by_me: bool = False
+):
+    """Apply the list filters and role-based visibility shared by issue queries"""
+    # Apply filters
+    if category:
+        query = query.where(Issue.category == category)
+    if status:
+        query = query.where(Issue.status == status)
+    if urgency:
+        query = query.where(Issue.urgency == urgency)
 
-@router.post("/", response_model=IssueResponse)
+    # Role-based filtering
+    if current_user.role.value == "citizen":
+        # Citizens can only see their own issues
+        query = query.where(Issue.reporter_id == current_user.id)
+    elif assigned_to_me:
+        # Show only issues assigned to current user
+        query = query.where(Issue.assignee_id == current_user.id)
+    elif reported_by_me:
+        # Show only issues reported by current user
+        query = query.where(Issue.reporter_id == current_user.id)
+
+    return query
+
+
+@router.post("/", response_model=IssueCreateResponse)
 async def create_issue(
     issue_data: IssueCreate,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Create a new issue report"""
+    """Create a new issue report.
+
+    Open issues of the same category nearby whose text is similar are
+    returned as ``possible_duplicates``, so the client can offer to vote
+    on one of them instead.
+    """
+    signature = text_signature(issue_data.title, issue_data.description)
+    duplicates = find_duplicates(issue_data.category, issue_data.latitude,
+                                 issue_data.longitude, signature)
+
     # Generate tracking ID
-    tracking_id = f"TRK-{uuid.uuid4().hex[:8].upper()}"
+    tracking_id = new_tracking_id()
 
     # Create issue
     issue = Issue(
@@ -56,65 +152,354 @@ async def create_issue(
     )
 
     db.add(issue)
+    await record_issue_change(db, None, position_of(issue))
+    await record_stats_change(db, None, issue_counters(issue))
+    track_issue_change(db, issue, signature)
+    emit_award(db, current_user.id, ISSUE_REPORTED)
     await db.commit()
     await db.refresh(issue)
 
-    logger.info(f"Issue created: {tracking_id} by {current_user.email}")
+    logger.info("Issue created: %s by %s", tracking_id, current_user.email,
+                extra={"issue_id": issue.id,
+                       "possible_duplicates": len(duplicates)})
+
+    response = IssueCreateResponse.from_orm(issue)
+    response.possible_duplicates = [
+        DuplicateCandidate(id=match.issue_id, tracking_id=match.tracking_id,
+                           distance_m=round(match.distance_m, 1),
+                           similarity=round(match.similarity, 3))
+        for match in duplicates
+    ]
+    return response
+
 
-    return IssueResponse.from_orm(issue)
+@router.post("/bulk")
+async def bulk_create_issues(
+    request: Request,
+    current_user: User = Depends(get_staff_or_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create issues from an NDJSON body (staff and admin only).
+
+    Each line is an IssueCreate record reported by the caller. Records are
+    validated as they arrive and inserted in batches of BULK_BATCH_SIZE,
+    one transaction per batch. The response is NDJSON as well: one result
+    per input line, ``{"line", "status": "created", "id", "tracking_id"}``
+    or ``{"line", "status": "error", "errors"}``, emitted as each batch
+    commits, followed by a ``{"summary": {...}}`` line.
+    """
+    reporter_id = current_user.id
+
+    def encode(results):
+        return "".join(json.dumps(result) + "\n" for result in results)
+
+    async def results():
+        created = failed = 0
+        batch = []
+        async for line_number, line in iter_lines(request.stream(), MAX_LINE_BYTES):
+            if line is None:
+                failed += 1
+                yield encode([{"line": line_number, "status": "error", "errors": [
+                    {"loc": [], "msg": f"Line exceeds {MAX_LINE_BYTES} bytes"}]}])
+                continue
+
+            try:
+                batch.append((line_number, IssueCreate.model_validate_json(line)))
+            except ValidationError as e:
+                failed += 1
+                yield encode([{"line": line_number, "status": "error", "errors": [
+                    {"loc": list(error["loc"]), "msg": error["msg"]}
+                    for error in e.errors()]}])
+                continue
+
+            if len(batch) >= BULK_BATCH_SIZE:
+                outcome = await insert_issue_batch(db, reporter_id, batch)
+                batch = []
+                created += sum(r["status"] == "created" for r in outcome)
+                failed += sum(r["status"] == "error" for r in outcome)
+                yield encode(outcome)
+
+        if batch:
+            outcome = await insert_issue_batch(db, reporter_id, batch)
+            created += sum(r["status"] == "created" for r in outcome)
+            failed += sum(r["status"] == "error" for r in outcome)
+            yield encode(outcome)
+
+        logger.info("Bulk issue import by %s: %d created, %d failed",
+                    reporter_id, created, failed)
+        yield encode([{"summary": {"created": created, "failed": failed}}])
+
+    return DuplexStreamingResponse(results(), media_type=NDJSON_MEDIA_TYPE)
 
 
 @router.get("/", response_model=List[IssueResponse])
 async def get_issues(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     category: Optional[str] = None,
     status: Optional[str] = None,
     urgency: Optional[int] = None,
     assigned_to_me: bool = False,
     reported_by_me: bool = False,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get list of issues with filtering"""
-    query = select(Issue)
+    """Get list of issues with filtering.
 
-    # Apply filters
-    if category:
-        query = query.where(Issue.category == category)
-    if status:
-        query = query.where(Issue.status == status)
-    if urgency:
-        query = query.where(Issue.urgency == urgency)
+    Pages are keyed on (reported_at, id); pass the X-Next-Cursor header of
+    a response back as ``cursor`` to fetch the next page.
+    """
+    reported_at = keyset_column(Issue.reported_at)
+    query = select(*ISSUE_LIST_COLUMNS, reported_at.label("cursor_reported_at"))
 
-    # Role-based filtering
-    if current_user.role.value == "citizen":
-        # Citizens can only see their own issues
-        query = query.where(Issue.reporter_id == current_user.id)
-    elif assigned_to_me:
-        # Show only issues assigned to current user
-        query = query.where(Issue.assignee_id == current_user.id)
-    elif reported_by_me:
-        # Show only issues reported by current user
-        query = query.where(Issue.reporter_id == current_user.id)
+    query = apply_issue_filters(
+        query, current_user, category, status, urgency,
+        assigned_to_me, reported_by_me
+    )
 
     # Order by creation date (newest first)
-    query = query.order_by(desc(Issue.reported_at)).offset(skip).limit(limit)
+    query = paginate(query, [(reported_at, True), (Issue.id, True)],
+                     cursor, limit)
+
+    result = await db.execute(query)
+    rows = next_page(result.all(), limit, response,
+                     lambda row: (row.cursor_reported_at, row.id))
+
+    issues = await add_comment_counts(db, [dict(row._mapping) for row in rows])
+    return list_response(IssueResponse, issues, response)
+
+
+def within_box(query, min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    """Restrict an issue query to a bounding box through the R*Tree index"""
+    tree = issues_rtree.c
+    return query.join(issues_rtree, tree.id == Issue.spatial_id).where(
+        tree.min_lat >= min_lat,
+        tree.max_lat <= max_lat,
+        tree.min_lng >= min_lng,
+        tree.max_lng <= max_lng,
+        # The tree stores 32-bit floats rounded outwards; recheck exactly
+        Issue.latitude.between(min_lat, max_lat),
+        Issue.longitude.between(min_lng, max_lng)
+    )
+
+
+@router.get("/nearby", response_model=List[NearbyIssueResponse])
+async def get_nearby_issues(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(1000, gt=0, le=10000,
+                          description="Search radius in meters"),
+    limit: int = Query(50, ge=1, le=200),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    urgency: Optional[int] = None,
+    assigned_to_me: bool = False,
+    reported_by_me: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get issues within ``radius`` meters of a point, nearest first.
+
+    Boxes of growing size are searched until one holds ``limit`` issues
+    within its own radius. Each fetch is ordered by squared flat-earth
+    distance and limited in SQL, so only a small candidate set is read and
+    ranked by great-circle distance, however dense the area.
+    """
+    cos_lat = math.cos(math.radians(lat))
+    d_lat = Issue.latitude - lat
+    d_lng = Issue.longitude - lng
+    flat_distance = d_lat * d_lat + d_lng * d_lng * (cos_lat * cos_lat)
+
+    for divisor in NEARBY_SEARCH_DIVISORS:
+        search_radius = radius / divisor
+        query = within_box(select(*ISSUE_LIST_COLUMNS),
+                           *bounding_box(lat, lng, search_radius))
+        query = apply_issue_filters(
+            query, current_user, category, status, urgency,
+            assigned_to_me, reported_by_me
+        )
+        query = query.order_by(flat_distance).limit(
+            limit * NEARBY_CANDIDATES_PER_RESULT)
+
+        result = await db.execute(query)
+
+        nearby = []
+        for row in result:
+            distance = haversine_m(lat, lng, row.latitude, row.longitude)
+            if distance <= search_radius:
+                nearby.append((distance, row))
+        if len(nearby) >= limit:
+            break
+    nearby.sort(key=lambda item: item[0])
+
+    issues = [
+        dict(row._mapping, distance_m=round(distance, 1))
+        for distance, row in nearby[:limit]
+    ]
+    issues = await add_comment_counts(db, issues)
+    return list_response(NearbyIssueResponse, issues)
+
+
+@router.get("/bbox", response_model=List[IssueResponse])
+async def get_issues_in_box(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    limit: int = Query(200, ge=1, le=1000),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    urgency: Optional[int] = None,
+    assigned_to_me: bool = False,
+    reported_by_me: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get issues inside a map viewport, newest first"""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(
+            status_code=400,
+            detail="Bounding box minimums must not exceed maximums"
+        )
+
+    query = within_box(select(*ISSUE_LIST_COLUMNS),
+                       min_lat, min_lng, max_lat, max_lng)
+    query = apply_issue_filters(
+        query, current_user, category, status, urgency,
+        assigned_to_me, reported_by_me
+    )
+    query = query.order_by(desc(Issue.reported_at), desc(Issue.id)).limit(limit)
 
     result = await db.execute(query)
-    issues = result.scalars().all()
+    issues = await add_comment_counts(db, [dict(row._mapping) for row in result])
+    return list_response(IssueResponse, issues)
+
+
+@router.get("/search", response_model=List[IssueResponse])
+async def search_issues(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200,
+                   description="Words to find in title, description or address"),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    urgency: Optional[int] = None,
+    assigned_to_me: bool = False,
+    reported_by_me: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Search issues by text, best match first.
+
+    Every word of ``q`` must match; the last may be the start of a word.
+    Pages are keyed on (rank, spatial_id) and follow X-Next-Cursor like
+    the issue list.
+    """
+    expression = match_expression(q)
+    if expression is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Search query must contain a word"
+        )
+
+    fts = issues_fts.c
+    query = (
+        select(*ISSUE_LIST_COLUMNS, fts.rank.label("cursor_rank"),
+               Issue.spatial_id.label("cursor_spatial_id"))
+        .select_from(issues_fts)
+        .join(Issue, Issue.spatial_id == fts.rowid)
+        .where(literal_column("issues_fts").match(expression))
+    )
+    query = apply_issue_filters(
+        query, current_user, category, status, urgency,
+        assigned_to_me, reported_by_me
+    )
+    query = paginate(query, [(fts.rank, False), (Issue.spatial_id, False)],
+                     cursor, limit)
+
+    result = await db.execute(query)
+    rows = next_page(result.all(), limit, response,
+                     lambda row: (row.cursor_rank, row.cursor_spatial_id))
+
+    issues = await add_comment_counts(db, [dict(row._mapping) for row in rows])
+    return list_response(IssueResponse, issues, response)
+
+
+# Most grid tiles a single cluster request may touch
+MAX_CLUSTER_TILES = 64
+
+
+@router.get("/clusters", response_model=IssueClusterResponse)
+async def get_issue_clusters(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lng: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lng: float = Query(..., ge=-180, le=180),
+    zoom: int = Query(..., ge=0, le=22),
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get issue counts per grid cell for a map viewport.
+
+    Counts come from the pre-aggregated grid, so the response size and
+    cost depend on the number of visible cells, not the number of issues.
+    Clusters carry no personal data and cover all issues for every role.
+    """
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(
+            status_code=400,
+            detail="Bounding box minimums must not exceed maximums"
+        )
+
+    level = level_for_zoom(zoom)
+    min_x, min_y = cell_of(level, min_lat, min_lng)
+    max_x, max_y = cell_of(level, max_lat, max_lng)
+    tiles = ((max_x // TILE_CELLS - min_x // TILE_CELLS + 1) *
+             (max_y // TILE_CELLS - min_y // TILE_CELLS + 1))
+    if tiles > MAX_CLUSTER_TILES:
+        raise HTTPException(
+            status_code=400,
+            detail="Viewport too large for this zoom level"
+        )
 
-    return [IssueResponse.from_orm(issue) for issue in issues]
+    clusters = await get_clusters(
+        db, level, min_lat, min_lng, max_lat, max_lng,
+        categories={category} if category else None,
+        statuses={status} if status else None
+    )
+
+    return IssueClusterResponse(
+        level=level,
+        cell_size_deg=cell_size(level),
+        clusters=clusters
+    )
 
 
 @router.get("/{issue_id}", response_model=IssueDetailResponse)
 async def get_issue_detail(
     issue_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get detailed issue information"""
-    issue = await db.get(Issue, issue_id)
+    """Get detailed issue information.
+
+    Loads in two statements: the issue joined to its reporter and assignee,
+    then its comments joined to their authors.
+    """
+    result = await db.execute(
+        select(Issue)
+        .options(
+            joinedload(Issue.reporter),
+            joinedload(Issue.assignee),
+            selectinload(Issue.comments).joinedload(Comment.author)
+        )
+        .where(Issue.id == issue_id)
+    )
+    issue = result.scalar_one_or_none()
     if not issue:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -129,13 +514,10 @@ async def get_issue_detail(
             detail="Not authorized to view this issue"
         )
 
-    # Get comments count
-    comments_count = await db.execute(
-        select(func.count(Comment.id)).where(Comment.issue_id == issue_id)
-    )
-    issue.comments_count = comments_count.scalar()
+    detail = IssueDetailResponse.from_orm(issue)
+    detail.comments_count = len(issue.comments)
 
-    return IssueDetailResponse.from_orm(issue)
+    return detail
 
 
 @router.put("/{issue_id}", response_model=IssueResponse)
@@ -161,6 +543,8 @@ async def update_issue(
         )
 
     # Update fields
+    before = position_of(issue)
+    before_stats = issue_counters(issue)
     for field, value in issue_update.dict(exclude_unset=True).items():
         if hasattr(issue, field):
             if field == "images" and isinstance(value, list):
@@ -169,10 +553,17 @@ async def update_issue(
             else:
                 setattr(issue, field, value)
 
+    await record_issue_change(db, before, position_of(issue))
+    await record_stats_change(db, before_stats, issue_counters(issue))
+    track_issue_change(db, issue)
+    publish_issue_change(db, issue)
+    if before.status != "resolved" and position_of(issue).status == "resolved":
+        await emit_award_once(db, issue.reporter_id, ISSUE_RESOLVED, issue.id)
     await db.commit()
     await db.refresh(issue)
 
-    logger.info(f"Issue updated: {issue.tracking_id}")
+    logger.info("Issue updated: %s", issue.tracking_id,
+                extra={"issue_id": issue.id})
 
     return IssueResponse.from_orm(issue)
 
@@ -208,23 +599,30 @@ async def add_comment(
     )
 
     db.add(comment)
+    emit_award(db, current_user.id, COMMENT_POSTED)
     await db.commit()
     await db.refresh(comment)
-
-    # Create response with author name
-    response = CommentResponse.from_orm(comment)
-    response.author_name = current_user.name
-
-    return response
+    publish_comment(issue, comment, current_user.name)
+
+    return CommentResponse(
+        id=comment.id,
+        text=comment.text,
+        created_at=comment.created_at,
+        author_id=comment.author_id,
+        author_name=current_user.name
+    )
 
 
 @router.get("/{issue_id}/comments", response_model=List[CommentResponse])
 async def get_issue_comments(
     issue_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get comments for an issue"""
+    """Get comments for an issue, oldest first, keyed on (created_at, id)"""
     issue = await db.get(Issue, issue_id)
     if not issue:
         raise HTTPException(
@@ -241,20 +639,20 @@ async def get_issue_comments(
             detail="Not authorized to view comments for this issue"
         )
 
-    query = select(Comment, User.name).join(
-        User).where(Comment.issue_id == issue_id)
-    query = query.order_by(Comment.created_at)
+    created_at = keyset_column(Comment.created_at)
+    query = select(
+        Comment.id, Comment.text, Comment.created_at, Comment.author_id,
+        User.name.label("author_name"), created_at.label("cursor_created_at")
+    ).join(User, Comment.author_id == User.id).where(Comment.issue_id == issue_id)
+    query = paginate(query, [(created_at, False), (Comment.id, False)],
+                     cursor, limit)
 
     result = await db.execute(query)
-    comments = result.all()
-
-    response_comments = []
-    for comment, author_name in comments:
-        comment_response = CommentResponse.from_orm(comment)
-        comment_response.author_name = author_name
-        response_comments.append(comment_response)
+    comments = next_page(result.all(), limit, response,
+                         lambda row: (row.cursor_created_at, row.id))
 
-    return response_comments
+    return list_response(CommentResponse,
+                         [row._mapping for row in comments], response)
 
 
 @router.post("/{issue_id}/vote")
@@ -265,85 +663,45 @@ async def vote_issue(
     db: AsyncSession = Depends(get_db)
 ):
     """Vote on an issue (upvote/downvote)"""
-    issue = await db.get(Issue, issue_id)
-    if not issue:
+    counts = await cast_vote(db, issue_id, current_user.id, vote_data.is_upvote)
+    if counts is None:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Issue not found"
         )
 
-    # Check if user already voted
-    existing_vote = await db.execute(
-        select(Vote).where(
-            and_(Vote.issue_id == issue_id, Vote.user_id == current_user.id)
-        )
-    )
-    vote = existing_vote.scalar_one_or_none()
-
-    if vote:
-        # Update existing vote
-        vote.is_upvote = vote_data.is_upvote
-    else:
-        # Create new vote
-        vote = Vote(
-            issue_id=issue_id,
-            user_id=current_user.id,
-            is_upvote=vote_data.is_upvote
-        )
-        db.add(vote)
-
-    await db.commit()
-
-    # Update issue vote counts
-    upvotes = await db.execute(
-        select(func.count(Vote.id)).where(
-            and_(Vote.issue_id == issue_id, Vote.is_upvote == True)
-        )
-    )
-    downvotes = await db.execute(
-        select(func.count(Vote.id)).where(
-            and_(Vote.issue_id == issue_id, Vote.is_upvote == False)
-        )
-    )
-
-    issue.upvotes = upvotes.scalar()
-    issue.downvotes = downvotes.scalar()
     await db.commit()
 
-    return {"message": "Vote recorded successfully"}
+    upvotes, downvotes = counts
+    return {
+        "message": "Vote recorded successfully",
+        "upvotes": upvotes,
+        "downvotes": downvotes
+    }
 
 
 @router.get("/stats/overview")
 async def get_issue_stats(
-    current_user: User = Depends(get_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get issue statistics overview (staff and admin only)"""
-    # Count by status
-    status_counts = await db.execute(
-        select(Issue.status, func.count(Issue.id))
-        .group_by(Issue.status)
-    )
-    status_stats = {status.value: count for status, count in status_counts}
+    counters = await get_counters(
+        db, "issues.status", "issues.category", "issues.resolution")
 
-    # Count by category
-    category_counts = await db.execute(
-        select(Issue.category, func.count(Issue.id))
-        .group_by(Issue.category)
-    )
-    category_stats = {category.value: count for category,
-                      count in category_counts}
+    status_stats = {key: count for key, (count, _) in counters["issues.status"].items()}
+    category_stats = {key: count for key, (count, _)
+                      in counters["issues.category"].items()}
 
     # Average resolution time (for resolved issues)
-    resolved_issues = await db.execute(
-        select(func.avg(func.extract('epoch', Issue.updated_at - Issue.reported_at)))
-        .where(Issue.status == "resolved")
-    )
-    avg_resolution_time = resolved_issues.scalar()
+    resolved_count, resolution_seconds = counters["issues.resolution"].get(
+        "resolved", (0, 0.0))
 
     return {
         "total_issues": sum(status_stats.values()),
         "status_breakdown": status_stats,
         "category_breakdown": category_stats,
-        "avg_resolution_hours": avg_resolution_time / 3600 if avg_resolution_time else None
+        "avg_resolution_hours": (resolution_seconds / resolved_count / 3600
+                                 if resolved_count else None)
     }
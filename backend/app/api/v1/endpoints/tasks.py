@@ -1,29 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, and_
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
+import asyncio
 import logging
 import uuid
-
-from app.core.database import get_db
-from app.models import Task, User, Issue
+import json
+
+from app.core.database import get_db, get_read_db
+from app.core.pagination import keyset_column, paginate, next_page
+from app.core.serialization import list_response, response_columns
+from app.services.stats import (
+    issue_counters,
+    task_counters,
+    record_stats_change,
+    get_counters
+)
+from app.services.clusters import position_of, record_issue_change
+from app.services.duplicates import track_issue_change
+from app.services.comments import comment_counts
+from app.services.awards import ISSUE_RESOLVED, TASK_COMPLETED, emit_award_once
+from app.services.events import publish_issue_change, publish_task_change
+from app.services.assignment import (
+    create_assignments,
+    load_pending_issues,
+    load_workers,
+    plan_assignments
+)
+from app.services.routing import Stop, worker_route
+from app.models import Task, TaskStatus, User, Issue
 from app.schemas.task import (
     TaskResponse,
     TaskCreate,
     TaskUpdate,
     TaskDetailResponse,
-    TaskAssignmentRequest
+    TaskAssignmentRequest,
+    RouteStop,
+    AutoAssignRequest,
+    AutoAssignResponse
 )
 from app.auth.dependencies import (
     get_current_active_user,
     get_staff_or_admin,
-    get_fieldworker_or_staff_or_admin
+    get_staff_or_admin_principal,
+    get_fieldworker_or_staff_or_admin,
+    get_fieldworker_or_staff_or_admin_principal
 )
+from app.auth.claims import Principal
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Columns read by GET /tasks, which skips ORM instances
+TASK_LIST_COLUMNS = response_columns(TaskResponse, Task.__table__)
+
+
+def apply_task_filters(
+    query,
+    current_user: User,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assigned_to_me: bool = False
+):
+    """Apply the list filters and role-based visibility shared by task queries"""
+    # Apply filters
+    if status:
+        query = query.where(Task.status == status)
+    if priority:
+        query = query.where(Task.priority == priority)
+
+    # Role-based filtering
+    if current_user.role.value == "fieldworker":
+        # Fieldworkers can only see their assigned tasks
+        query = query.where(Task.assignee_id == current_user.id)
+    elif assigned_to_me:
+        # Show only tasks assigned to current user
+        query = query.where(Task.assignee_id == current_user.id)
+
+    return query
+
 
 @router.post("/", response_model=TaskResponse)
 async def create_task(
@@ -67,71 +124,185 @@ async def create_task(
         longitude=task_data.longitude,
         address=task_data.address,
         category=task_data.category,
-        images=task_data.images,
+        images=json.dumps(task_data.images),  # Convert list to JSON string
         due_date=task_data.due_date,
         issue_id=task_data.issue_id,
         assignee_id=task_data.assignee_id
     )
 
     db.add(task)
-    await db.commit()
-    await db.refresh(task)
+    await record_stats_change(db, None, task_counters(task))
 
     # Update issue status to assigned
+    before = position_of(issue)
+    before_stats = issue_counters(issue)
     issue.status = "assigned"
     issue.assignee_id = task_data.assignee_id
+    await record_issue_change(db, before, position_of(issue))
+    await record_stats_change(db, before_stats, issue_counters(issue))
+    publish_task_change(db, task, "task.assigned")
+    publish_issue_change(db, issue)
     await db.commit()
+    await db.refresh(task)
 
-    logger.info(f"Task created: {task.title} assigned to {assignee.email}")
+    logger.info("Task created: %s assigned to %s", task.title, assignee.email,
+                extra={"task_id": task.id})
 
     return TaskResponse.from_orm(task)
 
 
+@router.post("/auto-assign", response_model=AutoAssignResponse)
+async def auto_assign_tasks(
+    request: AutoAssignRequest,
+    current_user: Principal = Depends(get_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db)
+):
+    """Assign every pending issue without a task in one batch (staff and admin only).
+
+    Issues go to active fieldworkers by travel distance from the centre of
+    their current tasks, with a penalty for categories they have not
+    handled, most urgent issues first, until each worker carries
+    ``max_tasks_per_worker`` open tasks. The plan is made from a reader
+    snapshot, so the writer is only held for the short transaction that
+    creates the tasks; issues given a task or moved on in the meantime are
+    returned as ``skipped``. With ``dry_run`` the plan is returned without
+    creating anything.
+    """
+    issues = await load_pending_issues(read_db, request.categories)
+    workers = await load_workers(read_db, request.max_tasks_per_worker)
+    await read_db.close()
+
+    # The cost matrix for thousands of issues takes a while; keep it off
+    # the event loop
+    choice = await asyncio.to_thread(
+        plan_assignments, issues, workers, request.max_distance_km,
+        request.category_penalty_km)
+
+    assignments, skipped = await create_assignments(
+        db, issues, workers, choice, write=not request.dry_run)
+    if not request.dry_run:
+        await db.commit()
+
+    logger.info("Auto-assigned %d of %d pending issues to %d fieldworkers",
+                len(assignments), len(issues.rows), len(workers.ids),
+                extra={"dry_run": request.dry_run, "skipped": len(skipped)})
+
+    return AutoAssignResponse(
+        assigned=len(assignments),
+        unassigned=len(issues.rows) - len(assignments),
+        workers=len(workers.ids),
+        dry_run=request.dry_run,
+        assignments=[assignment._asdict() for assignment in assignments],
+        skipped=skipped
+    )
+
+
 @router.get("/", response_model=List[TaskResponse])
 async def get_tasks(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     status: Optional[str] = None,
     priority: Optional[str] = None,
     assigned_to_me: bool = False,
-    current_user: User = Depends(get_fieldworker_or_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_fieldworker_or_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get list of tasks with filtering"""
-    query = select(Task)
+    """Get list of tasks with filtering.
 
-    # Apply filters
-    if status:
-        query = query.where(Task.status == status)
-    if priority:
-        query = query.where(Task.priority == priority)
+    Pages are keyed on (due_date, assigned_at, id); pass the X-Next-Cursor
+    header of a response back as ``cursor`` to fetch the next page.
+    """
+    due_date = keyset_column(Task.due_date)
+    assigned_at = keyset_column(Task.assigned_at)
+    query = select(*TASK_LIST_COLUMNS, due_date.label("cursor_due_date"),
+                   assigned_at.label("cursor_assigned_at"))
 
-    # Role-based filtering
-    if current_user.role.value == "fieldworker":
-        # Fieldworkers can only see their assigned tasks
-        query = query.where(Task.assignee_id == current_user.id)
-    elif assigned_to_me:
-        # Show only tasks assigned to current user
-        query = query.where(Task.assignee_id == current_user.id)
+    query = apply_task_filters(query, current_user, status, priority,
+                               assigned_to_me)
 
     # Order by due date (urgent first) then creation date
-    query = query.order_by(Task.due_date, desc(
-        Task.assigned_at)).offset(skip).limit(limit)
+    query = paginate(
+        query,
+        [(due_date, False), (assigned_at, True), (Task.id, True)],
+        cursor,
+        limit
+    )
 
     result = await db.execute(query)
-    tasks = result.scalars().all()
+    rows = next_page(result.all(), limit, response,
+                     lambda row: (row.cursor_due_date, row.cursor_assigned_at,
+                                  row.id))
 
-    return [TaskResponse.from_orm(task) for task in tasks]
+    return list_response(TaskResponse, [row._mapping for row in rows], response)
+
+
+@router.get("/route", response_model=List[RouteStop])
+async def get_task_route(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    assignee_id: Optional[str] = None,
+    current_user: Principal = Depends(get_fieldworker_or_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Open tasks of a fieldworker in visiting order.
+
+    Fieldworkers get their own route; staff and admin pass ``assignee_id``.
+    The route starts at ``lat``/``lng`` when given, otherwise at the
+    earliest-due task, and covers the tasks a due day at a time. It is
+    planned once and reused until the worker's open tasks change.
+    """
+    if current_user.role.value == "fieldworker":
+        assignee_id = current_user.id
+    elif not assignee_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="assignee_id is required"
+        )
+    if (lat is None) != (lng is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lat and lng must be given together"
+        )
+
+    result = await db.execute(
+        select(*TASK_LIST_COLUMNS)
+        .where(Task.assignee_id == assignee_id,
+               Task.status.in_([TaskStatus.NEW, TaskStatus.ACCEPTED,
+                                TaskStatus.IN_PROGRESS]))
+        .order_by(Task.due_date, Task.id)
+    )
+    rows = result.all()
+    stops = [Stop(row.id, row.latitude, row.longitude, row.due_date)
+             for row in rows]
+    # Planning a fresh route is pure CPU; keep it off the event loop
+    route = await asyncio.to_thread(
+        worker_route, assignee_id, stops,
+        (lat, lng) if lat is not None else None)
+
+    return list_response(RouteStop, [
+        {**rows[i]._mapping, "sequence": sequence, "distance_m": round(leg, 1)}
+        for sequence, (i, leg) in enumerate(zip(route.order, route.legs), 1)
+    ])
 
 
 @router.get("/{task_id}", response_model=TaskDetailResponse)
 async def get_task_detail(
     task_id: str,
-    current_user: User = Depends(get_fieldworker_or_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_fieldworker_or_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get detailed task information"""
-    task = await db.get(Task, task_id)
+    """Get detailed task information.
+
+    The task, its issue and its assignee load in one joined statement.
+    """
+    result = await db.execute(
+        select(Task)
+        .options(joinedload(Task.issue), joinedload(Task.assignee))
+        .where(Task.id == task_id)
+    )
+    task = result.scalar_one_or_none()
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -146,7 +317,12 @@ async def get_task_detail(
             detail="Not authorized to view this task"
         )
 
-    return TaskDetailResponse.from_orm(task)
+    detail = TaskDetailResponse.from_orm(task)
+    if detail.issue:
+        counts = await comment_counts(db, [task.issue_id])
+        detail.issue.comments_count = counts.get(task.issue_id, 0)
+
+    return detail
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
@@ -184,6 +360,8 @@ async def update_task(
                 )
 
     # Update fields
+    before_stats = task_counters(task)
+    was_completed = task.status == TaskStatus.COMPLETED
     for field, value in task_update.dict(exclude_unset=True).items():
         if hasattr(task, field):
             setattr(task, field, value)
@@ -193,17 +371,32 @@ async def update_task(
         from datetime import datetime, timezone
         task.completed_at = datetime.now(timezone.utc)
 
-    await db.commit()
-    await db.refresh(task)
+    await record_stats_change(db, before_stats, task_counters(task))
+    publish_task_change(db, task)
+    if task_update.status == "completed" and not was_completed:
+        await emit_award_once(db, task.assignee_id, TASK_COMPLETED, task.id)
 
     # Update issue status if task is completed
     if task_update.status == "completed":
         issue = await db.get(Issue, task.issue_id)
         if issue:
+            before = position_of(issue)
+            before_issue_stats = issue_counters(issue)
             issue.status = "resolved"
-            await db.commit()
+            await record_issue_change(db, before, position_of(issue))
+            await record_stats_change(db, before_issue_stats,
+                                      issue_counters(issue))
+            track_issue_change(db, issue)
+            publish_issue_change(db, issue)
+            if before.status != "resolved":
+                await emit_award_once(db, issue.reporter_id, ISSUE_RESOLVED,
+                                      issue.id)
 
-    logger.info(f"Task updated: {task.title} - status: {task.status}")
+    await db.commit()
+    await db.refresh(task)
+
+    logger.info("Task updated: %s - status: %s", task.title,
+                task.status.value, extra={"task_id": task.id})
 
     return TaskResponse.from_orm(task)
 
@@ -232,47 +425,43 @@ async def assign_task(
         )
 
     # Update task
+    before_stats = task_counters(task)
     task.assignee_id = assignment_data.assignee_id
     task.due_date = assignment_data.due_date
     task.priority = assignment_data.priority
     task.status = "new"  # Reset status when reassigned
-
-    await db.commit()
-    await db.refresh(task)
+    await record_stats_change(db, before_stats, task_counters(task))
+    publish_task_change(db, task, "task.assigned")
 
     # Update issue assignee
     issue = await db.get(Issue, task.issue_id)
     if issue:
         issue.assignee_id = assignment_data.assignee_id
-        await db.commit()
+        publish_issue_change(db, issue)
+
+    await db.commit()
+    await db.refresh(task)
 
-    logger.info(f"Task reassigned: {task.title} to {assignee.email}")
+    logger.info("Task reassigned: %s to %s", task.title, assignee.email,
+                extra={"task_id": task.id})
 
     return TaskResponse.from_orm(task)
 
 
 @router.get("/stats/overview")
 async def get_task_stats(
-    current_user: User = Depends(get_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get task statistics overview (staff and admin only)"""
-    # Count by status
-    status_counts = await db.execute(
-        select(Task.status, func.count(Task.id))
-        .group_by(Task.status)
-    )
-    status_stats = {status.value: count for status, count in status_counts}
+    counters = await get_counters(db, "tasks.status", "tasks.priority")
 
-    # Count by priority
-    priority_counts = await db.execute(
-        select(Task.priority, func.count(Task.id))
-        .group_by(Task.priority)
-    )
-    priority_stats = {priority.value: count for priority,
-                      count in priority_counts}
+    status_stats = {key: count for key, (count, _) in counters["tasks.status"].items()}
+    priority_stats = {key: count for key, (count, _)
+                      in counters["tasks.priority"].items()}
 
-    # Overdue tasks
+    # Overdue tasks depend on the clock, so they are counted on demand from
+    # the due-date index rather than kept as a counter
     from datetime import datetime, timezone
     overdue_count = await db.execute(
         select(func.count(Task.id))
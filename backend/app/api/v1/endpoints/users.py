@@ -1,22 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from typing import List, Optional
 import logging
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.pagination import keyset_column, paginate, next_page
+from app.core.serialization import list_response, response_columns
 from app.models import User
-from app.schemas.user import UserResponse, UserUpdate, UserWithPermissions
+from app.schemas.user import (
+    UserResponse,
+    UserUpdate,
+    UserWithPermissions,
+    LeaderboardEntry,
+    LeaderboardResponse,
+    LeaderboardRank
+)
 from app.auth.dependencies import (
     get_current_active_user,
+    get_current_principal,
     get_admin_user,
-    get_staff_or_admin
+    get_staff_or_admin_principal
 )
+from app.auth.claims import Principal, track_user_change
+from app.services.stats import user_counters, record_stats_change, get_counters
+from app.services.leaderboard import leaderboard, track_leaderboard_change
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Columns read by GET /users, which skips ORM instances
+USER_LIST_COLUMNS = response_columns(UserResponse, User.__table__)
+
 # Role-based permissions mapping
 ROLE_PERMISSIONS = {
     "citizen": [
@@ -67,60 +83,61 @@ async def update_current_user_profile(
 ):
     """Update current user profile"""
     # Update fields
+    before_stats = user_counters(current_user)
     for field, value in user_update.dict(exclude_unset=True).items():
         if hasattr(current_user, field):
             setattr(current_user, field, value)
 
+    await record_stats_change(db, before_stats, user_counters(current_user))
+    track_user_change(db, current_user)
+    track_leaderboard_change(db, current_user)
     await db.commit()
     await db.refresh(current_user)
 
-    logger.info(f"User profile updated: {current_user.email}")
+    logger.info("User profile updated: %s", current_user.email,
+                extra={"user_id": current_user.id})
 
     return UserResponse.from_orm(current_user)
 
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = Query(100, ge=1, le=1000),
     role: Optional[str] = None,
     is_active: Optional[bool] = None,
-    current_user: User = Depends(get_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get list of users (staff and admin only)"""
-    query = select(User)
+    """Get list of users (staff and admin only), keyed on (created_at, id)"""
+    created_at = keyset_column(User.created_at)
+    query = select(*USER_LIST_COLUMNS, created_at.label("cursor_created_at"))
 
     if role:
         query = query.where(User.role == role)
     if is_active is not None:
         query = query.where(User.is_active == is_active)
 
-    query = query.offset(skip).limit(limit)
+    query = paginate(query, [(created_at, False), (User.id, False)],
+                     cursor, limit)
     result = await db.execute(query)
-    users = result.scalars().all()
+    rows = next_page(result.all(), limit, response,
+                     lambda row: (row.cursor_created_at, row.id))
 
-    return [UserResponse.from_orm(user) for user in users]
+    return list_response(UserResponse, [row._mapping for row in rows], response)
 
 
 @router.get("/stats")
 async def get_user_stats(
-    current_user: User = Depends(get_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user statistics (staff and admin only)"""
-    # Count users by role
-    role_counts = await db.execute(
-        select(User.role, func.count(User.id))
-        .group_by(User.role)
-    )
-    role_stats = {role.value: count for role, count in role_counts}
+    counters = await get_counters(db, "users.role", "users.active")
 
-    # Total active users
-    active_count = await db.execute(
-        select(func.count(User.id)).where(User.is_active == True)
-    )
-    total_active = active_count.scalar()
+    role_stats = {key: count for key, (count, _) in counters["users.role"].items()}
+    total_active, _ = counters["users.active"].get("true", (0, 0.0))
 
     return {
         "total_users": sum(role_stats.values()),
@@ -129,11 +146,71 @@ async def get_user_stats(
     }
 
 
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    around_me: bool = False,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Citizens ranked by points, best first.
+
+    Returns ``limit`` entries from place ``offset``; with ``around_me``
+    the window is centred on the caller instead. Users with equal points
+    share a rank. Ranks come from an in-memory index, so only the page's
+    users are read from the database.
+    """
+    if around_me:
+        standing = leaderboard.standing(current_user.id)
+        if standing is not None:
+            offset = max(standing.position - limit // 2, 0)
+    standings = leaderboard.page(offset, limit)
+
+    users = {}
+    if standings:
+        result = await db.execute(
+            select(User.id, User.name, User.avatar, User.badge_count)
+            .where(User.id.in_([standing.user_id for standing in standings]))
+        )
+        users = {row.id: row for row in result}
+
+    return LeaderboardResponse(
+        total=len(leaderboard),
+        entries=[
+            LeaderboardEntry(
+                rank=standing.rank,
+                user_id=standing.user_id,
+                name=users[standing.user_id].name,
+                avatar=users[standing.user_id].avatar,
+                points=standing.points,
+                badge_count=users[standing.user_id].badge_count or 0
+            )
+            # A user deleted since the page was read is skipped
+            for standing in standings if standing.user_id in users
+        ]
+    )
+
+
+@router.get("/leaderboard/me", response_model=LeaderboardRank)
+async def get_my_rank(
+    current_user: Principal = Depends(get_current_principal)
+):
+    """The caller's rank and points on the leaderboard"""
+    standing = leaderboard.standing(current_user.id)
+    return LeaderboardRank(
+        user_id=current_user.id,
+        rank=standing.rank if standing else None,
+        points=standing.points if standing else 0,
+        total=len(leaderboard)
+    )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
     user_id: str,
-    current_user: User = Depends(get_staff_or_admin),
-    db: AsyncSession = Depends(get_db)
+    current_user: Principal = Depends(get_staff_or_admin_principal),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user by ID (staff and admin only)"""
     user = await db.get(User, user_id)
@@ -162,14 +239,19 @@ async def update_user(
         )
 
     # Update fields
+    before_stats = user_counters(user)
     for field, value in user_update.dict(exclude_unset=True).items():
         if hasattr(user, field):
             setattr(user, field, value)
 
+    await record_stats_change(db, before_stats, user_counters(user))
+    track_user_change(db, user)
+    track_leaderboard_change(db, user)
     await db.commit()
     await db.refresh(user)
 
-    logger.info(f"User updated by admin: {user.email}")
+    logger.info("User updated by admin: %s", user.email,
+                extra={"user_id": user.id})
 
     return UserResponse.from_orm(user)
 
@@ -189,9 +271,14 @@ async def delete_user(
         )
 
     # Soft delete by deactivating
+    before_stats = user_counters(user)
     user.is_active = False
+    await record_stats_change(db, before_stats, user_counters(user))
+    track_user_change(db, user)
+    track_leaderboard_change(db, user)
     await db.commit()
 
-    logger.info(f"User deactivated by admin: {user.email}")
+    logger.info("User deactivated by admin: %s", user.email,
+                extra={"user_id": user.id})
 
     return {"message": "User deactivated successfully"}
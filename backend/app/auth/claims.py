@@ -0,0 +1,160 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, NamedTuple, Optional, Set
+import hashlib
+import logging
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import on_commit
+from app.models import User
+from app.schemas.user import UserRole
+from app.auth.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+
+class Principal(NamedTuple):
+    """The caller as described by the signed claims of an access token"""
+    id: str
+    email: Optional[str]
+    role: UserRole
+    expires_at: float
+
+
+class TokenCache:
+    """Bounded LRU of decoded access tokens keyed by token digest"""
+
+    def __init__(self, max_tokens: int = settings.AUTH_TOKEN_CACHE_SIZE):
+        self.max_tokens = max_tokens
+        self._tokens: "OrderedDict[bytes, Principal]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Optional[Principal]:
+        with self._lock:
+            principal = self._tokens.get(key)
+            if principal is None:
+                return None
+            if principal.expires_at <= time.time():
+                del self._tokens[key]
+                return None
+            self._tokens.move_to_end(key)
+            return principal
+
+    def put(self, key: bytes, principal: Principal):
+        with self._lock:
+            self._tokens[key] = principal
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+class RevocationList:
+    """Users whose outstanding access tokens must no longer be trusted.
+
+    Deactivated users are rejected outright. For users whose role changed
+    while tokens could still be live, the current role is kept so tokens
+    carrying the old role claim are rejected and the client has to sign in
+    again.
+    """
+
+    def __init__(self):
+        self._inactive: Set[str] = set()
+        self._roles: Dict[str, UserRole] = {}
+        self._lock = threading.Lock()
+
+    def is_revoked(self, principal: Principal) -> bool:
+        if principal.id in self._inactive:
+            return True
+        role = self._roles.get(principal.id)
+        return role is not None and role != principal.role
+
+    def record(self, user_id: str, is_active: bool, role: UserRole):
+        """Apply the committed state of a user"""
+        with self._lock:
+            if is_active:
+                self._inactive.discard(user_id)
+            else:
+                self._inactive.add(user_id)
+            self._roles[user_id] = UserRole(role)
+
+    def replace(self, inactive: Set[str], roles: Dict[str, UserRole]):
+        with self._lock:
+            self._inactive = inactive
+            self._roles = roles
+
+
+token_cache = TokenCache()
+revocations = RevocationList()
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def principal_from_token(token: str) -> Optional[Principal]:
+    """Decode an access token into a Principal, going through the cache.
+
+    Returns None for tokens that are invalid, expired, not access tokens or
+    belong to a revoked user.
+    """
+    key = token_digest(token)
+    principal = token_cache.get(key)
+
+    if principal is None:
+        payload = verify_token(token)
+        if payload is None or payload.get("type") != "access":
+            return None
+        try:
+            principal = Principal(
+                id=payload["sub"],
+                email=payload.get("email"),
+                role=UserRole(payload["role"]),
+                expires_at=float(payload["exp"])
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+        token_cache.put(key, principal)
+
+    if revocations.is_revoked(principal):
+        return None
+    return principal
+
+
+def track_user_change(db: AsyncSession, user: User):
+    """Update the revocation list for ``user`` once the session commits"""
+    user_id, is_active, role = user.id, bool(user.is_active), user.role
+    on_commit(db, lambda: revocations.record(user_id, is_active, role))
+
+
+async def load_revocations(db: AsyncSession):
+    """Rebuild the revocation list from the users table.
+
+    Every deactivated user is loaded, plus the current role of users
+    changed within the access token lifetime, since only those can still
+    hold a token with a stale role claim.
+    """
+    changed_since = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+    stmt = select(User.id, User.role, User.is_active).where(
+        or_(User.is_active.is_(False), User.updated_at >= changed_since)
+    )
+    inactive: Set[str] = set()
+    roles: Dict[str, UserRole] = {}
+    for user_id, role, is_active in (await db.execute(stmt)).all():
+        if not is_active:
+            inactive.add(user_id)
+        roles[user_id] = UserRole(role.value)
+
+    revocations.replace(inactive, roles)
+    token_cache.clear()
+    logger.info("Revocation list loaded: %d inactive users, "
+                "%d recently changed", len(inactive), len(roles))
@@ -1,18 +1,23 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional
+from typing import Optional, Union
 import logging
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, read_session_maker
 from app.models import User
 from app.auth.security import verify_token
+from app.auth.claims import Principal, principal_from_token
 from app.schemas.user import UserRole
 
 logger = logging.getLogger(__name__)
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
+# Streams also take the token as a query parameter, which EventSource
+# clients have to use since they cannot set headers
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
@@ -82,6 +87,70 @@ def get_current_user_with_any_role(*required_roles: UserRole):
     return current_user_with_any_role
 
 
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db)
+) -> Union[Principal, User]:
+    """Get the caller's id and role, trusting the token claims when enabled.
+
+    For read endpoints that only need ``id`` and ``role``. With
+    AUTH_TRUST_TOKEN_CLAIMS off this falls back to loading the user.
+    """
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return await get_current_user(credentials, db)
+
+    principal = principal_from_token(credentials.credentials)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+
+async def get_stream_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    access_token: Optional[str] = Query(None)
+) -> Principal:
+    """Get the caller of a long-lived stream from its access token.
+
+    Always returns the token's Principal, whose ``expires_at`` bounds the
+    stream. With AUTH_TRUST_TOKEN_CLAIMS off the user is checked as well,
+    on a session released before the stream starts.
+    """
+    token = credentials.credentials if credentials else access_token
+    principal = principal_from_token(token) if token else None
+
+    if principal is not None and not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        async with read_session_maker() as db:
+            user = await db.get(User, principal.id)
+        principal = (principal._replace(role=user.role)
+                     if user is not None and user.is_active else None)
+
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+
+def get_principal_with_any_role(*required_roles: UserRole):
+    """Factory function to create a multi-role dependency on token claims"""
+    async def principal_with_any_role(
+        current_user: Union[Principal, User] = Depends(get_current_principal)
+    ) -> Union[Principal, User]:
+        if current_user.role not in required_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"User role '{current_user.role}' not authorized for this action"
+            )
+        return current_user
+    return principal_with_any_role
+
+
 # Pre-defined role dependencies
 get_admin_user = get_current_user_with_role(UserRole.ADMIN)
 get_staff_user = get_current_user_with_role(UserRole.STAFF)
@@ -94,3 +163,11 @@ get_staff_or_admin = get_current_user_with_any_role(
 get_fieldworker_or_staff_or_admin = get_current_user_with_any_role(
     UserRole.FIELDWORKER, UserRole.STAFF, UserRole.ADMIN
 )
+
+# Claim-based dependencies for read endpoints
+get_admin_principal = get_principal_with_any_role(UserRole.ADMIN)
+get_staff_or_admin_principal = get_principal_with_any_role(
+    UserRole.STAFF, UserRole.ADMIN)
+get_fieldworker_or_staff_or_admin_principal = get_principal_with_any_role(
+    UserRole.FIELDWORKER, UserRole.STAFF, UserRole.ADMIN
+)
@@ -0,0 +1,143 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from passlib.context import CryptContext
+from typing import Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int) -> CryptContext:
+    """Password context hashing with ``rounds`` PBKDF2 iterations.
+
+    Hashes with fewer rounds still verify but are reported as needing an
+    update, so raising PASSWORD_HASH_ROUNDS upgrades users as they sign in.
+    """
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds
+    )
+
+
+# Run inside the worker processes, so they must stay module-level functions
+
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(
+    password: str, hashed: str, rounds: int
+) -> Tuple[bool, Optional[str]]:
+    return crypt_context(rounds).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in a pool of worker processes.
+
+    PBKDF2 holds a CPU for tens of milliseconds per call, which would stall
+    every other request if run on the event loop. At most ``concurrency``
+    calls are handed to the pool at once; the rest wait on a semaphore
+    without blocking the loop, and are counted as queued in metrics().
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        concurrency: int = settings.PASSWORD_HASH_CONCURRENCY,
+        rounds: int = settings.PASSWORD_HASH_ROUNDS
+    ):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.rehashed = 0
+        self.wait_seconds = 0.0
+
+    def start(self):
+        """Create the worker pool; it is also created on first use"""
+        with self._lock:
+            if self._executor is None:
+                # Forking a process that runs an event loop and database
+                # threads is unsafe, so workers start from a clean interpreter
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info("Password hashing pool started with %d workers",
+                            self.workers)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, func, *args):
+        self.start()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        self.queued += 1
+        if self._semaphore.locked():
+            self.max_queued = max(self.max_queued, self.queued)
+        enqueued = time.monotonic()
+        async with self._semaphore:
+            self.queued -= 1
+            self.running += 1
+            self.wait_seconds += time.monotonic() - enqueued
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, func, *args)
+            finally:
+                self.running -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured parameters"""
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify a password; returns (matches, replacement hash).
+
+        The replacement is set when the password matches but ``hashed`` was
+        made with outdated parameters, and should be stored in its place.
+        """
+        verified, new_hash = await self._run(
+            _verify_and_update, password, hashed, self.rounds)
+        if new_hash:
+            self.rehashed += 1
+        return verified, new_hash
+
+    def metrics(self) -> dict:
+        """Queue depth and throughput counters"""
+        return {
+            "workers": self.workers,
+            "concurrency": self.concurrency,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "rehashed": self.rehashed,
+            "wait_seconds": round(self.wait_seconds, 6),
+        }
+
+
+password_hasher = PasswordHasher()
@@ -1,11 +1,13 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import jwt
-from passlib.context import CryptContext
+import uuid
 from app.core.config import settings
+from app.auth.hashing import crypt_context
 
-# Password hashing context - use pbkdf2 for faster hashing in development
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Password hashing context for scripts; request handlers use password_hasher
+# from app.auth.hashing so hashing stays off the event loop
+pwd_context = crypt_context(settings.PASSWORD_HASH_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -42,7 +44,9 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.now(
             timezone.utc) + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire, "type": "refresh"})
+    # The jti keeps tokens issued to one user in the same second distinct
+    to_encode.update({"exp": expire, "type": "refresh",
+                      "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
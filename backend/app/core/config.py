@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import os
 
 
@@ -26,6 +26,12 @@ class Settings(BaseSettings):
 
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./citizen_engagement.db"
+    DB_ECHO: bool = False
+    DB_READER_POOL_SIZE: int = 4
+    DB_POOL_TIMEOUT: int = 30
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
 
     # File Upload Configuration
     UPLOAD_DIR: str = "uploads"
@@ -33,6 +39,37 @@ class Settings(BaseSettings):
 
     # Security
     ALGORITHM: str = "HS256"
+    # Trust the signed role claim on read endpoints instead of loading the
+    # user row; deactivations and role changes go through a revocation list
+    AUTH_TRUST_TOKEN_CLAIMS: bool = True
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # Passwords are hashed in worker processes; hashes made with fewer
+    # rounds are upgraded on the next successful login
+    PASSWORD_HASH_ROUNDS: int = 29000
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_CONCURRENCY: int = 4
+    # Signed-in devices kept per user; the least recently used is evicted
+    AUTH_MAX_SESSIONS_PER_USER: int = 10
+    # How often expired refresh tokens are purged (0 disables the sweeper)
+    AUTH_SESSION_SWEEP_SECONDS: int = 3600
+
+    # New reports are checked against open issues of the same category
+    # reported within DUPLICATE_WINDOW_DAYS and DUPLICATE_RADIUS_M, whose
+    # title and description overlap by at least DUPLICATE_MIN_SIMILARITY
+    DUPLICATE_RADIUS_M: float = 150.0
+    DUPLICATE_MIN_SIMILARITY: float = 0.35
+    DUPLICATE_WINDOW_DAYS: float = 30.0
+    DUPLICATE_MAX_MATCHES: int = 5
+
+    # Points and badges are applied in the background, one transaction per
+    # AWARDS_FLUSH_SECONDS holding at most AWARDS_MAX_BATCH events
+    AWARDS_FLUSH_SECONDS: float = 0.25
+    AWARDS_MAX_BATCH: int = 5000
+
+    # Live updates: events a connection may fall behind by before it is
+    # told to resync, and the keep-alive interval of idle streams
+    EVENTS_BACKLOG_SIZE: int = 256
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
 
     # Optional: Email configuration (for future features)
     SMTP_TLS: bool = True
@@ -45,6 +82,18 @@ class Settings(BaseSettings):
 
     # Logging
     LOG_LEVEL: str = "info"
+    LOG_FORMAT: str = "json"  # or "text"
+    LOG_FILE: str = "logs/app.log"
+    # The file rotates at LOG_MAX_BYTES, or on a schedule when
+    # LOG_ROTATE_WHEN is set (e.g. "midnight"); LOG_BACKUP_COUNT old files
+    # are kept either way
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024  # 10MB
+    LOG_ROTATE_WHEN: Optional[str] = None
+    LOG_BACKUP_COUNT: int = 5
+    # Records waiting for the writer thread; beyond this they are dropped
+    LOG_QUEUE_SIZE: int = 10000
+    # Fraction of INFO and DEBUG records kept per logger (and its children)
+    LOG_SAMPLE_RATES: Dict[str, float] = {"uvicorn.access": 0.1}
 
     class Config:
         env_file = ".env"
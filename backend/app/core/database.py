@@ -1,28 +1,113 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session
+from alembic import command
+from alembic.config import Config
+from pathlib import Path
+from typing import Callable, Optional, Tuple
 from app.core.config import settings
 import logging
 import os
 
 logger = logging.getLogger(__name__)
 
-# Ensure database directory exists
-db_path = "/Users/aaryannara/Downloads/project/backend/citizen_engagement.db"
-os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
-# Create async engine for SQLite
-engine = create_async_engine(
-    f"sqlite+aiosqlite:///{db_path}",
-    echo=settings.ENVIRONMENT == "development",
-    connect_args={"check_same_thread": False}
-)
+def async_database_url(url: str) -> URL:
+    """Parse DATABASE_URL, swapping the sync SQLite driver for aiosqlite"""
+    parsed = make_url(url)
+    if parsed.drivername == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed
 
-# Create async session factory
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+
+def _is_sqlite_file(url: URL) -> bool:
+    return (url.get_backend_name() == "sqlite"
+            and url.database not in (None, "", ":memory:"))
+
+
+def _sqlite_pragmas(read_only: bool):
+    """Connect hook tuning every new SQLite connection.
+
+    WAL lets readers run alongside the writer, NORMAL sync is durable
+    across application crashes in WAL mode, and busy_timeout makes a
+    connection wait for a lock instead of failing with "database is
+    locked". Reader connections are additionally marked query-only.
+    """
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS:d}")
+        cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB:d}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE:d}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+    return on_connect
+
+
+def create_engines(url: str) -> Tuple[AsyncEngine, AsyncEngine]:
+    """Create the writer engine and the read-only reader engine.
+
+    SQLite allows a single writer at a time, so writes go through one
+    dedicated connection and queue in the pool rather than on the database
+    lock, while reads use a separate pool of query-only connections. For an
+    in-memory or non-SQLite database both roles share one engine.
+    """
+    parsed = async_database_url(url)
+    if not _is_sqlite_file(parsed):
+        writer = create_async_engine(parsed, echo=settings.DB_ECHO)
+        return writer, writer
+
+    os.makedirs(os.path.dirname(os.path.abspath(parsed.database)),
+                exist_ok=True)
+
+    writer = create_async_engine(
+        parsed,
+        echo=settings.DB_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        connect_args={"check_same_thread": False}
+    )
+    event.listen(writer.sync_engine, "connect", _sqlite_pragmas(read_only=False))
+
+    reader = create_async_engine(
+        parsed,
+        echo=settings.DB_ECHO,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DB_READER_POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        connect_args={"check_same_thread": False}
+    )
+    event.listen(reader.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+
+    return writer, reader
+
+
+def configure_engines(url: str = settings.DATABASE_URL):
+    """(Re)create the engines and session factories for ``url``"""
+    global engine, read_engine, async_session_maker, read_session_maker
+
+    engine, read_engine = create_engines(url)
+    async_session_maker = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    read_session_maker = async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+
+configure_engines()
 
 
 class Base(DeclarativeBase):
@@ -30,6 +115,19 @@ class Base(DeclarativeBase):
     pass
 
 
+def pool_status() -> dict:
+    """Connections checked out of each pool, and the pool sizes"""
+    pools = {"writer": engine.pool}
+    if read_engine is not engine:
+        pools["reader"] = read_engine.pool
+    status = {}
+    for role, pool in pools.items():
+        if hasattr(pool, "checkedout"):
+            status[f"{role}_checked_out"] = pool.checkedout()
+            status[f"{role}_size"] = pool.size()
+    return status
+
+
 async def get_db() -> AsyncSession:
     """Dependency to get database session"""
     async with async_session_maker() as session:
@@ -39,12 +137,67 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
-async def create_tables():
-    """Create all database tables"""
+async def get_read_db() -> AsyncSession:
+    """Dependency to get a session on the read-only connection pool"""
+    async with read_session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]):
+    """Run ``callback`` once the session's current transaction commits.
+
+    Used to update in-process caches only after the rows they mirror are
+    durable; callbacks are discarded on rollback.
+    """
+    session.sync_session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session):
+    for callback in session.info.pop("on_commit", []):
+        try:
+            callback()
+        except Exception as e:
+            logger.error("Error in commit callback: %s", e, exc_info=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_commit_callbacks(session):
+    session.info.pop("on_commit", None)
+
+
+# Alembic configuration shipped next to the application package
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Revision matching the schema that create_all used to produce
+BASELINE_REVISION = "0001"
+
+
+def _upgrade(connection, alembic_cfg: Config):
+    """Bring the schema on ``connection`` to the latest revision"""
+    alembic_cfg.attributes["connection"] = connection
+
+    tables = inspect(connection).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        # Database created by create_all before migrations existed
+        logger.info("Stamping unversioned database at %s", BASELINE_REVISION)
+        command.stamp(alembic_cfg, BASELINE_REVISION)
+
+    command.upgrade(alembic_cfg, "head")
+
+
+async def run_migrations(target: Optional[AsyncEngine] = None):
+    """Apply all pending Alembic migrations"""
+    alembic_cfg = Config(str(ALEMBIC_INI))
+    alembic_cfg.set_main_option("script_location",
+                                str(ALEMBIC_INI.parent / "alembic"))
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("Database tables created successfully")
+        async with (target or engine).begin() as conn:
+            await conn.run_sync(_upgrade, alembic_cfg)
+        logger.info("Database migrations applied successfully")
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error("Error applying database migrations: %s", e)
         raise
@@ -0,0 +1,269 @@
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import time
+
+# Content type of the Prometheus text exposition format; the response adds
+# the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+# Requests that matched no route share one label, so 404 probes cannot
+# create a series per path
+UNMATCHED_ROUTE = "<unmatched>"
+
+# (name, type, help, value) of a sample reported by a collector
+Sample = Tuple[str, str, str, float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    """A metric family with a fixed set of label names.
+
+    All updates happen on the event loop thread, so no locking is needed.
+    """
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _labels(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"'
+                 for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        return super().render() + [
+            f"{self.name}{self._labels(labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        # Per label set: [per-bucket counts, sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._values.get(labels)
+        if series is None:
+            series = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} "
+                         f"{_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+_registry: List[_Metric] = []
+_collectors: List[Callable[[], Iterable[Sample]]] = []
+
+
+def register_collector(collect: Callable[[], Iterable[Sample]]):
+    """Add a callable reporting point-in-time samples on every scrape"""
+    _collectors.append(collect)
+
+
+def collect_dict(
+    prefix: str,
+    values: Dict[str, float],
+    counters: Sequence[str] = ()
+) -> List[Sample]:
+    """Samples from a ``metrics()`` dict; keys in ``counters`` only grow"""
+    samples = []
+    for key, value in values.items():
+        if key in counters:
+            samples.append((f"{prefix}_{key}_total", "counter",
+                            f"{prefix} {key.replace('_', ' ')}", value))
+        else:
+            samples.append((f"{prefix}_{key}", "gauge",
+                            f"{prefix} {key.replace('_', ' ')}", value))
+    return samples
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, documentation, value in collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code",
+    ("method", "route", "status"))
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response body is sent",
+    ("method", "route"))
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled")
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "Database statements executed per request", ("method", "route"),
+    buckets=STATEMENT_BUCKETS)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing database statements per request",
+    ("method", "route"))
+STATEMENTS = Counter(
+    "db_statements_total", "Database statements executed")
+STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "Execution time of database statements")
+
+
+class _QueryStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# Statement totals of the request being handled in the current context
+_query_stats: ContextVar[Optional[_QueryStats]] = ContextVar(
+    "query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None) if context else None
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    STATEMENTS.inc()
+    STATEMENT_DURATION.observe(elapsed)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(
+        route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record latency, status and database use of every HTTP request.
+
+    Requests are labelled by route template rather than by path, so an
+    endpoint is one series however many ids it is called with. Pure ASGI,
+    so streamed bodies pass through untouched and count until their last
+    chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = _QueryStats()
+        token = _query_stats.set(stats)
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            _query_stats.reset(token)
+
+            method, route = scope["method"], _route_label(scope)
+            REQUESTS.inc(method, route, str(status_code))
+            REQUEST_DURATION.observe(elapsed, method, route)
+            REQUEST_STATEMENTS.observe(stats.statements, method, route)
+            REQUEST_DB_DURATION.observe(stats.seconds, method, route)
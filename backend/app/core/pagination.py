@@ -0,0 +1,95 @@
+from fastapi import HTTPException, Response, status
+from sqlalchemy import String, and_, or_, type_coerce
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import json
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sort key values a cursor may carry; anything else cannot be bound
+CURSOR_VALUE_TYPES = (str, int, float, type(None))
+
+
+def keyset_column(column):
+    """Compare a column by its raw stored value.
+
+    SQLite keeps DATETIME columns as text, and rows written by
+    CURRENT_TIMESTAMP use a different format than rows written by
+    SQLAlchemy. Reading and binding the raw text keeps cursor comparisons
+    exact, and the column is still emitted bare so its index is used.
+    """
+    return type_coerce(column, String)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        values = None
+
+    if (not isinstance(values, list) or len(values) != size or
+            not all(isinstance(value, CURSOR_VALUE_TYPES) for value in values)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def keyset_filter(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """Build the WHERE clause selecting rows strictly after a cursor.
+
+    ``keys`` is the ORDER BY of the query as ``(column, descending)`` pairs
+    and must end with a unique column. The leading column gets a plain
+    range bound so SQLite can seek into the index instead of walking it
+    from the start; the expansion that follows only resolves ties.
+    """
+    def after(column, descending, value):
+        return column < value if descending else column > value
+
+    first_column, first_descending = keys[0]
+    lead = (first_column <= values[0] if first_descending
+            else first_column >= values[0])
+
+    clause = after(keys[-1][0], keys[-1][1], values[-1])
+    for (column, descending), value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        clause = or_(after(column, descending, value),
+                     and_(column == value, clause))
+
+    return and_(lead, clause)
+
+
+def paginate(query, keys: Sequence[Tuple[Any, bool]], cursor: Optional[str], limit: int):
+    """Apply keyset ordering, the cursor bound and a look-ahead limit.
+
+    The query fetches ``limit + 1`` rows; pass the result to next_page to
+    trim the extra row and compute the next cursor.
+    """
+    if cursor:
+        query = query.where(keyset_filter(keys, decode_cursor(cursor, len(keys))))
+
+    order_by = [column.desc() if descending else column.asc()
+                for column, descending in keys]
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def next_page(rows: Sequence[Any], limit: int, response: Response, key) -> Sequence[Any]:
+    """Trim the look-ahead row and expose the next cursor header.
+
+    ``key`` maps the last row of the page to its sort key values.
+    """
+    if len(rows) <= limit:
+        return rows
+
+    rows = rows[:limit]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+    return rows
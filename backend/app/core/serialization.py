@@ -0,0 +1,45 @@
+from fastapi import Response
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Table
+from typing import Any, List, Mapping, Optional, Sequence, Type
+
+
+def response_columns(model: Type[BaseModel], table: Table) -> list:
+    """Columns of ``table`` that ``model`` reads, so lists skip the rest"""
+    return [column for column in table.c if column.name in model.model_fields]
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Validator and serializer for a list of ``model``, built once"""
+    return TypeAdapter(List[model])
+
+
+def encode_list(model: Type[BaseModel], rows: Sequence[Mapping[str, Any]]) -> bytes:
+    """Validate plain rows as a list of ``model`` and encode them as JSON.
+
+    The whole list is validated and dumped by pydantic-core in one call
+    each, skipping per-row model construction in Python and FastAPI's
+    generic encoder. Keys the model does not declare are ignored.
+    """
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(rows))
+
+
+def list_response(
+    model: Type[BaseModel],
+    rows: Sequence[Mapping[str, Any]],
+    response: Optional[Response] = None
+) -> Response:
+    """JSON response for a list endpoint built from plain rows.
+
+    Headers set on the endpoint's injected ``response``, such as the
+    pagination cursor, are carried over; FastAPI drops them when an
+    endpoint returns a Response of its own.
+    """
+    encoded = Response(content=encode_list(model, rows),
+                       media_type="application/json")
+    if response is not None:
+        encoded.headers.raw.extend(response.headers.raw)
+    return encoded
@@ -0,0 +1,65 @@
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from typing import AsyncIterator, Optional, Tuple
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Split a byte stream into ``(line_number, line)`` pairs.
+
+    Lines are numbered from 1 and blank lines are skipped. A line longer
+    than ``max_line_bytes`` is discarded as it arrives and yielded as None,
+    so a malformed body cannot grow the buffer without bound.
+    """
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        oversized = True
+                break
+
+            line_number += 1
+            if oversized:
+                yield line_number, None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield line_number, None
+                elif buffer.strip():
+                    yield line_number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+
+    if oversized or buffer.strip():
+        yield line_number + 1, None if oversized else bytes(buffer)
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that may keep reading the request body.
+
+    StreamingResponse listens for client disconnects by consuming
+    ``receive``, which would swallow the remaining body chunks of an
+    endpoint that streams its results while the upload is still arriving.
+    This variant leaves ``receive`` to the body iterator; a disconnect then
+    surfaces from ``request.stream()`` instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
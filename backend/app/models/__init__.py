@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, Enum, Index, LargeBinary, MetaData, Table
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
 import enum
 import uuid
 from app.core.database import Base
@@ -47,7 +48,7 @@ class TaskStatus(str, enum.Enum):
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String, primary_key=True, index=True,
+    id = Column(String, primary_key=True,
                 default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
@@ -72,11 +73,19 @@ class User(Base):
     votes = relationship("Vote", back_populates="user")
     refresh_tokens = relationship("RefreshToken", back_populates="user")
 
+    # Keyset pagination indexes for GET /users, plus one for the is_active
+    # filter
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+        Index("ix_users_is_active_id", "is_active", "id"),
+    )
+
 
 class Issue(Base):
     __tablename__ = "issues"
 
-    id = Column(String, primary_key=True, index=True,
+    id = Column(String, primary_key=True,
                 default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
@@ -89,9 +98,15 @@ class Issue(Base):
     images = Column(String, default="[]")  # JSON array as string
     audio_note = Column(String, nullable=True)
     tracking_id = Column(String, unique=True, nullable=False)
+    # Maintained by triggers on the votes table (migration 0003)
+    upvotes = Column(Integer, nullable=False, default=0, server_default="0")
+    downvotes = Column(Integer, nullable=False, default=0, server_default="0")
+    # Key of the issue in issues_rtree, assigned by trigger (migration 0004)
+    spatial_id = Column(Integer, nullable=True)
     reported_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True),
                         server_default=func.now(), onupdate=func.now())
+    resolved_at = Column(DateTime(timezone=True), nullable=True)
 
     # Foreign Keys
     reporter_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -102,14 +117,106 @@ class Issue(Base):
         "User", back_populates="reported_issues", foreign_keys=[reporter_id])
     assignee = relationship("User", foreign_keys=[assignee_id])
     task = relationship("Task", back_populates="issue", uselist=False)
-    comments = relationship("Comment", back_populates="issue")
+    comments = relationship("Comment", back_populates="issue",
+                            order_by="(Comment.created_at, Comment.id)")
     votes = relationship("Vote", back_populates="issue")
 
+    # Keyset pagination indexes for GET /issues, one per role-based and
+    # equality filter
+    __table_args__ = (
+        Index("ix_issues_reported_at_id", "reported_at", "id"),
+        Index("ix_issues_reporter_reported_at_id",
+              "reporter_id", "reported_at", "id"),
+        Index("ix_issues_assignee_reported_at_id",
+              "assignee_id", "reported_at", "id"),
+        Index("ix_issues_status_reported_at_id", "status", "reported_at", "id"),
+        Index("ix_issues_category_reported_at_id",
+              "category", "reported_at", "id"),
+        Index("uq_issues_spatial_id", "spatial_id", unique=True),
+    )
+
+    @validates("status")
+    def _stamp_resolved_at(self, key, value):
+        """Keep resolved_at in step with entering and leaving RESOLVED"""
+        resolved = getattr(value, "value", value) == IssueStatus.RESOLVED.value
+        was_resolved = (getattr(self.status, "value", self.status)
+                        == IssueStatus.RESOLVED.value)
+        if resolved and not was_resolved:
+            self.resolved_at = datetime.now(timezone.utc)
+        elif not resolved:
+            self.resolved_at = None
+        return value
+
+
+# R*Tree virtual table indexing issue coordinates by Issue.spatial_id. It is
+# created and kept in sync by migration 0004, so it lives on its own MetaData
+# where create_all and autogenerate leave it alone.
+issues_rtree = Table(
+    "issues_rtree",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("min_lat", Float),
+    Column("max_lat", Float),
+    Column("min_lng", Float),
+    Column("max_lng", Float),
+)
+
+# FTS5 index over issue text, keyed by Issue.spatial_id and ranked by BM25
+# through its ``rank`` column. Created and kept in sync by migration 0009.
+issues_fts = Table(
+    "issues_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("title", Text),
+    Column("description", Text),
+    Column("address", Text),
+    Column("rank", Float),
+)
+
+
+class IssueGridCell(Base):
+    """Issue counts per map grid cell, category and status.
+
+    One row per (level, cell, category, status); ``level`` L splits the
+    world into 2**L columns of 360 / 2**L degrees. Maintained incrementally
+    by app.services.clusters.
+    """
+    __tablename__ = "issue_grid_cells"
+
+    level = Column(Integer, primary_key=True)
+    cell_x = Column(Integer, primary_key=True)
+    cell_y = Column(Integer, primary_key=True)
+    category = Column(Enum(IssueCategory), primary_key=True)
+    status = Column(Enum(IssueStatus), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    latitude_sum = Column(Float, nullable=False, default=0.0)
+    longitude_sum = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+class StatsCounter(Base):
+    """Running totals behind the stats endpoints.
+
+    One row per (scope, key), e.g. ("issues.status", "pending"); ``total``
+    carries a sum alongside the count where a scope needs one, such as the
+    resolution seconds of resolved issues. Maintained incrementally by
+    app.services.stats.
+    """
+    __tablename__ = "stats_counters"
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
 
 class Task(Base):
     __tablename__ = "tasks"
 
-    id = Column(String, primary_key=True, index=True,
+    id = Column(String, primary_key=True,
                 default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
@@ -135,11 +242,24 @@ class Task(Base):
     assignee = relationship(
         "User", back_populates="assigned_tasks", foreign_keys=[assignee_id])
 
+    # Keyset pagination indexes for GET /tasks (due date first, newest
+    # first), one per role-based and equality filter
+    __table_args__ = (
+        Index("ix_tasks_due_date_assigned_at_id",
+              due_date, assigned_at.desc(), id.desc()),
+        Index("ix_tasks_assignee_due_date_assigned_at_id",
+              assignee_id, due_date, assigned_at.desc(), id.desc()),
+        Index("ix_tasks_status_due_date_assigned_at_id",
+              status, due_date, assigned_at.desc(), id.desc()),
+        Index("ix_tasks_priority_due_date_assigned_at_id",
+              priority, due_date, assigned_at.desc(), id.desc()),
+    )
+
 
 class Comment(Base):
     __tablename__ = "comments"
 
-    id = Column(String, primary_key=True, index=True,
+    id = Column(String, primary_key=True,
                 default=lambda: str(uuid.uuid4()))
     text = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -152,11 +272,21 @@ class Comment(Base):
     issue = relationship("Issue", back_populates="comments")
     author = relationship("User", back_populates="comments")
 
+    # Keyset pagination index for GET /issues/{id}/comments
+    __table_args__ = (
+        Index("ix_comments_issue_created_at_id", "issue_id", "created_at", "id"),
+    )
+
+    @property
+    def author_name(self):
+        """Author name for CommentResponse; needs ``author`` loaded eagerly"""
+        return self.author.name if self.author else None
+
 
 class Vote(Base):
     __tablename__ = "votes"
 
-    id = Column(String, primary_key=True, index=True,
+    id = Column(String, primary_key=True,
                 default=lambda: str(uuid.uuid4()))
     is_upvote = Column(Boolean, default=True)
 
@@ -168,17 +298,23 @@ class Vote(Base):
     issue = relationship("Issue", back_populates="votes")
     user = relationship("User", back_populates="votes")
 
+    # One vote per user and issue; the vote upsert conflicts on this index
     __table_args__ = (
-        {"schema": None},
+        Index("uq_votes_issue_id_user_id", "issue_id", "user_id", unique=True),
     )
 
 
 class RefreshToken(Base):
+    """A signed-in session, holding the current refresh token of a device.
+
+    Keyed by a 16-byte digest of the token (app.services.sessions.token_key)
+    rather than the token itself. ``created_at`` is when the current token
+    was issued, so the per-user session cap evicts the least recently used
+    session first.
+    """
     __tablename__ = "refresh_tokens"
 
-    id = Column(String, primary_key=True, index=True,
-                default=lambda: str(uuid.uuid4()))
-    token = Column(String, unique=True, nullable=False)
+    token_hash = Column(LargeBinary, primary_key=True)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -187,3 +323,59 @@ class RefreshToken(Base):
 
     # Relationships
     user = relationship("User", back_populates="refresh_tokens")
+
+    __table_args__ = (
+        # Per-user session cap
+        Index("ix_refresh_tokens_user_id_created_at", "user_id", "created_at"),
+        # Expiry sweeper
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+        {"sqlite_with_rowid": False},
+    )
+
+
+class AwardEvent(Base):
+    """An activity that earns points, waiting to be applied.
+
+    Written in the transaction of the activity itself and deleted by the
+    awards pipeline in the transaction that applies it, so an award is
+    applied exactly once even across restarts (app.services.awards).
+    """
+    __tablename__ = "award_events"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AwardSubject(Base):
+    """An activity, such as a task's completion, that has already earned
+    its award; redoing it after an undo earns nothing"""
+    __tablename__ = "award_subjects"
+
+    kind = Column(String, primary_key=True)
+    subject_id = Column(String, primary_key=True)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+class UserActivityCount(Base):
+    """How often a user has done each awarded activity, for badge rules"""
+    __tablename__ = "user_activity_counts"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    kind = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+class UserBadge(Base):
+    """A badge a user has earned; ``users.badge_count`` counts these"""
+    __tablename__ = "user_badges"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    badge = Column(String, primary_key=True)
+    earned_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = {"sqlite_with_rowid": False}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 import json
@@ -84,6 +84,45 @@ class IssueResponse(IssueBase):
             return json.loads(v)
         return v
 
+# Issue found by a radius search
+
+
+class NearbyIssueResponse(IssueResponse):
+    distance_m: float
+
+# Open issue a new report may duplicate
+
+
+class DuplicateCandidate(BaseModel):
+    id: str
+    tracking_id: str
+    distance_m: float
+    similarity: float
+
+# Newly created issue
+
+
+class IssueCreateResponse(IssueResponse):
+    possible_duplicates: List[DuplicateCandidate] = []
+
+# Map clusters
+
+
+class IssueCluster(BaseModel):
+    cell_x: int
+    cell_y: int
+    latitude: float
+    longitude: float
+    count: int
+    categories: Dict[str, int]
+    statuses: Dict[str, int]
+
+
+class IssueClusterResponse(BaseModel):
+    level: int
+    cell_size_deg: float
+    clusters: List[IssueCluster]
+
 # Comment schemas
 
 
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
+import json
 
 # Forward references
 from app.schemas.user import UserResponse
@@ -74,6 +75,21 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
+    @field_validator('images', mode='before')
+    @classmethod
+    def parse_images(cls, v):
+        if isinstance(v, str):
+            return json.loads(v)
+        return v
+
+# Stop on a fieldworker's route
+
+
+class RouteStop(TaskResponse):
+    sequence: int
+    # Meters from the previous stop, or from the start point for the first
+    distance_m: float
+
 # Task with details
 
 
@@ -91,3 +107,36 @@ class TaskAssignmentRequest(BaseModel):
     assignee_id: str
     due_date: datetime
     priority: TaskPriority = TaskPriority.MEDIUM
+
+# Batch auto-assignment
+
+
+class AutoAssignRequest(BaseModel):
+    # Open tasks a fieldworker may carry, counting those already assigned
+    max_tasks_per_worker: int = Field(10, ge=1, le=1000)
+    # Leave issues unassigned rather than send someone further than this
+    max_distance_km: Optional[float] = Field(None, gt=0)
+    # Extra cost, in km, of a category the worker has never handled
+    category_penalty_km: float = Field(2.0, ge=0)
+    categories: Optional[List[str]] = None
+    # Plan without creating tasks
+    dry_run: bool = False
+
+
+class AutoAssignment(BaseModel):
+    issue_id: str
+    task_id: str
+    assignee_id: str
+    distance_km: Optional[float] = None
+    priority: TaskPriority
+
+
+class AutoAssignResponse(BaseModel):
+    assigned: int
+    unassigned: int
+    workers: int
+    dry_run: bool
+    assignments: List[AutoAssignment]
+    # Planned issues that were given a task or changed state while the
+    # plan was made, and were left alone
+    skipped: List[str] = []
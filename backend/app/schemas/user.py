@@ -82,3 +82,27 @@ class RefreshTokenRequest(BaseModel):
 class ChangePasswordRequest(BaseModel):
     current_password: str
     new_password: str = Field(..., min_length=6)
+
+# Leaderboard
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: str
+    name: str
+    avatar: Optional[str] = None
+    points: int
+    badge_count: int = 0
+
+
+class LeaderboardResponse(BaseModel):
+    total: int
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardRank(BaseModel):
+    user_id: str
+    # None when the user is not ranked (only active citizens are)
+    rank: Optional[int] = None
+    points: int = 0
+    total: int
@@ -0,0 +1,371 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import case, exists, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+import numpy as np
+import uuid
+
+from app.models import (
+    Issue, IssueStatus, Task, TaskPriority, TaskStatus, User, UserRole
+)
+from app.services.clusters import IssuePosition, record_issue_changes
+from app.services.events import publish_issue_change, publish_task_change
+from app.services.geo import EARTH_RADIUS_M
+from app.services.stats import issue_counters, task_counters, record_stats_change
+
+# Open tasks a fieldworker may carry after auto-assignment
+DEFAULT_MAX_TASKS_PER_WORKER = 10
+
+# Extra cost, in km of travel, of a category the worker has never handled
+CATEGORY_PENALTY_KM = 2.0
+
+# Distance assumed for fieldworkers with no task history to place them by
+UNKNOWN_LOCATION_KM = 5.0
+
+# Issues whose distance rows are computed at once, bounding temporaries
+ROW_CHUNK = 1024
+
+# Issue ids claimed per statement, well under SQLite's bound variable limit
+CLAIM_CHUNK = 2048
+
+TASK_OPEN_STATUSES = (TaskStatus.NEW, TaskStatus.ACCEPTED, TaskStatus.IN_PROGRESS)
+
+# Task priority and time to due date for each issue urgency
+URGENCY_PRIORITY = {
+    1: TaskPriority.LOW,
+    2: TaskPriority.LOW,
+    3: TaskPriority.MEDIUM,
+    4: TaskPriority.HIGH,
+    5: TaskPriority.CRITICAL,
+}
+PRIORITY_DUE = {
+    TaskPriority.LOW: timedelta(days=14),
+    TaskPriority.MEDIUM: timedelta(days=7),
+    TaskPriority.HIGH: timedelta(days=3),
+    TaskPriority.CRITICAL: timedelta(days=1),
+}
+
+_EARTH_RADIUS_KM = EARTH_RADIUS_M / 1000
+
+
+class PendingIssues(NamedTuple):
+    """Unassigned issues as parallel columns"""
+    rows: list
+    latitude: np.ndarray
+    longitude: np.ndarray
+    category: np.ndarray  # index into CATEGORIES
+    urgency: np.ndarray
+    upvotes: np.ndarray
+
+
+class Workers(NamedTuple):
+    """Active fieldworkers as parallel columns"""
+    ids: List[str]
+    latitude: np.ndarray  # NaN when the location is unknown
+    longitude: np.ndarray
+    capacity: np.ndarray
+    # (category, worker) -> True when the worker has never handled it
+    unfamiliar: np.ndarray
+
+
+class Assignment(NamedTuple):
+    issue_id: str
+    task_id: str
+    assignee_id: str
+    distance_km: Optional[float]
+    priority: TaskPriority
+
+
+CATEGORIES = [category.value for category in Issue.category.type.enum_class]
+_CATEGORY_INDEX = {category: i for i, category in enumerate(CATEGORIES)}
+
+
+async def load_pending_issues(
+    db: AsyncSession,
+    categories: Optional[Sequence[str]] = None
+) -> PendingIssues:
+    """Pending issues that have no task yet"""
+    stmt = select(
+        Issue.id, Issue.tracking_id, Issue.reporter_id, Issue.title,
+        Issue.description, Issue.category, Issue.urgency, Issue.upvotes,
+        Issue.latitude, Issue.longitude, Issue.address, Issue.images
+    ).where(
+        Issue.status == IssueStatus.PENDING,
+        ~exists().where(Task.issue_id == Issue.id)
+    )
+    if categories:
+        stmt = stmt.where(Issue.category.in_(categories))
+    rows = (await db.execute(stmt)).all()
+
+    return PendingIssues(
+        rows,
+        np.array([row.latitude for row in rows], dtype=np.float64),
+        np.array([row.longitude for row in rows], dtype=np.float64),
+        np.array([_CATEGORY_INDEX[row.category.value] for row in rows],
+                 dtype=np.intp),
+        np.array([row.urgency or 1 for row in rows], dtype=np.int64),
+        np.array([row.upvotes or 0 for row in rows], dtype=np.int64),
+    )
+
+
+async def load_workers(db: AsyncSession, max_tasks: int) -> Workers:
+    """Active fieldworkers with their open-task load, position and skills.
+
+    A worker is placed at the centre of their open tasks, or of all their
+    past tasks when nothing is open; the categories they have handled
+    before count as familiar. Workers without any tasks are familiar with
+    everything and have no position.
+    """
+    is_open = Task.status.in_(TASK_OPEN_STATUSES)
+    stmt = select(
+        User.id,
+        Task.category,
+        func.count(Task.id),
+        func.count(case((is_open, 1))),
+        func.sum(case((is_open, Task.latitude), else_=0.0)),
+        func.sum(case((is_open, Task.longitude), else_=0.0)),
+        func.sum(Task.latitude),
+        func.sum(Task.longitude),
+    ).outerjoin(
+        Task, Task.assignee_id == User.id
+    ).where(
+        User.role == UserRole.FIELDWORKER,
+        User.is_active.is_(True)
+    ).group_by(User.id, Task.category)
+
+    # worker -> [tasks, open, open lat, open lng, lat, lng]
+    totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0.0, 0.0, 0.0])
+    handled: Dict[str, set] = defaultdict(set)
+    for user_id, category, count, open_count, *sums in await db.execute(stmt):
+        worker = totals[user_id]
+        worker[0] += count
+        worker[1] += open_count
+        for i, value in enumerate(sums, start=2):
+            worker[i] += value or 0.0
+        if count and category:
+            handled[user_id].add(category.lower())
+
+    ids = list(totals)
+    latitude = np.full(len(ids), np.nan)
+    longitude = np.full(len(ids), np.nan)
+    capacity = np.zeros(len(ids), dtype=np.int64)
+    unfamiliar = np.zeros((len(CATEGORIES), len(ids)), dtype=bool)
+    for j, user_id in enumerate(ids):
+        count, open_count, open_lat, open_lng, lat, lng = totals[user_id]
+        if open_count:
+            latitude[j], longitude[j] = open_lat / open_count, open_lng / open_count
+        elif count:
+            latitude[j], longitude[j] = lat / count, lng / count
+        capacity[j] = max(max_tasks - open_count, 0)
+        if handled[user_id]:
+            for i, category in enumerate(CATEGORIES):
+                unfamiliar[i, j] = category not in handled[user_id]
+
+    return Workers(ids, latitude, longitude, capacity, unfamiliar)
+
+
+def _haversine_km(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """Element-wise great-circle distances in km; arguments broadcast"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = (np.sin((phi2 - phi1) / 2) ** 2 +
+         np.cos(phi1) * np.cos(phi2) *
+         np.sin(np.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distance_matrix_km(
+    latitude: np.ndarray,
+    longitude: np.ndarray,
+    worker_latitude: np.ndarray,
+    worker_longitude: np.ndarray
+) -> np.ndarray:
+    """Haversine distances between every point and every worker, in km.
+
+    Workers without a position are UNKNOWN_LOCATION_KM from everything.
+    Filled ROW_CHUNK rows at a time so temporaries stay small.
+    """
+    distances = np.empty((len(latitude), len(worker_latitude)), dtype=np.float32)
+    worker_latitude = worker_latitude[np.newaxis, :]
+    worker_longitude = worker_longitude[np.newaxis, :]
+    unknown = np.isnan(worker_latitude[0])
+
+    for start in range(0, len(latitude), ROW_CHUNK):
+        stop = start + ROW_CHUNK
+        chunk = _haversine_km(latitude[start:stop, np.newaxis],
+                              longitude[start:stop, np.newaxis],
+                              worker_latitude, worker_longitude)
+        chunk[:, unknown] = UNKNOWN_LOCATION_KM
+        distances[start:stop] = chunk
+    return distances
+
+
+def plan_assignments(
+    issues: PendingIssues,
+    workers: Workers,
+    max_distance_km: Optional[float] = None,
+    category_penalty_km: float = CATEGORY_PENALTY_KM
+) -> np.ndarray:
+    """Pick a worker for each issue; -1 where none is available.
+
+    The cost of a pair is the travel distance plus a penalty when the
+    worker has never handled the issue's category. Issues are taken in
+    priority order (urgency, then upvotes), and within a priority by
+    regret, the extra cost of settling for their second-best worker, so
+    issues with one good option claim it before others take that slot.
+    Each issue then goes to its cheapest worker with capacity left.
+    """
+    n_issues, n_workers = len(issues.rows), len(workers.ids)
+    choice = np.full(n_issues, -1, dtype=np.intp)
+    if not n_issues or not n_workers:
+        return choice
+
+    cost = distance_matrix_km(issues.latitude, issues.longitude,
+                              workers.latitude, workers.longitude)
+    if max_distance_km is not None:
+        cost[cost > max_distance_km] = np.inf
+    cost += np.float32(category_penalty_km) * workers.unfamiliar[issues.category]
+    cost[:, workers.capacity <= 0] = np.inf
+
+    if n_workers > 1:
+        best_two = np.partition(cost, 1, axis=1)[:, :2]
+        with np.errstate(invalid="ignore"):
+            regret = np.nan_to_num(best_two[:, 1] - best_two[:, 0],
+                                   nan=0.0, posinf=np.finfo(np.float32).max)
+    else:
+        regret = np.zeros(n_issues, dtype=np.float32)
+    order = np.lexsort((-regret, -issues.upvotes, -issues.urgency))
+
+    remaining = workers.capacity.copy()
+    open_workers = int(np.count_nonzero(remaining > 0))
+    for i in order:
+        if not open_workers:
+            break
+        row = cost[i]
+        j = int(np.argmin(row))
+        if not np.isfinite(row[j]):
+            continue
+        choice[i] = j
+        remaining[j] -= 1
+        if not remaining[j]:
+            cost[:, j] = np.inf
+            open_workers -= 1
+    return choice
+
+
+async def claim_issues(db: AsyncSession, issue_ids: Sequence[str]) -> Set[str]:
+    """Mark those of ``issue_ids`` still pending without a task as assigned.
+
+    Meant as the first write of the caller's transaction: the plan was
+    made from a snapshot, and an issue given a task or moved on since then
+    is left alone. Returns the ids claimed.
+    """
+    claimed: Set[str] = set()
+    for start in range(0, len(issue_ids), CLAIM_CHUNK):
+        result = await db.execute(
+            update(Issue)
+            .where(
+                Issue.id.in_(issue_ids[start:start + CLAIM_CHUNK]),
+                Issue.status == IssueStatus.PENDING,
+                ~exists().where(Task.issue_id == Issue.id)
+            )
+            .values(status=IssueStatus.ASSIGNED)
+            .returning(Issue.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed.update(result.scalars())
+    return claimed
+
+
+async def create_assignments(
+    db: AsyncSession,
+    issues: PendingIssues,
+    workers: Workers,
+    choice: np.ndarray,
+    write: bool = True
+) -> Tuple[List[Assignment], List[str]]:
+    """Turn a plan into Task rows and assigned issues.
+
+    Issues are claimed first, so only those still pending without a task
+    get one; the ids of the others are returned as skipped. Tasks go in
+    as one executemany and assignees are set as another, with the cluster
+    grid and stats counters following in one statement each. The caller
+    commits, after which assignees and reporters hear about the tasks.
+    With ``write`` False nothing is written or skipped.
+    """
+    now = datetime.now(timezone.utc)
+    picked = np.flatnonzero(choice >= 0)
+    if not len(picked):
+        return [], []
+
+    claimed = None
+    if write:
+        claimed = await claim_issues(
+            db, [issues.rows[i].id for i in picked.tolist()])
+
+    # Distances of the chosen pairs only, for the response; NaN for
+    # workers without a position
+    worker_index = choice[picked]
+    distances = _haversine_km(
+        issues.latitude[picked], issues.longitude[picked],
+        workers.latitude[worker_index], workers.longitude[worker_index])
+
+    assignments, skipped = [], []
+    task_rows, issue_rows, changes = [], [], []
+    before_counters, after_counters = [], []
+    for i, j, distance in zip(picked.tolist(), worker_index.tolist(),
+                              distances.tolist()):
+        row = issues.rows[i]
+        if claimed is not None and row.id not in claimed:
+            skipped.append(row.id)
+            continue
+        assignee_id = workers.ids[j]
+        priority = URGENCY_PRIORITY.get(row.urgency or 1, TaskPriority.MEDIUM)
+        task_id = str(uuid.uuid4())
+        assignments.append(Assignment(
+            row.id, task_id, assignee_id,
+            None if np.isnan(distance) else round(distance, 3), priority))
+        if not write:
+            continue
+
+        task_row = {
+            "id": task_id,
+            "title": row.title,
+            "description": row.description,
+            "priority": priority,
+            "status": TaskStatus.NEW,
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "address": row.address,
+            "category": row.category.value,
+            "images": row.images or "[]",
+            "due_date": now + PRIORITY_DUE[priority],
+            "issue_id": row.id,
+            "assignee_id": assignee_id,
+        }
+        task_rows.append(task_row)
+        issue_rows.append({"id": row.id, "assignee_id": assignee_id})
+
+        # Transient instances, only used to derive the rollup rows and
+        # the change events
+        before = Issue(status=IssueStatus.PENDING, category=row.category)
+        after = Issue(id=row.id, tracking_id=row.tracking_id,
+                      reporter_id=row.reporter_id, urgency=row.urgency,
+                      status=IssueStatus.ASSIGNED, category=row.category,
+                      assignee_id=assignee_id)
+        publish_task_change(db, Task(**task_row), "task.assigned")
+        publish_issue_change(db, after)
+        before_counters.extend(issue_counters(before))
+        after_counters.extend(issue_counters(after))
+        after_counters.extend(task_counters(
+            Task(status=TaskStatus.NEW, priority=priority)))
+        position = (row.latitude, row.longitude, row.category.value)
+        changes.append((IssuePosition(*position, "pending"),
+                        IssuePosition(*position, "assigned")))
+
+    if task_rows:
+        await db.execute(insert(Task), task_rows)
+        await db.execute(update(Issue), issue_rows)
+        await record_issue_changes(db, changes)
+        await record_stats_change(db, before_counters, after_counters)
+    return assignments, skipped
@@ -0,0 +1,295 @@
+from collections import defaultdict, deque
+from sqlalchemy import bindparam, delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.database import on_commit
+from app.models import AwardEvent, AwardSubject, User, UserActivityCount, UserBadge
+from app.services.leaderboard import leaderboard, ranked
+
+logger = logging.getLogger(__name__)
+
+# Awarded activities
+ISSUE_REPORTED = "issue_reported"
+ISSUE_RESOLVED = "issue_resolved"  # to the reporter, once per issue
+UPVOTE_RECEIVED = "upvote_received"  # to the reporter
+VOTE_CAST = "vote_cast"
+COMMENT_POSTED = "comment_posted"
+TASK_COMPLETED = "task_completed"  # to the assignee, once per task
+
+# Points for each occurrence of an activity
+ACTIVITY_POINTS = {
+    ISSUE_REPORTED: 10,
+    ISSUE_RESOLVED: 20,
+    UPVOTE_RECEIVED: 2,
+    VOTE_CAST: 1,
+    COMMENT_POSTED: 2,
+    TASK_COMPLETED: 25,
+}
+
+
+class Badge(NamedTuple):
+    """Earned once a user has done ``kind`` ``threshold`` times"""
+    id: str
+    kind: str
+    threshold: int
+    points: int
+
+
+# Ids match the achievements screen of the app
+BADGES = [
+    Badge("first-report", ISSUE_REPORTED, 1, 50),
+    Badge("veteran-reporter", ISSUE_REPORTED, 25, 500),
+    Badge("problem-solver", ISSUE_RESOLVED, 5, 150),
+    Badge("community-hero", UPVOTE_RECEIVED, 10, 300),
+    Badge("validation-master", VOTE_CAST, 50, 400),
+    Badge("social-butterfly", COMMENT_POSTED, 20, 250),
+    Badge("team-player", TASK_COMPLETED, 3, 100),
+]
+_BADGES_BY_KIND: Dict[str, List[Badge]] = defaultdict(list)
+for _badge in BADGES:
+    _BADGES_BY_KIND[_badge.kind].append(_badge)
+
+
+class PendingAward(NamedTuple):
+    event_id: int
+    user_id: str
+    kind: str
+
+
+def emit_award(db: AsyncSession, user_id: Optional[str], kind: str):
+    """Award ``kind`` to ``user_id`` as part of the session's transaction.
+
+    Only an award_events row is written now; it commits or rolls back with
+    the activity, and the pipeline applies it shortly after the commit.
+    """
+    if not user_id:
+        return
+    event = AwardEvent(user_id=user_id, kind=kind)
+    db.add(event)
+    # The event id is only known once it is flushed
+    on_commit(db, lambda: award_pipeline.enqueue(
+        PendingAward(event.id, user_id, kind)))
+
+
+async def emit_award_once(
+    db: AsyncSession,
+    user_id: Optional[str],
+    kind: str,
+    subject_id: str
+) -> bool:
+    """Award ``kind`` to ``user_id`` unless ``subject_id`` already earned it.
+
+    For activities that can be undone and redone, such as a task moved
+    out of completed and back: the first award per subject is recorded in
+    award_subjects in the same transaction and repeats are dropped.
+    Returns whether the award was emitted.
+    """
+    if not user_id:
+        return False
+    stmt = insert(AwardSubject).values(
+        kind=kind, subject_id=subject_id
+    ).on_conflict_do_nothing().returning(AwardSubject.kind)
+    if (await db.execute(stmt)).scalar_one_or_none() is None:
+        return False
+    emit_award(db, user_id, kind)
+    return True
+
+
+def evaluate_badges(
+    counts: Dict[str, int],
+    deltas: Dict[str, int]
+) -> Tuple[int, List[Badge]]:
+    """Points and newly earned badges for ``deltas`` on top of ``counts``.
+
+    Activity counts only grow, so a badge is earned exactly when a delta
+    carries its count across the threshold.
+    """
+    points, earned = 0, []
+    for kind, delta in deltas.items():
+        before = counts.get(kind, 0)
+        points += ACTIVITY_POINTS.get(kind, 0) * delta
+        for badge in _BADGES_BY_KIND.get(kind, ()):
+            if before < badge.threshold <= before + delta:
+                earned.append(badge)
+                points += badge.points
+    return points, earned
+
+
+# Points and badges are added to the stored values; updated_at is left
+# alone since the revocation list reads it as "role or status changed"
+ADD_POINTS = User.__table__.update().where(
+    User.__table__.c.id == bindparam("user_id")
+).values(
+    points=func.coalesce(User.__table__.c.points, 0) + bindparam("points"),
+    badge_count=(func.coalesce(User.__table__.c.badge_count, 0) +
+                 bindparam("badges")),
+    updated_at=User.__table__.c.updated_at
+)
+
+
+async def apply_awards(db: AsyncSession, event_ids: Sequence[int]) -> int:
+    """Apply the award events ``event_ids`` and return how many were applied.
+
+    Events are claimed by deleting them, so one already applied (by an
+    earlier run, or another process replaying the same rows) is skipped.
+    Deltas are coalesced per user and written with one statement per
+    table. The caller commits; the leaderboard follows once it does.
+    """
+    claimed = (await db.execute(
+        delete(AwardEvent)
+        .where(AwardEvent.id.in_(event_ids))
+        .returning(AwardEvent.user_id, AwardEvent.kind)
+    )).all()
+    if not claimed:
+        return 0
+
+    deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for user_id, kind in claimed:
+        deltas[user_id][kind] += 1
+
+    counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+    result = await db.execute(
+        select(UserActivityCount.user_id, UserActivityCount.kind,
+               UserActivityCount.count)
+        .where(UserActivityCount.user_id.in_(list(deltas)))
+    )
+    for user_id, kind, count in result:
+        counts[user_id][kind] = count
+
+    count_rows, badge_rows, user_rows = [], [], []
+    for user_id, user_deltas in deltas.items():
+        points, earned = evaluate_badges(counts[user_id], user_deltas)
+        count_rows.extend({"user_id": user_id, "kind": kind, "count": delta}
+                          for kind, delta in user_deltas.items())
+        badge_rows.extend({"user_id": user_id, "badge": badge.id}
+                          for badge in earned)
+        user_rows.append({"user_id": user_id, "points": points,
+                          "badges": len(earned)})
+
+    stmt = insert(UserActivityCount)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserActivityCount.user_id, UserActivityCount.kind],
+        set_={"count": UserActivityCount.count + stmt.excluded.count}
+    )
+    await db.execute(stmt, count_rows)
+    if badge_rows:
+        await db.execute(insert(UserBadge).on_conflict_do_nothing(), badge_rows)
+    await db.execute(ADD_POINTS, user_rows)
+
+    result = await db.execute(
+        select(User.id, User.role, User.is_active, User.points)
+        .where(User.id.in_(list(deltas)))
+    )
+    standings = [(row.id, row.points or 0) for row in result if ranked(row)]
+
+    def committed():
+        for user_id, points in standings:
+            leaderboard.update(user_id, points)
+        award_pipeline.badges_earned += len(badge_rows)
+
+    on_commit(db, committed)
+    return len(claimed)
+
+
+class AwardPipeline:
+    """Background consumer applying award events in batches.
+
+    Handlers enqueue events as their transactions commit. Every
+    ``interval`` seconds the queue is drained into transactions of at most
+    ``max_batch`` events. Events still in award_events at startup, such as
+    those queued when the process stopped, are replayed first.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.AWARDS_FLUSH_SECONDS,
+        max_batch: int = settings.AWARDS_MAX_BATCH
+    ):
+        self.interval = interval
+        self.max_batch = max_batch
+        self.session_maker: Optional[async_sessionmaker] = None
+        self._pending: Deque[PendingAward] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self.applied = 0
+        self.batches = 0
+        self.badges_earned = 0
+
+    def enqueue(self, award: PendingAward):
+        self._pending.append(award)
+
+    async def replay(self, db: AsyncSession) -> int:
+        """Queue the award events left unapplied by a previous run"""
+        result = await db.execute(
+            select(AwardEvent.id, AwardEvent.user_id, AwardEvent.kind)
+            .order_by(AwardEvent.id)
+        )
+        queued = {award.event_id for award in self._pending}
+        replayed = [PendingAward(*row) for row in result
+                    if row.id not in queued]
+        self._pending.extendleft(reversed(replayed))
+        if replayed:
+            logger.info("Replaying %d unapplied award events", len(replayed))
+        return len(replayed)
+
+    async def flush(self) -> int:
+        """Apply everything queued so far and return how many were applied"""
+        applied = 0
+        while self._pending:
+            batch = [self._pending.popleft()
+                     for _ in range(min(self.max_batch, len(self._pending)))]
+            try:
+                async with self.session_maker() as session:
+                    applied += await apply_awards(
+                        session, [award.event_id for award in batch])
+                    await session.commit()
+            except Exception:
+                # Keep the batch for the next flush; its rows are still
+                # in award_events, so a restart would replay it too
+                self._pending.extendleft(reversed(batch))
+                raise
+            self.batches += 1
+        self.applied += applied
+        return applied
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error("Applying awards failed: %s", e)
+
+    def start(self, session_maker: async_sessionmaker):
+        self.session_maker = session_maker
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # Left in award_events for the next start to replay
+            logger.error("Applying awards at shutdown failed: %s", e)
+
+    def metrics(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "applied": self.applied,
+            "batches": self.batches,
+            "badges_earned": self.badges_earned,
+        }
+
+
+award_pipeline = AwardPipeline()
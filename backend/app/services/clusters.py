@@ -0,0 +1,265 @@
+from collections import OrderedDict, defaultdict
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+import threading
+
+from app.core.database import on_commit
+from app.models import Issue, IssueGridCell
+
+logger = logging.getLogger(__name__)
+
+# Grid levels kept in issue_grid_cells; level L has cells of 360 / 2**L
+# degrees, so level 16 cells are roughly 600 m across
+GRID_LEVELS = (2, 4, 6, 8, 10, 12, 14, 16)
+
+# Grid levels below a 256 px map tile at a given zoom, i.e. 4x4 cells per tile
+ZOOM_TO_LEVEL_OFFSET = 2
+
+# Cache unit: a square block of TILE_CELLS x TILE_CELLS cells of one level
+TILE_CELLS = 16
+MAX_CACHED_TILES = 4096
+
+
+class IssuePosition(NamedTuple):
+    """The fields of an issue that decide which grid rows count it"""
+    latitude: float
+    longitude: float
+    category: str
+    status: str
+
+
+def position_of(issue: Issue) -> IssuePosition:
+    """Snapshot an issue's grid-relevant fields before it is modified"""
+    return IssuePosition(
+        issue.latitude,
+        issue.longitude,
+        getattr(issue.category, "value", issue.category),
+        getattr(issue.status, "value", issue.status) or "pending",
+    )
+
+
+def cell_size(level: int) -> float:
+    return 360.0 / (1 << level)
+
+
+def cell_of(level: int, latitude: float, longitude: float) -> Tuple[int, int]:
+    """Grid cell containing a point; matches the SQL in rebuild_clusters"""
+    size = cell_size(level)
+    last = (1 << level) - 1
+    return (min(int((longitude + 180.0) / size), last),
+            min(int((latitude + 90.0) / size), last))
+
+
+def level_for_zoom(zoom: int) -> int:
+    """Finest stored grid level not finer than the map zoom calls for"""
+    wanted = zoom + ZOOM_TO_LEVEL_OFFSET
+    candidates = [level for level in GRID_LEVELS if level <= wanted]
+    return candidates[-1] if candidates else GRID_LEVELS[0]
+
+
+class TileCache:
+    """Bounded LRU of grid rows per (level, tile_x, tile_y)"""
+
+    def __init__(self, max_tiles: int = MAX_CACHED_TILES):
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple[int, int, int], list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            rows = self._tiles.get(key)
+            if rows is not None:
+                self._tiles.move_to_end(key)
+            return rows
+
+    def put(self, key, rows):
+        with self._lock:
+            self._tiles[key] = rows
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[Tuple[int, int, int]]):
+        with self._lock:
+            for key in keys:
+                self._tiles.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+
+
+tile_cache = TileCache()
+
+
+async def record_issue_changes(
+    db: AsyncSession,
+    changes: Iterable[Tuple[Optional[IssuePosition], Optional[IssuePosition]]]
+):
+    """Apply (before, after) position changes to the grid in one statement.
+
+    ``before`` is None for a new issue and ``after`` None for a removed one.
+    Runs in the caller's transaction; cached tiles covering the touched
+    cells are dropped once it commits.
+    """
+    deltas: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+    for before, after in changes:
+        if before == after:
+            continue
+        for sign, position in ((-1, before), (1, after)):
+            if position is None:
+                continue
+            for level in GRID_LEVELS:
+                cell_x, cell_y = cell_of(level, position.latitude,
+                                         position.longitude)
+                delta = deltas[(level, cell_x, cell_y,
+                                position.category, position.status)]
+                delta[0] += sign
+                delta[1] += sign * position.latitude
+                delta[2] += sign * position.longitude
+
+    rows = [
+        {"level": level, "cell_x": cell_x, "cell_y": cell_y,
+         "category": category, "status": status, "count": count,
+         "latitude_sum": latitude_sum, "longitude_sum": longitude_sum}
+        for (level, cell_x, cell_y, category, status),
+        (count, latitude_sum, longitude_sum) in deltas.items()
+        if count
+    ]
+    if not rows:
+        return
+
+    stmt = insert(IssueGridCell)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IssueGridCell.level, IssueGridCell.cell_x,
+                        IssueGridCell.cell_y, IssueGridCell.category,
+                        IssueGridCell.status],
+        set_={
+            "count": IssueGridCell.count + stmt.excluded.count,
+            "latitude_sum": IssueGridCell.latitude_sum + stmt.excluded.latitude_sum,
+            "longitude_sum": IssueGridCell.longitude_sum + stmt.excluded.longitude_sum,
+        }
+    )
+    await db.execute(stmt, rows)
+
+    tiles = {(row["level"], row["cell_x"] // TILE_CELLS,
+              row["cell_y"] // TILE_CELLS) for row in rows}
+    on_commit(db, lambda: tile_cache.invalidate(tiles))
+
+
+async def record_issue_change(
+    db: AsyncSession,
+    before: Optional[IssuePosition],
+    after: Optional[IssuePosition]
+):
+    """Apply a single issue's position change to the grid"""
+    await record_issue_changes(db, [(before, after)])
+
+
+async def _load_tile(db: AsyncSession, level: int, tile_x: int, tile_y: int):
+    cached = tile_cache.get((level, tile_x, tile_y))
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(IssueGridCell.cell_x, IssueGridCell.cell_y,
+               IssueGridCell.category, IssueGridCell.status,
+               IssueGridCell.count, IssueGridCell.latitude_sum,
+               IssueGridCell.longitude_sum)
+        .where(
+            IssueGridCell.level == level,
+            IssueGridCell.cell_x.between(tile_x * TILE_CELLS,
+                                         (tile_x + 1) * TILE_CELLS - 1),
+            IssueGridCell.cell_y.between(tile_y * TILE_CELLS,
+                                         (tile_y + 1) * TILE_CELLS - 1),
+            IssueGridCell.count > 0
+        )
+    )
+    rows = [tuple(row) for row in result]
+    tile_cache.put((level, tile_x, tile_y), rows)
+    return rows
+
+
+async def get_clusters(
+    db: AsyncSession,
+    level: int,
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    categories: Optional[set] = None,
+    statuses: Optional[set] = None
+) -> List[dict]:
+    """Aggregate grid rows into one cluster per visible cell"""
+    min_x, min_y = cell_of(level, min_lat, min_lng)
+    max_x, max_y = cell_of(level, max_lat, max_lng)
+
+    clusters: Dict[Tuple[int, int], dict] = {}
+    for tile_x in range(min_x // TILE_CELLS, max_x // TILE_CELLS + 1):
+        for tile_y in range(min_y // TILE_CELLS, max_y // TILE_CELLS + 1):
+            for (cell_x, cell_y, category, status, count,
+                 latitude_sum, longitude_sum) in await _load_tile(
+                    db, level, tile_x, tile_y):
+                if not (min_x <= cell_x <= max_x and min_y <= cell_y <= max_y):
+                    continue
+                category = category.value
+                status = status.value
+                if categories and category not in categories:
+                    continue
+                if statuses and status not in statuses:
+                    continue
+
+                cluster = clusters.setdefault((cell_x, cell_y), {
+                    "count": 0, "latitude_sum": 0.0, "longitude_sum": 0.0,
+                    "categories": defaultdict(int),
+                    "statuses": defaultdict(int),
+                })
+                cluster["count"] += count
+                cluster["latitude_sum"] += latitude_sum
+                cluster["longitude_sum"] += longitude_sum
+                cluster["categories"][category] += count
+                cluster["statuses"][status] += count
+
+    return [
+        {
+            "cell_x": cell_x,
+            "cell_y": cell_y,
+            "latitude": cluster["latitude_sum"] / cluster["count"],
+            "longitude": cluster["longitude_sum"] / cluster["count"],
+            "count": cluster["count"],
+            "categories": dict(cluster["categories"]),
+            "statuses": dict(cluster["statuses"]),
+        }
+        for (cell_x, cell_y), cluster in clusters.items()
+        if cluster["count"] > 0
+    ]
+
+
+async def rebuild_clusters(db: AsyncSession) -> int:
+    """Recompute the whole grid from the issues table; returns rows written"""
+    await db.execute(text("DELETE FROM issue_grid_cells"))
+    written = 0
+    for level in GRID_LEVELS:
+        size = cell_size(level)
+        last = (1 << level) - 1
+        result = await db.execute(text(f"""
+            INSERT INTO issue_grid_cells
+                (level, cell_x, cell_y, category, status,
+                 count, latitude_sum, longitude_sum)
+            SELECT {level},
+                   min(CAST((longitude + 180.0) / {size!r} AS INTEGER), {last}),
+                   min(CAST((latitude + 90.0) / {size!r} AS INTEGER), {last}),
+                   category, coalesce(status, 'PENDING'),
+                   count(*), sum(latitude), sum(longitude)
+            FROM issues
+            GROUP BY 2, 3, 4, 5
+        """))
+        written += result.rowcount
+    await db.commit()
+    tile_cache.clear()
+
+    logger.info("Issue clusters rebuilt: %d grid rows", written)
+    return written
@@ -0,0 +1,41 @@
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Iterable, List
+
+from app.models import Comment
+
+
+async def comment_counts(
+    db: AsyncSession,
+    issue_ids: Iterable[str]
+) -> Dict[str, int]:
+    """Count the comments of several issues in one grouped query.
+
+    Counts come off ix_comments_issue_created_at_id without touching the
+    comment rows. Issues without comments are absent from the result.
+    """
+    issue_ids = list(set(issue_ids))
+    if not issue_ids:
+        return {}
+
+    result = await db.execute(
+        select(Comment.issue_id, func.count())
+        .where(Comment.issue_id.in_(issue_ids))
+        .group_by(Comment.issue_id)
+    )
+    return dict(result.all())
+
+
+async def add_comment_counts(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Set ``comments_count`` on a page of plain issue rows.
+
+    Vote counts are columns of the issue row; comment counts are added with
+    a single query for the whole page.
+    """
+    counts = await comment_counts(db, (row["id"] for row in rows))
+    for row in rows:
+        row["comments_count"] = counts.get(row["id"], 0)
+    return rows
@@ -0,0 +1,349 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import math
+import random
+import uuid
+
+from app.models import (
+    User, Issue, Task, Comment, Vote,
+    UserRole, IssueCategory, IssueStatus, TaskStatus, TaskPriority
+)
+
+logger = logging.getLogger(__name__)
+
+# Generated accounts share this email domain, so a second run can tell
+GENERATED_EMAIL_DOMAIN = "generated.example.com"
+
+TITLES = {
+    IssueCategory.POTHOLE: ["Pothole in the road", "Deep pothole near junction",
+                            "Road surface breaking up"],
+    IssueCategory.STREETLIGHT: ["Street light out", "Flickering street light",
+                                "Lamp post damaged"],
+    IssueCategory.GARBAGE: ["Overflowing garbage bin", "Illegal dumping",
+                            "Missed garbage collection"],
+    IssueCategory.WATERLOGGING: ["Waterlogged street", "Blocked storm drain",
+                                 "Flooding after rain"],
+    IssueCategory.OTHER: ["Fallen tree branch", "Damaged signboard",
+                          "Broken bench in park"],
+}
+CATEGORIES = list(IssueCategory)
+COMMENTS = [
+    "Still not fixed.", "Same problem here.", "This is getting worse.",
+    "Crew was seen on site today.", "Thanks for reporting this.",
+    "Happens every time it rains.",
+]
+
+
+@dataclass
+class DatasetConfig:
+    """Shape of a generated city; the same seed gives the same rows"""
+    citizens: int = 10000
+    fieldworkers: int = 200
+    staff: int = 50
+    issues: int = 100000
+    hotspots: int = 40
+    # Share of issues reported around a hotspot rather than anywhere
+    hotspot_share: float = 0.8
+    votes_per_issue: float = 3.0
+    comments_per_issue: float = 1.0
+    days: int = 365
+    center_lat: float = 37.7749
+    center_lng: float = -122.4194
+    radius_m: float = 10000.0
+    seed: int = 1
+    batch_size: int = 10000
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    """Cumulative weights where rank r is picked in proportion to 1/r^s"""
+    return list(accumulate(1 / (rank ** exponent)
+                           for rank in range(1, count + 1)))
+
+
+def _heavy_tail(rng: random.Random, mean: float, cap: int) -> int:
+    """A count with the given mean where most are 0 and a few are large"""
+    return min(cap, int(mean * (rng.paretovariate(2.0) - 1)))
+
+
+class CityGenerator:
+    """Deterministic rows for a synthetic city.
+
+    Issues cluster around hotspots whose popularity follows a Zipf curve,
+    each hotspot leaning to one category. Reporters, voters and comment
+    counts are skewed the same way: a few citizens report most issues and
+    a few issues collect most votes. Older issues are more likely resolved.
+    """
+
+    def __init__(self, config: DatasetConfig, password_hash: str):
+        self.config = config
+        self.password_hash = password_hash
+        self.rng = random.Random(config.seed)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+        rng = self.rng
+        self.hotspots = []
+        for _ in range(config.hotspots):
+            lat, lng = self._point(config.center_lat, config.center_lng,
+                                   config.radius_m)
+            self.hotspots.append((lat, lng, rng.choice(CATEGORIES),
+                                  rng.uniform(100, 600)))
+        self.hotspot_weights = _zipf_weights(len(self.hotspots))
+        self.reporter_weights = _zipf_weights(config.citizens, 0.8)
+
+        self.citizen_ids: List[str] = []
+        self.fieldworker_ids: List[str] = []
+        self.staff_ids: List[str] = []
+
+    def _point(self, lat: float, lng: float, radius_m: float,
+               gaussian: bool = False):
+        """A point around (lat, lng), uniform in the disc or gaussian"""
+        rng = self.rng
+        if gaussian:
+            north, east = rng.gauss(0, radius_m), rng.gauss(0, radius_m)
+        else:
+            distance = radius_m * math.sqrt(rng.random())
+            angle = rng.uniform(0, 2 * math.pi)
+            north, east = distance * math.cos(angle), distance * math.sin(angle)
+        return (lat + north / 111320,
+                lng + east / (111320 * math.cos(math.radians(lat))))
+
+    def users(self) -> List[dict]:
+        config, rng = self.config, self.rng
+        rows = []
+        for role, count, ids in (
+                (UserRole.CITIZEN, config.citizens, self.citizen_ids),
+                (UserRole.FIELDWORKER, config.fieldworkers, self.fieldworker_ids),
+                (UserRole.STAFF, config.staff, self.staff_ids)):
+            for i in range(count):
+                user_id = _uuid(rng)
+                ids.append(user_id)
+                rows.append({
+                    "id": user_id,
+                    "email": f"{role.value}{i}@{GENERATED_EMAIL_DOMAIN}",
+                    "password": self.password_hash,
+                    "name": f"{role.value.title()} {i}",
+                    "role": role,
+                    "points": 0,
+                    "badge_count": 0,
+                    "is_active": True,
+                    "created_at": self.now - timedelta(
+                        days=config.days, seconds=rng.randrange(86400 * 30)),
+                })
+        return rows
+
+    def issue_batch(self, start: int, count: int) -> Dict[str, List[dict]]:
+        """Issues ``start`` to ``start + count`` with their tasks, votes and
+        comments"""
+        config, rng = self.config, self.rng
+        batch = {"issues": [], "tasks": [], "votes": [], "comments": []}
+
+        for offset in range(count):
+            index = start + offset
+            reporter = rng.choices(self.citizen_ids,
+                                   cum_weights=self.reporter_weights)[0]
+            if self.hotspots and rng.random() < config.hotspot_share:
+                lat, lng, hot_category, spread = rng.choices(
+                    self.hotspots, cum_weights=self.hotspot_weights)[0]
+                lat, lng = self._point(lat, lng, spread, gaussian=True)
+                category = (hot_category if rng.random() < 0.6
+                            else rng.choice(CATEGORIES))
+            else:
+                lat, lng = self._point(config.center_lat, config.center_lng,
+                                       config.radius_m)
+                category = rng.choice(CATEGORIES)
+
+            # Skewed towards recent reports
+            age = timedelta(seconds=86400 * config.days * rng.random() ** 1.5)
+            reported_at = self.now - age
+            status = self._status(age.days)
+            issue_id = _uuid(rng)
+            assignee = None
+            resolved_at = None
+            if status in (IssueStatus.ASSIGNED, IssueStatus.IN_PROGRESS,
+                          IssueStatus.RESOLVED) and self.fieldworker_ids:
+                assignee = rng.choice(self.fieldworker_ids)
+            if status == IssueStatus.RESOLVED:
+                resolved_at = min(self.now, reported_at + timedelta(
+                    hours=rng.expovariate(1 / 72)))
+
+            batch["issues"].append({
+                "id": issue_id,
+                "title": rng.choice(TITLES[category]),
+                "description": f"{rng.choice(TITLES[category])}, reported "
+                               f"by a resident. Generated issue {index}.",
+                "category": category,
+                "urgency": rng.choices(range(1, 6), weights=(30, 30, 20, 12, 8))[0],
+                "status": status,
+                "latitude": lat,
+                "longitude": lng,
+                "address": f"{rng.randint(1, 2000)} Generated Street",
+                "images": "[]",
+                "audio_note": None,
+                "tracking_id": f"TRK-GEN-{config.seed}-{index:08d}",
+                "reporter_id": reporter,
+                "assignee_id": assignee,
+                "reported_at": reported_at,
+                "updated_at": resolved_at or reported_at,
+                "resolved_at": resolved_at,
+            })
+
+            if assignee:
+                batch["tasks"].append(self._task(
+                    issue_id, category, status, lat, lng, assignee,
+                    reported_at, resolved_at))
+            self._votes(batch["votes"], issue_id)
+            self._comments(batch["comments"], issue_id, reporter,
+                           reported_at)
+        return batch
+
+    def _status(self, age_days: int) -> IssueStatus:
+        rng = self.rng
+        if rng.random() < 0.8 * min(1.0, age_days / 60):
+            return IssueStatus.RESOLVED
+        if rng.random() < 0.05:
+            return IssueStatus.REJECTED
+        return rng.choices(
+            (IssueStatus.PENDING, IssueStatus.ASSIGNED, IssueStatus.IN_PROGRESS),
+            weights=(50, 25, 25))[0]
+
+    def _task(self, issue_id, category, status, lat, lng, assignee,
+              reported_at, resolved_at) -> dict:
+        rng = self.rng
+        task_status = {
+            IssueStatus.ASSIGNED: rng.choice((TaskStatus.NEW,
+                                              TaskStatus.ACCEPTED)),
+            IssueStatus.IN_PROGRESS: TaskStatus.IN_PROGRESS,
+            IssueStatus.RESOLVED: TaskStatus.COMPLETED,
+        }[status]
+        assigned_at = reported_at + timedelta(hours=rng.uniform(0.5, 24))
+        if resolved_at:
+            assigned_at = min(assigned_at, resolved_at)
+        return {
+            "id": _uuid(rng),
+            "title": f"Resolve {category.value} report",
+            "description": "Inspect the site and fix the reported problem.",
+            "priority": rng.choice(list(TaskPriority)),
+            "status": task_status,
+            "latitude": lat,
+            "longitude": lng,
+            "address": "Generated Street",
+            "category": category.value,
+            "images": "[]",
+            "assigned_at": assigned_at,
+            "due_date": assigned_at + timedelta(days=rng.randint(1, 14)),
+            "completed_at": resolved_at,
+            "notes": None,
+            "issue_id": issue_id,
+            "assignee_id": assignee,
+        }
+
+    def _votes(self, rows: List[dict], issue_id: str):
+        rng = self.rng
+        count = _heavy_tail(rng, self.config.votes_per_issue,
+                            len(self.citizen_ids))
+        for index in rng.sample(range(len(self.citizen_ids)), count):
+            rows.append({
+                "id": _uuid(rng),
+                "is_upvote": rng.random() < 0.85,
+                "issue_id": issue_id,
+                "user_id": self.citizen_ids[index],
+            })
+
+    def _comments(self, rows: List[dict], issue_id: str, reporter_id: str,
+                  reported_at: datetime):
+        rng = self.rng
+        count = _heavy_tail(rng, self.config.comments_per_issue, 50)
+        window = (self.now - reported_at).total_seconds()
+        for _ in range(count):
+            roll = rng.random()
+            if roll < 0.4:
+                author = reporter_id
+            elif roll < 0.8 or not self.staff_ids:
+                author = rng.choice(self.citizen_ids)
+            else:
+                author = rng.choice(self.staff_ids)
+            rows.append({
+                "id": _uuid(rng),
+                "text": rng.choice(COMMENTS),
+                "created_at": reported_at + timedelta(
+                    seconds=window * rng.random()),
+                "issue_id": issue_id,
+                "author_id": author,
+            })
+
+
+async def generate_dataset(
+    session_maker: async_sessionmaker,
+    config: DatasetConfig,
+    password_hash: str,
+    progress: Optional[Callable[[int], None]] = None
+) -> Dict[str, int]:
+    """Insert a generated city; returns the rows written per table.
+
+    Rows go in with executemany INSERTs of ``config.batch_size`` issues and
+    their dependents, one transaction per batch, so memory stays flat
+    however many issues are generated. The next batch is generated on a
+    worker thread while SQLite writes the previous one. Vote counters and
+    the R*Tree are filled by the table triggers; the caller rebuilds the
+    rollup tables.
+    """
+    if config.citizens < 1:
+        raise ValueError("At least one citizen is needed to report issues")
+
+    async with session_maker() as session:
+        existing = await session.scalar(
+            select(func.count()).select_from(User)
+            .where(User.email.like(f"%@{GENERATED_EMAIL_DOMAIN}")))
+    if existing:
+        raise ValueError("The database already holds a generated dataset")
+
+    generator = CityGenerator(config, password_hash)
+    written = {"users": 0, "issues": 0, "tasks": 0, "votes": 0, "comments": 0}
+
+    users = generator.users()
+    async with session_maker() as session:
+        for start in range(0, len(users), config.batch_size):
+            await session.execute(insert(User.__table__),
+                                  users[start:start + config.batch_size])
+        await session.commit()
+    written["users"] = len(users)
+
+    tables = (("issues", Issue), ("tasks", Task), ("votes", Vote),
+              ("comments", Comment))
+
+    async def write(batch):
+        async with session_maker() as session:
+            for name, model in tables:
+                if batch[name]:
+                    await session.execute(insert(model.__table__), batch[name])
+            await session.commit()
+        for name, _ in tables:
+            written[name] += len(batch[name])
+        if progress:
+            progress(written["issues"])
+
+    # Batches are still generated in order, so the rows only depend on the
+    # seed
+    writing = None
+    for start in range(0, config.issues, config.batch_size):
+        batch = await asyncio.to_thread(
+            generator.issue_batch, start,
+            min(config.batch_size, config.issues - start))
+        if writing:
+            await writing
+        writing = asyncio.create_task(write(batch))
+    if writing:
+        await writing
+
+    logger.info("Dataset generated: %s", written)
+    return written
@@ -0,0 +1,322 @@
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import asyncio
+import logging
+import math
+import re
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import on_commit
+from app.models import Issue, IssueStatus
+from app.services.geo import METERS_PER_DEGREE, bounding_box, haversine_m
+from app.services.search import STOP_WORDS
+
+logger = logging.getLogger(__name__)
+
+# Statuses of issues new reports can duplicate
+OPEN_STATUSES = frozenset({"pending", "assigned", "in_progress"})
+
+# MinHash signature length; each shingle lands in one bin, so a signature
+# costs one hash per shingle however many bins there are
+SIGNATURE_BINS = 64
+_BIN_BITS = SIGNATURE_BINS.bit_length() - 1
+# Value of a bin no shingle fell into
+_EMPTY = 0xFFFFFFFF
+
+_WORD = re.compile(r"\w+")
+
+
+class DuplicateMatch(NamedTuple):
+    """An open issue a new report probably describes again"""
+    issue_id: str
+    tracking_id: str
+    distance_m: float
+    similarity: float
+
+
+class _Entry(NamedTuple):
+    tracking_id: str
+    category: str
+    latitude: float
+    longitude: float
+    signature: array
+    cell: Tuple[int, int]
+    indexed_at: float
+
+
+def shingles(text: str) -> Set[str]:
+    """Character trigrams of the words of ``text``.
+
+    Words are padded with a space on each side, so short words still give
+    a shingle and inflections such as "flooded" and "flooding" share most
+    of theirs. Stop words are left out.
+    """
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def text_signature(title: str, description: str) -> array:
+    """One-permutation MinHash of the shingles of a report's text.
+
+    Each shingle is hashed once; the low bits pick a bin and the bin keeps
+    the smallest remaining value. Two signatures agree on a non-empty bin
+    with probability equal to the Jaccard similarity of the shingle sets.
+    """
+    signature = array("I", [_EMPTY]) * SIGNATURE_BINS
+    mask = SIGNATURE_BINS - 1
+    for gram in shingles(f"{title} {description}"):
+        value = hash(gram)
+        bin_index = value & mask
+        value = (value >> _BIN_BITS) & 0xFFFFFFFE
+        if value < signature[bin_index]:
+            signature[bin_index] = value
+    return signature
+
+
+def similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of two signatures.
+
+    Bins empty in both signatures carry no information and are skipped.
+    """
+    matches = 0
+    used = 0
+    for a, b in zip(first, second):
+        if a == b:
+            if a != _EMPTY:
+                matches += 1
+                used += 1
+        else:
+            used += 1
+    return matches / used if used else 0.0
+
+
+class DuplicateIndex:
+    """Recent open issues, bucketed by location, with their text signatures.
+
+    Buckets are square grid cells one search radius across, so a lookup
+    reads a handful of cells and compares a few signatures. Entries older
+    than the window are skipped and dropped lazily. The index lives in
+    this process only; it is rebuilt from the database at startup.
+    """
+
+    def __init__(
+        self,
+        radius_m: float = settings.DUPLICATE_RADIUS_M,
+        min_similarity: float = settings.DUPLICATE_MIN_SIMILARITY,
+        window_days: float = settings.DUPLICATE_WINDOW_DAYS
+    ):
+        self.radius_m = radius_m
+        self.min_similarity = min_similarity
+        self.window_seconds = window_days * 86400
+        self._cell_deg = radius_m / METERS_PER_DEGREE
+        self._entries: Dict[str, _Entry] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+
+    def _cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self._cell_deg),
+                math.floor(longitude / self._cell_deg))
+
+    def _remove(self, issue_id: str):
+        entry = self._entries.pop(issue_id, None)
+        if entry is not None:
+            cell = self._cells.get(entry.cell)
+            if cell is not None:
+                cell.discard(issue_id)
+                if not cell:
+                    del self._cells[entry.cell]
+
+    def add(
+        self,
+        issue_id: str,
+        tracking_id: str,
+        category: str,
+        latitude: float,
+        longitude: float,
+        signature: array,
+        indexed_at: Optional[float] = None
+    ):
+        """Insert or replace an issue.
+
+        An issue already indexed keeps its original time, so edits do not
+        extend its stay in the window.
+        """
+        with self._lock:
+            previous = self._entries.get(issue_id)
+            if indexed_at is None:
+                indexed_at = previous.indexed_at if previous else time.time()
+            self._remove(issue_id)
+            cell = self._cell(latitude, longitude)
+            self._entries[issue_id] = _Entry(
+                tracking_id, category, latitude, longitude, signature,
+                cell, indexed_at)
+            self._cells[cell].add(issue_id)
+
+    def discard(self, issue_id: str):
+        with self._lock:
+            self._remove(issue_id)
+
+    def replace(self, entries: Iterable[Tuple[str, _Entry]]):
+        """Swap in a freshly built set of entries"""
+        cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+        indexed: Dict[str, _Entry] = {}
+        for issue_id, entry in entries:
+            indexed[issue_id] = entry
+            cells[entry.cell].add(issue_id)
+        with self._lock:
+            self._entries = indexed
+            self._cells = cells
+
+    def entry(
+        self,
+        tracking_id: str,
+        category: str,
+        latitude: float,
+        longitude: float,
+        signature: array,
+        indexed_at: float
+    ) -> _Entry:
+        """An entry for ``replace``"""
+        return _Entry(tracking_id, category, latitude, longitude, signature,
+                      self._cell(latitude, longitude), indexed_at)
+
+    def find(
+        self,
+        category: str,
+        latitude: float,
+        longitude: float,
+        signature: array,
+        limit: int = settings.DUPLICATE_MAX_MATCHES
+    ) -> List[DuplicateMatch]:
+        """Open issues of ``category`` within the radius with similar text.
+
+        Best matches first: text similarity, discounted by up to half as
+        the distance approaches the radius.
+        """
+        min_lat, min_lng, max_lat, max_lng = bounding_box(
+            latitude, longitude, self.radius_m)
+        min_x, min_y = self._cell(min_lat, min_lng)
+        max_x, max_y = self._cell(max_lat, max_lng)
+        cutoff = time.time() - self.window_seconds
+
+        matches = []
+        with self._lock:
+            self.lookups += 1
+            stale = []
+            for x in range(min_x, max_x + 1):
+                for y in range(min_y, max_y + 1):
+                    for issue_id in self._cells.get((x, y), ()):
+                        entry = self._entries[issue_id]
+                        if entry.indexed_at < cutoff:
+                            stale.append(issue_id)
+                            continue
+                        if entry.category != category:
+                            continue
+                        distance = haversine_m(latitude, longitude,
+                                               entry.latitude, entry.longitude)
+                        if distance > self.radius_m:
+                            continue
+                        score = similarity(signature, entry.signature)
+                        if score >= self.min_similarity:
+                            matches.append(DuplicateMatch(
+                                issue_id, entry.tracking_id, distance, score))
+            for issue_id in stale:
+                self._remove(issue_id)
+            if matches:
+                self.matches += 1
+
+        matches.sort(key=lambda match: -match.similarity * (
+            1 - 0.5 * match.distance_m / self.radius_m))
+        return matches[:limit]
+
+    def metrics(self) -> dict:
+        return {
+            "issues": len(self._entries),
+            "lookups": self.lookups,
+            "matches": self.matches,
+        }
+
+
+duplicate_index = DuplicateIndex()
+
+
+def _value(field) -> str:
+    return getattr(field, "value", field)
+
+
+def find_duplicates(
+    category: str,
+    latitude: float,
+    longitude: float,
+    signature: array
+) -> List[DuplicateMatch]:
+    """Suspected duplicates of a new report among recent open issues"""
+    return duplicate_index.find(_value(category), latitude, longitude,
+                                signature)
+
+
+def track_issue_change(
+    db: AsyncSession,
+    issue: Issue,
+    signature: Optional[array] = None
+):
+    """Update the duplicate index for ``issue`` once the session commits.
+
+    Open issues are (re)indexed with their current text and location;
+    resolved and rejected ones leave the index.
+    """
+    status = _value(issue.status) or "pending"
+    if status not in OPEN_STATUSES:
+        on_commit(db, lambda: duplicate_index.discard(issue.id))
+        return
+
+    if signature is None:
+        signature = text_signature(issue.title, issue.description)
+    tracking_id, category = issue.tracking_id, _value(issue.category)
+    latitude, longitude = issue.latitude, issue.longitude
+    # The id of a new issue is only known once it is flushed
+    on_commit(db, lambda: duplicate_index.add(
+        issue.id, tracking_id, category, latitude, longitude, signature))
+
+
+async def load_duplicate_index(db: AsyncSession):
+    """Rebuild the duplicate index from the open issues in the window"""
+    since = datetime.now(timezone.utc) - timedelta(
+        days=duplicate_index.window_seconds / 86400)
+    stmt = select(
+        Issue.id, Issue.tracking_id, Issue.category, Issue.latitude,
+        Issue.longitude, Issue.title, Issue.description, Issue.reported_at
+    ).where(
+        Issue.status.in_([IssueStatus.PENDING, IssueStatus.ASSIGNED,
+                          IssueStatus.IN_PROGRESS]),
+        Issue.reported_at >= since
+    )
+    rows = (await db.execute(stmt)).all()
+
+    def build():
+        for (issue_id, tracking_id, category, latitude, longitude, title,
+             description, reported_at) in rows:
+            if reported_at.tzinfo is None:
+                # SQLite hands back naive UTC timestamps
+                reported_at = reported_at.replace(tzinfo=timezone.utc)
+            yield issue_id, duplicate_index.entry(
+                tracking_id, category.value, latitude, longitude,
+                text_signature(title, description), reported_at.timestamp())
+
+    # Hashing every open report takes a moment; keep it off the event loop
+    await asyncio.to_thread(lambda: duplicate_index.replace(build()))
+    logger.info("Duplicate index loaded: %d open issues", len(rows))
@@ -0,0 +1,259 @@
+from collections import defaultdict, deque
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Set
+import asyncio
+import itertools
+import json
+import logging
+
+from app.auth.claims import Principal
+from app.core.config import settings
+from app.core.database import on_commit
+from app.models import Comment, Issue, Task, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Topics a connection may ask for; "issue:<id>" and "task:<id>" follow a
+# single issue or task, and "me" the caller's own reports and tasks
+COLLECTION_TOPICS = frozenset({"issues", "tasks", "me"})
+ENTITY_TOPIC_PREFIXES = ("issue:", "task:")
+MAX_TOPICS = 50
+
+# Sent in place of the events a connection fell too far behind to receive
+RESYNC = "resync"
+
+
+class Event(NamedTuple):
+    type: str
+    # Who may see the event besides staff and admin; the owner of an issue
+    # event is its reporter, of a task event its assignee
+    owner_id: Optional[str]
+    # Server-Sent Events message, encoded once for every recipient
+    message: bytes
+
+
+def sse_message(type: str, data: Dict[str, Any], id: Optional[int] = None) -> bytes:
+    """A Server-Sent Events message carrying ``data`` as JSON"""
+    head = f"id: {id}\n" if id is not None else ""
+    return (f"{head}event: {type}\n"
+            f"data: {json.dumps(data, default=_json_default)}\n\n").encode()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return getattr(value, "value", str(value))
+
+
+def _value(field):
+    return getattr(field, "value", field)
+
+
+def parse_topics(topics: Optional[str], principal: Principal) -> Set[str]:
+    """Subscription keys for a comma-separated ``topics`` parameter.
+
+    "me" becomes the caller's own ``user:<id>`` topic. Raises ValueError
+    for anything else that is not a known topic.
+    """
+    names = [name.strip() for name in (topics or "me").split(",") if name.strip()]
+    if not names or len(names) > MAX_TOPICS:
+        raise ValueError(f"Between 1 and {MAX_TOPICS} topics are required")
+
+    keys = set()
+    for name in names:
+        if name == "me":
+            keys.add(f"user:{principal.id}")
+        elif name in COLLECTION_TOPICS or (
+                name.startswith(ENTITY_TOPIC_PREFIXES) and
+                len(name.split(":", 1)[1]) > 0):
+            keys.add(name)
+        else:
+            raise ValueError(f"Unknown topic '{name}'")
+    return keys
+
+
+def may_see(principal: Principal, event: Event) -> bool:
+    """Whether ``principal`` can read what ``event`` is about.
+
+    Mirrors the endpoints: citizens see their own issues, fieldworkers
+    every issue but only their own tasks.
+    """
+    role = _value(principal.role)
+    if role in (UserRole.STAFF.value, UserRole.ADMIN.value):
+        return True
+    if event.type.startswith("issue.") and role == UserRole.FIELDWORKER.value:
+        return True
+    return event.owner_id == principal.id
+
+
+class Subscription:
+    """One connection's topic keys and bounded backlog of events.
+
+    When the backlog is full the connection is marked as lagging and its
+    backlog dropped; it then receives a single "resync" event telling the
+    client to refetch, instead of holding up or growing without bound
+    behind a slow reader.
+    """
+
+    def __init__(self, principal: Principal, keys: Set[str],
+                 max_backlog: int = settings.EVENTS_BACKLOG_SIZE):
+        self.principal = principal
+        self.keys = keys
+        self.max_backlog = max_backlog
+        self._backlog: Deque[Event] = deque()
+        self._ready = asyncio.Event()
+        self.lagging = False
+
+    def offer(self, event: Event) -> bool:
+        """Queue ``event``; False if it was dropped because the reader lags"""
+        if self.lagging:
+            return False
+        if len(self._backlog) >= self.max_backlog:
+            self._backlog.clear()
+            self.lagging = True
+            self._ready.set()
+            return False
+        self._backlog.append(event)
+        self._ready.set()
+        return True
+
+    async def next_batch(self, timeout: float) -> Optional[List[Event]]:
+        """Queued events, waiting up to ``timeout`` seconds for one.
+
+        Returns [] on timeout and None once the connection lagged, after
+        which the caller sends a resync and carries on.
+        """
+        if not self._backlog and not self.lagging:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        if self.lagging:
+            self.lagging = False
+            return None
+        batch = list(self._backlog)
+        self._backlog.clear()
+        return batch
+
+
+class EventBroker:
+    """In-process fan-out of change events to subscribed connections.
+
+    Subscriptions are indexed by topic key, so publishing an event touches
+    only the connections following one of its topics. Publishing never
+    waits on a connection. Must be used from the event loop thread.
+    """
+
+    def __init__(self):
+        self._by_key: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._ids = itertools.count(1)
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, subscription: Subscription):
+        for key in subscription.keys:
+            self._by_key[key].add(subscription)
+        self.connections += 1
+
+    def unsubscribe(self, subscription: Subscription):
+        for key in subscription.keys:
+            subscribers = self._by_key.get(key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_key[key]
+        self.connections -= 1
+
+    def publish(self, type: str, topics: Iterable[str],
+                owner_id: Optional[str], data: Dict[str, Any]):
+        event = Event(type, owner_id, sse_message(type, data, next(self._ids)))
+        self.published += 1
+
+        recipients: Set[Subscription] = set()
+        for key in topics:
+            recipients.update(self._by_key.get(key, ()))
+        for subscription in recipients:
+            if not may_see(subscription.principal, event):
+                continue
+            if subscription.offer(event):
+                self.delivered += 1
+            else:
+                self.dropped += 1
+
+    def metrics(self) -> dict:
+        return {
+            "connections": self.connections,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+event_broker = EventBroker()
+
+
+def _issue_topics(issue_id: str, reporter_id: Optional[str]) -> List[str]:
+    topics = [f"issue:{issue_id}", "issues"]
+    if reporter_id:
+        topics.append(f"user:{reporter_id}")
+    return topics
+
+
+def publish_issue_change(db: AsyncSession, issue: Issue):
+    """Announce an issue's new state once the session commits"""
+    data = {
+        "issue_id": issue.id,
+        "tracking_id": issue.tracking_id,
+        "status": _value(issue.status),
+        "urgency": issue.urgency,
+        "assignee_id": issue.assignee_id,
+    }
+    topics = _issue_topics(issue.id, issue.reporter_id)
+    on_commit(db, lambda: event_broker.publish(
+        "issue.updated", topics, issue.reporter_id, data))
+
+
+def publish_issue_votes(db: AsyncSession, issue_id: str,
+                        reporter_id: Optional[str], upvotes: int, downvotes: int):
+    """Announce an issue's new vote counts once the session commits"""
+    data = {"issue_id": issue_id, "upvotes": upvotes, "downvotes": downvotes}
+    topics = _issue_topics(issue_id, reporter_id)
+    on_commit(db, lambda: event_broker.publish(
+        "issue.voted", topics, reporter_id, data))
+
+
+def publish_comment(issue: Issue, comment: Comment, author_name: str):
+    """Announce a comment that has been committed and refreshed.
+
+    Published directly rather than on commit, since the comment's
+    timestamp is only known once it is read back.
+    """
+    event_broker.publish(
+        "issue.commented", _issue_topics(issue.id, issue.reporter_id),
+        issue.reporter_id, {
+            "issue_id": comment.issue_id,
+            "comment_id": comment.id,
+            "author_id": comment.author_id,
+            "author_name": author_name,
+            "text": comment.text,
+            "created_at": comment.created_at,
+        })
+
+
+def publish_task_change(db: AsyncSession, task: Task, type: str = "task.updated"):
+    """Announce a task's new state once the session commits"""
+    data = {
+        "task_id": task.id,
+        "issue_id": task.issue_id,
+        "status": _value(task.status),
+        "priority": _value(task.priority),
+        "due_date": task.due_date,
+        "assignee_id": task.assignee_id,
+    }
+    topics = [f"task:{task.id}", "tasks", f"user:{task.assignee_id}"]
+    on_commit(db, lambda: event_broker.publish(
+        type, topics, task.assignee_id, data))
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+from enum import Enum
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List
+import csv
+import io
+import json
+
+from app.core.streaming import NDJSON_MEDIA_TYPE
+
+# Rows fetched from the database cursor per round trip
+EXPORT_BATCH_ROWS = 2000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": NDJSON_MEDIA_TYPE,
+}
+
+
+def _plain(value):
+    """Column value as a JSON/CSV scalar"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def stream_export(
+    db: AsyncSession,
+    query,
+    export_format: str
+) -> AsyncIterator[str]:
+    """Stream the rows of a Core ``query`` as CSV or NDJSON text.
+
+    Rows are pulled from a server-side cursor EXPORT_BATCH_ROWS at a time
+    and each batch is encoded and handed on before the next is fetched, so
+    memory stays flat however many rows match.
+    """
+    result = await db.stream(
+        query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+    columns: List[str] = list(result.keys())
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        async for rows in result.partitions():
+            writer.writerows([_plain(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        # Header only when nothing matched
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(dict(zip(columns, map(_plain, row)))) + "\n"
+                for row in rows
+            )
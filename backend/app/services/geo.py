@@ -0,0 +1,33 @@
+from typing import Tuple
+import math
+
+# Mean Earth radius and the length of one degree of latitude, in meters
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in meters"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+
+    a = (math.sin(d_phi / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle around a point"""
+    d_lat = radius_m / METERS_PER_DEGREE
+    # Longitude degrees shrink towards the poles; clamp to avoid dividing by 0
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    d_lng = min(radius_m / (METERS_PER_DEGREE * cos_lat), 180.0)
+
+    return (
+        max(lat - d_lat, -90.0),
+        max(lng - d_lng, -180.0),
+        min(lat + d_lat, 90.0),
+        min(lng + d_lng, 180.0),
+    )
@@ -0,0 +1,84 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Tuple
+import json
+import logging
+import uuid
+
+from app.models import Issue
+from app.schemas.issue import IssueCreate
+from app.services.clusters import position_of, record_issue_changes
+from app.services.duplicates import track_issue_change
+from app.services.stats import issue_counters, record_stats_change
+
+logger = logging.getLogger(__name__)
+
+# Records inserted per transaction by POST /issues/bulk
+BULK_BATCH_SIZE = 500
+
+# Longest NDJSON line accepted by POST /issues/bulk
+MAX_LINE_BYTES = 64 * 1024
+
+
+def new_tracking_id() -> str:
+    """Public tracking ID of a new issue"""
+    return f"TRK-{uuid.uuid4().hex[:12].upper()}"
+
+
+async def insert_issue_batch(
+    db: AsyncSession,
+    reporter_id: str,
+    batch: List[Tuple[int, IssueCreate]]
+) -> List[dict]:
+    """Insert ``(line_number, record)`` pairs in one transaction.
+
+    Rows go in as a single executemany, and the cluster grid and stats
+    counters are updated with one statement each. Returns one result per
+    record; if the transaction fails, every record in it is reported as
+    failed and nothing is written.
+    """
+    rows = []
+    changes = []
+    counters = []
+    issues = []
+    for _, record in batch:
+        row = {
+            "id": str(uuid.uuid4()),
+            "title": record.title,
+            "description": record.description,
+            "category": record.category,
+            "urgency": record.urgency,
+            "latitude": record.latitude,
+            "longitude": record.longitude,
+            "address": record.address,
+            "images": json.dumps(record.images),
+            "audio_note": record.audio_note,
+            "tracking_id": new_tracking_id(),
+            "reporter_id": reporter_id,
+        }
+        rows.append(row)
+
+        # Transient instance, only used to derive the rollup rows
+        issue = Issue(**row)
+        issues.append(issue)
+        changes.append((None, position_of(issue)))
+        counters.extend(issue_counters(issue))
+
+    try:
+        await db.execute(insert(Issue), rows)
+        await record_issue_changes(db, changes)
+        await record_stats_change(db, None, counters)
+        for issue in issues:
+            track_issue_change(db, issue)
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error("Bulk issue batch failed: %s", e)
+        return [{"line": line_number, "status": "error",
+                 "errors": [{"loc": [], "msg": "Batch insert failed"}]}
+                for line_number, _ in batch]
+
+    return [{"line": line_number, "status": "created",
+             "id": row["id"], "tracking_id": row["tracking_id"]}
+            for (line_number, _), row in zip(batch, rows)]
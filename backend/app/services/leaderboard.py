@@ -0,0 +1,232 @@
+from bisect import bisect_left, insort
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+import threading
+
+from app.core.database import on_commit
+from app.models import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Keys per sublist of the rank index; a sublist twice this size is split
+SUBLIST_SIZE = 512
+
+# Ranked entries are ordered by (-points, user_id)
+Key = Tuple[int, str]
+
+
+class Standing(NamedTuple):
+    """A user's place on the leaderboard"""
+    user_id: str
+    points: int
+    # Competition rank: users with equal points share a rank
+    rank: int
+    # 0-based place in the order, distinct for every user
+    position: int
+
+
+class RankIndex:
+    """Sorted keys with O(log n) rank and position lookups.
+
+    Keys live in sorted sublists of about SUBLIST_SIZE, so an insert or
+    delete moves at most one sublist's worth of references. A Fenwick tree
+    over the sublist lengths turns a sublist number into the count of keys
+    before it and back. Not thread-safe; the leaderboard serialises access.
+    """
+
+    def __init__(self, keys: Iterable[Key] = ()):
+        self._reset(sorted(keys))
+
+    def _reset(self, keys: List[Key]):
+        self._lists = [keys[i:i + SUBLIST_SIZE]
+                       for i in range(0, len(keys), SUBLIST_SIZE)]
+        self._maxes = [sublist[-1] for sublist in self._lists]
+        self._len = len(keys)
+        self._build_tree()
+
+    def _build_tree(self):
+        tree = [0] + [len(sublist) for sublist in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, i: int, delta: int):
+        i += 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _before(self, i: int) -> int:
+        """Keys in the sublists before sublist ``i``"""
+        total = 0
+        while i:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position: int) -> Tuple[int, int]:
+        """(sublist, offset) of the key at ``position``"""
+        i, step = 0, 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            if i + step < len(self._tree) and self._tree[i + step] <= position:
+                i += step
+                position -= self._tree[i]
+            step >>= 1
+        return i, position
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Key):
+        if not self._lists:
+            self._reset([key])
+            return
+        i = min(bisect_left(self._maxes, key), len(self._lists) - 1)
+        sublist = self._lists[i]
+        insort(sublist, key)
+        self._maxes[i] = sublist[-1]
+        self._len += 1
+        if len(sublist) > 2 * SUBLIST_SIZE:
+            self._lists[i:i + 1] = [sublist[:SUBLIST_SIZE], sublist[SUBLIST_SIZE:]]
+            self._maxes[i:i + 1] = [self._lists[i][-1], self._lists[i + 1][-1]]
+            self._build_tree()
+        else:
+            self._tree_add(i, 1)
+
+    def remove(self, key: Key):
+        i = bisect_left(self._maxes, key)
+        sublist = self._lists[i]
+        del sublist[bisect_left(sublist, key)]
+        self._len -= 1
+        if sublist:
+            self._maxes[i] = sublist[-1]
+            self._tree_add(i, -1)
+        else:
+            del self._lists[i]
+            del self._maxes[i]
+            self._build_tree()
+
+    def bisect_left(self, key: Key) -> int:
+        """Number of keys ordered before ``key``"""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._lists):
+            return self._len
+        return self._before(i) + bisect_left(self._lists[i], key)
+
+    def slice(self, start: int, stop: int) -> List[Key]:
+        """Keys at positions ``start`` up to ``stop``"""
+        stop = min(stop, self._len)
+        if start >= stop:
+            return []
+        i, offset = self._locate(start)
+        keys: List[Key] = []
+        while len(keys) < stop - start:
+            keys.extend(self._lists[i][offset:offset + stop - start - len(keys)])
+            i, offset = i + 1, 0
+        return keys
+
+
+class Leaderboard:
+    """Active citizens ranked by points, kept in memory.
+
+    Seeded from the users table at startup and updated as points, roles
+    and activation change, so a rank or a page costs O(log n) rather than
+    a sort of every citizen.
+    """
+
+    def __init__(self):
+        self._index = RankIndex()
+        self._points: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+
+    def replace(self, entries: Iterable[Tuple[str, int]]):
+        points = dict(entries)
+        index = RankIndex((-value, user_id) for user_id, value in points.items())
+        with self._lock:
+            self._index, self._points = index, points
+
+    def update(self, user_id: str, points: int):
+        """Add ``user_id`` or move them to their new points"""
+        with self._lock:
+            current = self._points.get(user_id)
+            if current == points:
+                return
+            if current is not None:
+                self._index.remove((-current, user_id))
+            self._index.add((-points, user_id))
+            self._points[user_id] = points
+
+    def discard(self, user_id: str):
+        with self._lock:
+            current = self._points.pop(user_id, None)
+            if current is not None:
+                self._index.remove((-current, user_id))
+
+    def _rank(self, points: int) -> int:
+        # Users ahead are exactly those with more points
+        return self._index.bisect_left((-points, "")) + 1
+
+    def standing(self, user_id: str) -> Optional[Standing]:
+        with self._lock:
+            self.lookups += 1
+            points = self._points.get(user_id)
+            if points is None:
+                return None
+            position = self._index.bisect_left((-points, user_id))
+            return Standing(user_id, points, self._rank(points), position)
+
+    def page(self, offset: int, limit: int) -> List[Standing]:
+        """``limit`` standings from place ``offset``, best first"""
+        with self._lock:
+            self.lookups += 1
+            keys = self._index.slice(offset, offset + limit)
+            standings = []
+            for position, (negative, user_id) in enumerate(keys, offset):
+                if standings and standings[-1].points == -negative:
+                    rank = standings[-1].rank
+                else:
+                    rank = self._rank(-negative)
+                standings.append(Standing(user_id, -negative, rank, position))
+            return standings
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def metrics(self) -> dict:
+        return {"users": len(self._index), "lookups": self.lookups}
+
+
+leaderboard = Leaderboard()
+
+
+def ranked(user: User) -> bool:
+    """Whether ``user`` belongs on the leaderboard"""
+    role = getattr(user.role, "value", user.role)
+    return role == UserRole.CITIZEN.value and user.is_active is not False
+
+
+def track_leaderboard_change(db: AsyncSession, user: User):
+    """Update the leaderboard for ``user`` once the session commits"""
+    if not ranked(user):
+        # The id of a new user is only known once it is flushed
+        on_commit(db, lambda: leaderboard.discard(user.id))
+        return
+    points = user.points or 0
+    on_commit(db, lambda: leaderboard.update(user.id, points))
+
+
+async def load_leaderboard(db: AsyncSession):
+    """Rebuild the leaderboard from the users table"""
+    stmt = select(User.id, User.points).where(
+        User.role == UserRole.CITIZEN,
+        # Same rule as ranked(): only an explicit False is inactive
+        User.is_active.isnot(False)
+    )
+    rows = (await db.execute(stmt)).all()
+    leaderboard.replace((user_id, points or 0) for user_id, points in rows)
+    logger.info("Leaderboard loaded: %d citizens", len(rows))
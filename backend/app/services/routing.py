@@ -0,0 +1,259 @@
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from itertools import groupby
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import threading
+import time
+
+import numpy as np
+
+from app.services.geo import EARTH_RADIUS_M
+
+# Time allowed for improving a route after the greedy construction
+ROUTE_TIME_BUDGET_S = 0.03
+
+# Longest run of consecutive stops Or-opt moves elsewhere in the route
+OR_OPT_SEGMENT = 3
+
+# Workers whose last route is kept
+MAX_CACHED_ROUTES = 4096
+
+# Start points closer than this (about 10 m) share a cached route
+START_PRECISION = 4
+
+
+class Stop(NamedTuple):
+    """A task to visit"""
+    id: str
+    latitude: float
+    longitude: float
+    due_date: datetime
+
+
+class Route(NamedTuple):
+    # Indexes into the stops as given, in visiting order
+    order: List[int]
+    # Meters from the previous stop, or from the start for the first one
+    legs: List[float]
+
+
+def _day(due_date: datetime, today: date) -> date:
+    """Calendar day a stop is due on; overdue stops are due today"""
+    if due_date.tzinfo is None:
+        # SQLite hands back naive UTC timestamps
+        due_date = due_date.replace(tzinfo=timezone.utc)
+    return max(due_date.astimezone(timezone.utc).date(), today)
+
+
+def distance_matrix_m(latitude: np.ndarray, longitude: np.ndarray) -> List[List[float]]:
+    """Haversine distances between every pair of points, in meters.
+
+    Returned as nested lists, which the improvement loops index far
+    faster than an array.
+    """
+    phi = np.radians(latitude)
+    lam = np.radians(longitude)
+    a = (np.sin((phi[np.newaxis, :] - phi[:, np.newaxis]) / 2) ** 2 +
+         np.cos(phi)[:, np.newaxis] * np.cos(phi)[np.newaxis, :] *
+         np.sin((lam[np.newaxis, :] - lam[:, np.newaxis]) / 2) ** 2)
+    return (2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).tolist()
+
+
+def nearest_neighbour(dist: List[List[float]], first: int,
+                      candidates: Sequence[int]) -> List[int]:
+    """Path from ``first`` that always moves to the closest unvisited point"""
+    path = [first]
+    remaining = set(candidates)
+    remaining.discard(first)
+    while remaining:
+        row = dist[path[-1]]
+        nearest = min(remaining, key=row.__getitem__)
+        path.append(nearest)
+        remaining.remove(nearest)
+    return path
+
+
+def two_opt(dist: List[List[float]], path: List[int], deadline: float) -> bool:
+    """Reverse segments of an open path while that shortens it.
+
+    ``path[0]`` stays first. Returns False if the deadline cut it short.
+    """
+    n = len(path)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 1):
+            if time.perf_counter() > deadline:
+                return False
+            a, b = path[i - 1], path[i]
+            d_ab = dist[a][b]
+            row_a, row_b = dist[a], dist[b]
+            for j in range(i + 1, n):
+                c = path[j]
+                if j + 1 < n:
+                    d = path[j + 1]
+                    delta = row_a[c] + row_b[d] - d_ab - dist[c][d]
+                else:
+                    # Reversing the tail of an open path has no closing edge
+                    delta = row_a[c] - d_ab
+                if delta < -1e-6:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    improved = True
+                    a, b = path[i - 1], path[i]
+                    d_ab = dist[a][b]
+                    row_a, row_b = dist[a], dist[b]
+    return True
+
+
+def or_opt(dist: List[List[float]], path: List[int], deadline: float) -> bool:
+    """Move runs of up to OR_OPT_SEGMENT stops, either way round, while
+    that shortens the path.
+
+    ``path[0]`` stays first. Returns False if the deadline cut it short.
+    """
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, OR_OPT_SEGMENT + 1):
+            i = 1
+            while i + length <= len(path):
+                if time.perf_counter() > deadline:
+                    return False
+                n = len(path)
+                first, last = path[i], path[i + length - 1]
+                prev = path[i - 1]
+                nxt = path[i + length] if i + length < n else None
+                # Length saved by cutting the run out and closing the gap
+                removed = dist[prev][first]
+                if nxt is not None:
+                    removed += dist[last][nxt] - dist[prev][nxt]
+
+                best, best_at, best_reversed = -1e-6, None, False
+                for k in range(n):
+                    if i - 1 <= k < i + length:
+                        continue
+                    p = path[k]
+                    q = path[k + 1] if k + 1 < n else None
+                    base = dist[p][q] if q is not None else 0.0
+                    forward = dist[p][first] - base
+                    backward = dist[p][last] - base
+                    if q is not None:
+                        forward += dist[last][q]
+                        backward += dist[first][q]
+                    for added, flipped in ((forward, False), (backward, True)):
+                        if added - removed < best:
+                            best, best_at, best_reversed = added - removed, k, flipped
+
+                if best_at is None:
+                    i += 1
+                    continue
+                segment = path[i:i + length]
+                if best_reversed:
+                    segment.reverse()
+                del path[i:i + length]
+                at = best_at if best_at < i else best_at - length
+                path[at + 1:at + 1] = segment
+                improved = True
+    return True
+
+
+def plan_route(
+    stops: Sequence[Stop],
+    start: Optional[Tuple[float, float]] = None,
+    budget: float = ROUTE_TIME_BUDGET_S
+) -> Route:
+    """Visiting order for ``stops`` from ``start``.
+
+    Stops are visited a due day at a time, overdue ones first, so no stop
+    waits behind one due later. Each day's leg is built nearest-neighbour
+    from where the previous leg ended, then shortened with 2-opt and
+    Or-opt until nothing improves or ``budget`` seconds have passed.
+    Without a start the route begins at the earliest-due stop.
+    """
+    if not stops:
+        return Route([], [])
+
+    today = datetime.now(timezone.utc).date()
+    points = list(stops)
+    latitude = [stop.latitude for stop in points]
+    longitude = [stop.longitude for stop in points]
+    if start is not None:
+        latitude.append(start[0])
+        longitude.append(start[1])
+    dist = distance_matrix_m(np.array(latitude), np.array(longitude))
+
+    by_due = sorted(range(len(points)), key=lambda i: (
+        _day(points[i].due_date, today), points[i].due_date))
+    deadline = time.perf_counter() + budget
+    order: List[int] = []
+    position = len(points) if start is not None else by_due[0]
+    for _, day in groupby(by_due, key=lambda i: _day(points[i].due_date, today)):
+        path = nearest_neighbour(dist, position, list(day) + [position])
+        if two_opt(dist, path, deadline):
+            or_opt(dist, path, deadline)
+        if position < len(points) and not order:
+            order.append(position)
+        order.extend(path[1:])
+        position = path[-1]
+
+    legs = []
+    previous = len(points) if start is not None else order[0]
+    for i in order:
+        legs.append(dist[previous][i])
+        previous = i
+    return Route(order, legs)
+
+
+class RouteCache:
+    """Bounded LRU of each worker's last route.
+
+    An entry is reused only while the worker's open tasks, their
+    positions and due dates, and the start point are all unchanged.
+    """
+
+    def __init__(self, max_routes: int = MAX_CACHED_ROUTES):
+        self.max_routes = max_routes
+        self._routes: "OrderedDict[str, Tuple[tuple, Route]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def signature(stops: Sequence[Stop], start: Optional[Tuple[float, float]]) -> tuple:
+        if start is not None:
+            start = (round(start[0], START_PRECISION), round(start[1], START_PRECISION))
+        return start, tuple(stops)
+
+    def get(self, worker_id: str, signature: tuple) -> Optional[Route]:
+        with self._lock:
+            entry = self._routes.get(worker_id)
+            if entry is None or entry[0] != signature:
+                return None
+            self._routes.move_to_end(worker_id)
+            return entry[1]
+
+    def put(self, worker_id: str, signature: tuple, route: Route):
+        with self._lock:
+            self._routes[worker_id] = (signature, route)
+            self._routes.move_to_end(worker_id)
+            while len(self._routes) > self.max_routes:
+                self._routes.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_cache = RouteCache()
+
+
+def worker_route(
+    worker_id: str,
+    stops: Sequence[Stop],
+    start: Optional[Tuple[float, float]] = None
+) -> Route:
+    """The worker's cached route, planned again if their tasks changed"""
+    signature = route_cache.signature(stops, start)
+    route = route_cache.get(worker_id, signature)
+    if route is None:
+        route = plan_route(stops, start)
+        route_cache.put(worker_id, signature, route)
+    return route
@@ -0,0 +1,32 @@
+from typing import Optional
+import re
+
+# Most words of a query that reach the index
+MAX_QUERY_TERMS = 8
+
+# Words that say little about an issue; dropped unless nothing else is left
+STOP_WORDS = frozenset({
+    "a", "an", "and", "at", "by", "for", "from", "in", "is", "near", "of",
+    "on", "or", "the", "to", "with",
+})
+
+_WORD = re.compile(r"\w+")
+
+
+def match_expression(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 MATCH expression.
+
+    Every word must appear, so the match set stays small enough to rank
+    quickly; the last word also matches as a prefix, for search-as-you-type.
+    Words are quoted, so FTS5 operators in the input are taken literally.
+    Returns None when the text has no words.
+    """
+    words = _WORD.findall(text.lower())
+    terms = [word for word in words if word not in STOP_WORDS] or words
+    if not terms:
+        return None
+
+    terms = terms[:MAX_QUERY_TERMS]
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
@@ -0,0 +1,148 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import Optional
+import asyncio
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.models import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# Expired sessions deleted per sweeper transaction
+SWEEP_BATCH_SIZE = 1000
+
+
+def token_key(token: str) -> bytes:
+    """Primary key of a refresh token: the first 16 bytes of its SHA-256"""
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+
+async def store_session(
+    db: AsyncSession,
+    user_id: str,
+    token: str,
+    expires_at: datetime,
+    max_sessions: int = settings.AUTH_MAX_SESSIONS_PER_USER
+):
+    """Record a new refresh token, evicting the user's oldest sessions.
+
+    At most ``max_sessions`` sessions are kept per user; the oldest by last
+    issue are deleted first. The caller commits.
+    """
+    oldest = (
+        select(RefreshToken.token_hash)
+        .where(RefreshToken.user_id == user_id)
+        .order_by(RefreshToken.created_at.desc())
+        .offset(max(max_sessions - 1, 0))
+    )
+    await db.execute(
+        delete(RefreshToken).where(RefreshToken.token_hash.in_(oldest)))
+
+    db.add(RefreshToken(
+        token_hash=token_key(token),
+        user_id=user_id,
+        expires_at=expires_at,
+        created_at=datetime.now(timezone.utc)
+    ))
+
+
+async def rotate_session(
+    db: AsyncSession,
+    user_id: str,
+    old_token: str,
+    new_token: str,
+    expires_at: datetime
+) -> bool:
+    """Replace a live refresh token with its successor.
+
+    A single conditional UPDATE, so of two concurrent refreshes with the
+    same token only one succeeds. Returns False when the old token is
+    unknown, expired or belongs to another user. The caller commits.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.token_hash == token_key(old_token),
+            RefreshToken.user_id == user_id,
+            RefreshToken.expires_at > now
+        )
+        .values(token_hash=token_key(new_token), expires_at=expires_at,
+                created_at=now)
+    )
+    return result.rowcount == 1
+
+
+async def revoke_session(db: AsyncSession, token: str) -> bool:
+    """Delete the session of a refresh token; the caller commits"""
+    result = await db.execute(
+        delete(RefreshToken).where(RefreshToken.token_hash == token_key(token)))
+    return result.rowcount > 0
+
+
+async def purge_expired_sessions(
+    session_maker: async_sessionmaker,
+    batch_size: int = SWEEP_BATCH_SIZE
+) -> int:
+    """Delete expired sessions in short transactions; returns rows deleted.
+
+    Each batch commits on its own so the writer connection is never held
+    for long, however many sessions have expired.
+    """
+    total = 0
+    while True:
+        now = datetime.now(timezone.utc)
+        expired = (
+            select(RefreshToken.token_hash)
+            .where(RefreshToken.expires_at <= now)
+            .limit(batch_size)
+        )
+        async with session_maker() as session:
+            result = await session.execute(
+                delete(RefreshToken).where(RefreshToken.token_hash.in_(expired)))
+            await session.commit()
+
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
+        # Let requests waiting on the writer go between batches
+        await asyncio.sleep(0)
+
+
+class SessionSweeper:
+    """Background task purging expired refresh tokens periodically"""
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        interval: float = settings.AUTH_SESSION_SWEEP_SECONDS
+    ):
+        self.session_maker = session_maker
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            try:
+                purged = await purge_expired_sessions(self.session_maker)
+                if purged:
+                    logger.info("Purged %d expired sessions", purged)
+            except Exception as e:
+                logger.error("Session sweep failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
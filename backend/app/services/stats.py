@@ -0,0 +1,149 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.models import Issue, Task, User, StatsCounter
+
+logger = logging.getLogger(__name__)
+
+# Counter rows an entity contributes to, as (scope, key, total)
+Counters = List[Tuple[str, str, float]]
+
+
+def _key(value, default: str) -> str:
+    value = getattr(value, "value", value)
+    return str(value) if value is not None else default
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands DATETIME columns back naive; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def issue_counters(issue: Issue) -> Counters:
+    """Snapshot the counters an issue contributes to before modifying it"""
+    status = _key(issue.status, "pending")
+    counters = [
+        ("issues.status", status, 0.0),
+        ("issues.category", _key(issue.category, "other"), 0.0),
+    ]
+    if status == "resolved" and issue.resolved_at and issue.reported_at:
+        seconds = (_utc(issue.resolved_at) - _utc(issue.reported_at)).total_seconds()
+        counters.append(("issues.resolution", "resolved", seconds))
+    return counters
+
+
+def task_counters(task: Task) -> Counters:
+    """Snapshot the counters a task contributes to before modifying it"""
+    return [
+        ("tasks.status", _key(task.status, "new"), 0.0),
+        ("tasks.priority", _key(task.priority, "medium"), 0.0),
+    ]
+
+
+def user_counters(user: User) -> Counters:
+    """Snapshot the counters a user contributes to before modifying it"""
+    counters = [("users.role", _key(user.role, "citizen"), 0.0)]
+    if user.is_active is not False:
+        counters.append(("users.active", "true", 0.0))
+    return counters
+
+
+async def record_stats_change(
+    db: AsyncSession,
+    before: Optional[Counters],
+    after: Optional[Counters]
+):
+    """Move an entity's contribution from ``before`` to ``after``.
+
+    ``before`` is None for a new entity. Runs in the caller's transaction,
+    so the counters commit or roll back together with the change itself.
+    """
+    deltas: Dict[Tuple[str, str], List[float]] = defaultdict(lambda: [0, 0.0])
+    for sign, counters in ((-1, before), (1, after)):
+        for scope, key, total in counters or ():
+            delta = deltas[(scope, key)]
+            delta[0] += sign
+            delta[1] += sign * total
+
+    rows = [
+        {"scope": scope, "key": key, "count": count, "total": total}
+        for (scope, key), (count, total) in deltas.items()
+        if count or total
+    ]
+    if not rows:
+        return
+
+    stmt = insert(StatsCounter)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StatsCounter.scope, StatsCounter.key],
+        set_={
+            "count": StatsCounter.count + stmt.excluded.count,
+            "total": StatsCounter.total + stmt.excluded.total,
+        }
+    )
+    await db.execute(stmt, rows)
+
+
+async def get_counters(
+    db: AsyncSession,
+    *scopes: str
+) -> Dict[str, Dict[str, Tuple[int, float]]]:
+    """Read the counters of ``scopes`` as {scope: {key: (count, total)}}"""
+    result = await db.execute(
+        select(StatsCounter.scope, StatsCounter.key,
+               StatsCounter.count, StatsCounter.total)
+        .where(StatsCounter.scope.in_(scopes))
+    )
+    counters: Dict[str, Dict[str, Tuple[int, float]]] = {
+        scope: {} for scope in scopes}
+    for scope, key, count, total in result:
+        if count:
+            counters[scope][key] = (count, total)
+    return counters
+
+
+# Recomputes every counter from the base tables. Enum columns hold member
+# names, which lower-case to the values used as counter keys.
+REBUILD_SQL = """
+    INSERT INTO stats_counters (scope, key, count, total)
+    SELECT 'issues.status', lower(coalesce(status, 'PENDING')), count(*), 0
+    FROM issues GROUP BY 2
+    UNION ALL
+    SELECT 'issues.category', lower(category), count(*), 0
+    FROM issues GROUP BY 2
+    UNION ALL
+    SELECT 'issues.resolution', 'resolved', count(*),
+           sum((julianday(resolved_at) - julianday(reported_at)) * 86400.0)
+    FROM issues
+    WHERE status = 'RESOLVED' AND resolved_at IS NOT NULL
+      AND reported_at IS NOT NULL
+    HAVING count(*) > 0
+    UNION ALL
+    SELECT 'tasks.status', lower(coalesce(status, 'NEW')), count(*), 0
+    FROM tasks GROUP BY 2
+    UNION ALL
+    SELECT 'tasks.priority', lower(coalesce(priority, 'MEDIUM')), count(*), 0
+    FROM tasks GROUP BY 2
+    UNION ALL
+    SELECT 'users.role', lower(role), count(*), 0
+    FROM users GROUP BY 2
+    UNION ALL
+    SELECT 'users.active', 'true', count(*), 0
+    FROM users WHERE is_active IS NOT 0
+    HAVING count(*) > 0
+"""
+
+
+async def rebuild_stats(db: AsyncSession) -> int:
+    """Recompute all counters from the base tables; returns rows written"""
+    await db.execute(text("DELETE FROM stats_counters"))
+    result = await db.execute(text(REBUILD_SQL))
+    await db.commit()
+
+    logger.info("Stats counters rebuilt: %d rows", result.rowcount)
+    return result.rowcount
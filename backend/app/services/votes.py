@@ -0,0 +1,86 @@
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
+import logging
+import uuid
+
+from app.models import Issue, Vote
+from app.services.awards import UPVOTE_RECEIVED, VOTE_CAST, emit_award
+from app.services.events import publish_issue_votes
+
+logger = logging.getLogger(__name__)
+
+
+async def cast_vote(
+    db: AsyncSession, issue_id: str, user_id: str, is_upvote: bool
+) -> Optional[Tuple[int, int]]:
+    """Record or change a user's vote and return the issue's new counts.
+
+    The vote is a single upsert on (issue_id, user_id); triggers on the
+    votes table adjust ``issues.upvotes``/``downvotes`` in the same
+    transaction. Returns None when the issue does not exist. The caller
+    commits or rolls back.
+
+    A user's first vote on an issue earns them points, and a first upvote
+    earns the reporter points; changing a vote earns nothing.
+    """
+    vote_id = str(uuid.uuid4())
+    stmt = insert(Vote).values(
+        id=vote_id,
+        issue_id=issue_id,
+        user_id=user_id,
+        is_upvote=is_upvote
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vote.issue_id, Vote.user_id],
+        set_={"is_upvote": stmt.excluded.is_upvote},
+        where=Vote.is_upvote.is_distinct_from(stmt.excluded.is_upvote)
+    ).returning(Vote.id)
+    # An update keeps the existing id, so only a new vote returns ours
+    inserted = (await db.execute(stmt)).scalar_one_or_none() == vote_id
+
+    result = await db.execute(
+        select(Issue.upvotes, Issue.downvotes, Issue.reporter_id)
+        .where(Issue.id == issue_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    publish_issue_votes(db, issue_id, row.reporter_id, row.upvotes,
+                        row.downvotes)
+    if inserted:
+        emit_award(db, user_id, VOTE_CAST)
+        if is_upvote and row.reporter_id != user_id:
+            emit_award(db, row.reporter_id, UPVOTE_RECEIVED)
+    return row.upvotes, row.downvotes
+
+
+# Recompute every issue's counters from the votes table in two statements
+RECONCILE_COUNTED = text("""
+    UPDATE issues SET upvotes = v.up, downvotes = v.down
+    FROM (
+        SELECT issue_id, sum(is_upvote = 1) AS up, sum(is_upvote = 0) AS down
+        FROM votes GROUP BY issue_id
+    ) AS v
+    WHERE v.issue_id = issues.id
+      AND (issues.upvotes != v.up OR issues.downvotes != v.down)
+""")
+
+RECONCILE_UNVOTED = text("""
+    UPDATE issues SET upvotes = 0, downvotes = 0
+    WHERE (upvotes != 0 OR downvotes != 0)
+      AND NOT EXISTS (SELECT 1 FROM votes WHERE votes.issue_id = issues.id)
+""")
+
+
+async def reconcile_vote_counters(db: AsyncSession) -> int:
+    """Repair drifted vote counters and return how many issues changed"""
+    counted = await db.execute(RECONCILE_COUNTED)
+    unvoted = await db.execute(RECONCILE_UNVOTED)
+    await db.commit()
+
+    fixed = counted.rowcount + unvoted.rowcount
+    logger.info("Vote counters reconciled: %d issues corrected", fixed)
+    return fixed
@@ -0,0 +1,155 @@
+"""List serialization benchmark.
+
+Compares the ORM path list endpoints used to take (hydrate Issue instances,
+``IssueResponse.from_orm`` per row, FastAPI's generic JSON encoder) with the
+Core-row path they take now (select only the response columns, validate and
+encode the page with a cached TypeAdapter). Both paths read the same rows
+from a scratch SQLite database and must produce the same JSON. Reports rows
+per second and peak Python memory for each page size.
+
+Usage:
+    python bench_list_serialization.py [--sizes 100 10000] [--repeat 5] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import desc, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database import create_engines, run_migrations
+from app.core.serialization import encode_list
+from app.models import Issue, User
+from app.schemas.issue import IssueResponse
+from app.api.v1.endpoints.issues import ISSUE_LIST_COLUMNS
+
+REPORTER_ID = "bench-reporter"
+CATEGORIES = ["pothole", "streetlight", "garbage", "waterlogging", "other"]
+
+
+async def seed(session_maker, count):
+    """Insert ``count`` issues with a few images each"""
+    now = datetime.now(timezone.utc)
+    async with session_maker() as session:
+        session.add(User(id=REPORTER_ID, email="bench@example.com",
+                         password="-", name="Bench Reporter"))
+        await session.flush()
+        await session.execute(insert(Issue), [
+            {
+                "id": str(uuid.uuid4()),
+                "title": f"Benchmark issue {i}",
+                "description": "Generated for the list serialization benchmark.",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "urgency": i % 5 + 1,
+                "latitude": 37.7 + i * 1e-5,
+                "longitude": -122.4 - i * 1e-5,
+                "address": f"{i} Benchmark Street",
+                "images": json.dumps([f"/uploads/{i}-{n}.jpg" for n in range(3)]),
+                "tracking_id": f"TRK-BENCH-{i}",
+                "reporter_id": REPORTER_ID,
+                "reported_at": now - timedelta(seconds=i),
+            }
+            for i in range(count)
+        ])
+        await session.commit()
+
+
+async def orm_path(session, size):
+    """The previous list path: ORM instances, from_orm, jsonable_encoder"""
+    result = await session.execute(
+        select(Issue).order_by(desc(Issue.reported_at)).limit(size))
+    content = jsonable_encoder(
+        [IssueResponse.from_orm(issue) for issue in result.scalars()])
+    # What FastAPI's JSONResponse.render does with the encoded content
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+async def core_path(session, size):
+    """The current list path: Core rows encoded by a cached TypeAdapter"""
+    result = await session.execute(
+        select(*ISSUE_LIST_COLUMNS).order_by(desc(Issue.reported_at)).limit(size))
+    return encode_list(IssueResponse, [row._mapping for row in result])
+
+
+async def measure(session_maker, path, size, repeat):
+    """Best rows/second over ``repeat`` runs and peak traced memory"""
+    best = None
+    for _ in range(repeat):
+        async with session_maker() as session:
+            start = time.perf_counter()
+            body = await path(session, size)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    async with session_maker() as session:
+        tracemalloc.start()
+        await path(session, size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"rows_per_second": round(size / best), "seconds": round(best, 5),
+            "peak_memory_kib": round(peak / 1024, 1)}, body
+
+
+async def run_benchmark(db_path, sizes, repeat):
+    engine, read_engine = create_engines(f"sqlite:///{db_path}")
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False)
+    read_session_maker = async_sessionmaker(
+        read_engine, class_=AsyncSession, expire_on_commit=False)
+    await run_migrations(engine)
+    await seed(session_maker, max(sizes))
+
+    results = []
+    for size in sizes:
+        orm, orm_body = await measure(read_session_maker, orm_path, size, repeat)
+        core, core_body = await measure(read_session_maker, core_path, size, repeat)
+        if json.loads(orm_body) != json.loads(core_body):
+            raise SystemExit(f"Paths disagree for {size} rows")
+        results.append({"rows": size, "orm": orm, "core": core,
+                        "speedup": round(orm["seconds"] / core["seconds"], 2)})
+
+    await engine.dispose()
+    await read_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10000],
+                        help="rows per response to benchmark")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per path and size; the best counts")
+    parser.add_argument("--json", action="store_true",
+                        help="print the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = asyncio.run(run_benchmark(
+            os.path.join(tmp, "bench.db"), args.sizes, args.repeat))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{'rows':>7} {'path':>5} {'rows/s':>10} {'peak KiB':>10}")
+    for result in results:
+        for path in ("orm", "core"):
+            stats = result[path]
+            print(f"{result['rows']:>7} {path:>5} "
+                  f"{stats['rows_per_second']:>10} {stats['peak_memory_kib']:>10}")
+        print(f"{'':>7} speedup {result['speedup']}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Query-plan regression check.
+
+Drives every API endpoint against a scratch SQLite database built from the
+Alembic migrations, captures each SQL statement the endpoint issues and runs
+``EXPLAIN QUERY PLAN`` on it. Exits with status 1 when any statement falls
+back to a full table scan, so a missing or unused index fails CI.
+
+Usage:
+    python check_query_plans.py [-v]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database import (
+    Base, create_engines, get_db, get_read_db, run_migrations
+)
+from app.models import User, Issue, Task, Comment, Vote
+from app.auth.security import get_password_hash
+from app.services.leaderboard import load_leaderboard
+from app.services.awards import award_pipeline
+
+logger = logging.getLogger(__name__)
+
+API = "/api/v1"
+PASSWORD = "check123"
+
+# Statements that are allowed to scan a whole table, keyed by endpoint label.
+# Every entry needs a reason; prefer fixing the index over adding one here.
+ALLOWED_SCANS = {}
+
+# "SCAN <table>" with nothing after it is a full table scan; index scans
+# read "SCAN <table> USING [COVERING] INDEX ..."
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# Fixture rows shared by the endpoint calls below
+USERS = {
+    "admin": "plan-admin",
+    "staff": "plan-staff",
+    "fieldworker": "plan-fieldworker",
+    "citizen": "plan-citizen",
+}
+OTHER_CITIZEN_ID = "plan-citizen-2"
+ISSUE_ID = "plan-issue-1"
+ASSIGNED_ISSUE_ID = "plan-issue-2"
+TASK_ID = "plan-task-1"
+
+ISSUE_PAYLOAD = {
+    "title": "Pothole near the school",
+    "description": "Deep pothole on the school approach road.",
+    "category": "pothole",
+    "urgency": 3,
+    "latitude": 37.7749,
+    "longitude": -122.4194,
+    "address": "1 School Road",
+}
+
+
+def endpoint_calls():
+    """(label, method, path, role, request kwargs, follow next cursor)"""
+    due = (datetime.now(timezone.utc) + timedelta(days=3)).isoformat()
+    return [
+        # Users
+        ("GET /users/me", "GET", "/users/me", "citizen", {}, False),
+        ("PUT /users/me", "PUT", "/users/me", "citizen",
+         {"json": {"phone": "555-0100"}}, False),
+        ("GET /users", "GET", "/users/", "staff",
+         {"params": {"limit": 1}}, True),
+        ("GET /users?role", "GET", "/users/", "admin",
+         {"params": {"limit": 1, "role": "citizen"}}, True),
+        ("GET /users/stats", "GET", "/users/stats", "admin", {}, False),
+        ("GET /users/leaderboard", "GET", "/users/leaderboard", "citizen",
+         {"params": {"around_me": True}}, False),
+        ("GET /users/leaderboard/me", "GET", "/users/leaderboard/me",
+         "citizen", {}, False),
+        ("GET /users/{id}", "GET", f"/users/{USERS['citizen']}", "staff",
+         {}, False),
+        ("PUT /users/{id}", "PUT", f"/users/{USERS['citizen']}", "admin",
+         {"json": {"name": "Plan Citizen"}}, False),
+
+        # Issues
+        ("POST /issues", "POST", "/issues/", "citizen",
+         {"json": ISSUE_PAYLOAD}, False),
+        ("POST /issues/bulk", "POST", "/issues/bulk", "staff",
+         {"content": (json.dumps(ISSUE_PAYLOAD) + "\n") * 2}, False),
+        ("GET /issues (citizen)", "GET", "/issues/", "citizen",
+         {"params": {"limit": 1}}, True),
+        ("GET /issues (staff)", "GET", "/issues/", "staff",
+         {"params": {"limit": 1}}, True),
+        ("GET /issues?status", "GET", "/issues/", "staff",
+         {"params": {"limit": 1, "status": "pending"}}, True),
+        ("GET /issues?category", "GET", "/issues/", "staff",
+         {"params": {"limit": 1, "category": "pothole"}}, True),
+        ("GET /issues?assigned_to_me", "GET", "/issues/", "fieldworker",
+         {"params": {"limit": 1, "assigned_to_me": True}}, True),
+        ("GET /issues?reported_by_me", "GET", "/issues/", "staff",
+         {"params": {"limit": 1, "reported_by_me": True}}, True),
+        ("GET /issues/nearby", "GET", "/issues/nearby", "staff",
+         {"params": {"lat": 37.7749, "lng": -122.4194, "radius": 500}},
+         False),
+        ("GET /issues/bbox", "GET", "/issues/bbox", "citizen",
+         {"params": {"min_lat": 37.7, "min_lng": -122.5, "max_lat": 37.8,
+                     "max_lng": -122.4, "category": "pothole"}}, False),
+        ("GET /issues/search", "GET", "/issues/search", "staff",
+         {"params": {"q": "pothole school", "limit": 1}}, True),
+        ("GET /issues/search?status", "GET", "/issues/search", "citizen",
+         {"params": {"q": "pothole", "status": "pending", "limit": 1}}, True),
+        ("GET /issues/clusters", "GET", "/issues/clusters", "citizen",
+         {"params": {"min_lat": 37.7, "min_lng": -122.5, "max_lat": 37.8,
+                     "max_lng": -122.4, "zoom": 12}}, False),
+        ("GET /issues/{id}", "GET", f"/issues/{ISSUE_ID}", "citizen",
+         {}, False),
+        ("PUT /issues/{id}", "PUT", f"/issues/{ISSUE_ID}", "staff",
+         {"json": {"urgency": 4}}, False),
+        ("POST /issues/{id}/comments", "POST", f"/issues/{ISSUE_ID}/comments",
+         "citizen", {"json": {"text": "Still there"}}, False),
+        ("GET /issues/{id}/comments", "GET", f"/issues/{ISSUE_ID}/comments",
+         "citizen", {"params": {"limit": 1}}, True),
+        ("POST /issues/{id}/vote", "POST", f"/issues/{ISSUE_ID}/vote",
+         "citizen", {"json": {"is_upvote": True}}, False),
+        ("GET /issues/stats/overview", "GET", "/issues/stats/overview",
+         "staff", {}, False),
+
+        # Tasks
+        ("POST /tasks", "POST", "/tasks/", "staff",
+         {"json": {
+             "title": "Fix the pothole", "description": "Patch and seal it.",
+             "latitude": 37.7749, "longitude": -122.4194,
+             "address": "1 School Road", "category": "pothole",
+             "due_date": due, "issue_id": ISSUE_ID,
+             "assignee_id": USERS["fieldworker"]}}, False),
+        ("POST /tasks/auto-assign", "POST", "/tasks/auto-assign", "staff",
+         {"json": {"dry_run": True}}, False),
+        ("GET /tasks (fieldworker)", "GET", "/tasks/", "fieldworker",
+         {"params": {"limit": 1}}, True),
+        ("GET /tasks (staff)", "GET", "/tasks/", "staff",
+         {"params": {"limit": 1}}, True),
+        ("GET /tasks?status", "GET", "/tasks/", "staff",
+         {"params": {"limit": 1, "status": "new"}}, True),
+        ("GET /tasks/route", "GET", "/tasks/route", "fieldworker",
+         {"params": {"lat": 37.77, "lng": -122.42}}, False),
+        ("GET /tasks/{id}", "GET", f"/tasks/{TASK_ID}", "fieldworker",
+         {}, False),
+        ("PUT /tasks/{id}", "PUT", f"/tasks/{TASK_ID}", "fieldworker",
+         {"json": {"status": "in_progress"}}, False),
+        ("POST /tasks/{id}/assign", "POST", f"/tasks/{TASK_ID}/assign",
+         "staff", {"json": {"assignee_id": USERS["fieldworker"],
+                            "due_date": due}}, False),
+        ("GET /tasks/stats/overview", "GET", "/tasks/stats/overview",
+         "staff", {}, False),
+
+        ("GET /exports/issues", "GET", "/exports/issues", "admin",
+         {"params": {"format": "csv"}}, False),
+        ("GET /exports/issues?status", "GET", "/exports/issues", "admin",
+         {"params": {"format": "ndjson", "status": "pending"}}, False),
+        ("GET /exports/tasks", "GET", "/exports/tasks", "admin",
+         {"params": {"priority": "high"}}, False),
+        ("GET /exports/comments", "GET", "/exports/comments", "admin",
+         {}, False),
+        ("GET /exports/comments?issue_id", "GET", "/exports/comments",
+         "admin", {"params": {"issue_id": ISSUE_ID}}, False),
+
+        # Session endpoints last, they change fixture state
+        ("POST /auth/register", "POST", "/auth/register", None,
+         {"json": {"email": "plan-new@example.com", "name": "New Citizen",
+                   "password": PASSWORD}}, False),
+        ("POST /auth/change-password", "POST", "/auth/change-password",
+         "staff", {"json": {"current_password": PASSWORD,
+                            "new_password": PASSWORD}}, False),
+        ("DELETE /users/{id}", "DELETE", f"/users/{USERS['citizen']}",
+         "admin", {}, False),
+    ]
+
+
+async def seed(session_maker):
+    """Insert one row of every kind the endpoint calls refer to"""
+    password = get_password_hash(PASSWORD)
+    async with session_maker() as session:
+        for role, user_id in [*USERS.items(), ("citizen", OTHER_CITIZEN_ID)]:
+            session.add(User(id=user_id, email=f"{user_id}@example.com",
+                             password=password, name=user_id, role=role))
+        session.add_all([
+            Issue(id=ISSUE_ID, tracking_id="TRK-PLAN-1",
+                  reporter_id=USERS["citizen"], **ISSUE_PAYLOAD),
+            Issue(id=ASSIGNED_ISSUE_ID, tracking_id="TRK-PLAN-2",
+                  reporter_id=USERS["citizen"], status="assigned",
+                  assignee_id=USERS["fieldworker"], **ISSUE_PAYLOAD),
+            Issue(id="plan-issue-3", tracking_id="TRK-PLAN-3",
+                  reporter_id=USERS["staff"], status="assigned",
+                  assignee_id=USERS["fieldworker"], **ISSUE_PAYLOAD),
+            Issue(id="plan-issue-4", tracking_id="TRK-PLAN-4",
+                  reporter_id=USERS["staff"], **ISSUE_PAYLOAD),
+        ])
+        await session.flush()
+        session.add_all([
+            Task(id=TASK_ID, title="Fix the pothole",
+                 description="Patch and seal it.", latitude=37.7749,
+                 longitude=-122.4194, address="1 School Road",
+                 category="pothole", images="[]",
+                 due_date=datetime.now(timezone.utc) + timedelta(days=1),
+                 issue_id=ASSIGNED_ISSUE_ID,
+                 assignee_id=USERS["fieldworker"]),
+            Comment(text="Seen it too", issue_id=ISSUE_ID,
+                    author_id=USERS["staff"]),
+            Comment(text="Me as well", issue_id=ISSUE_ID,
+                    author_id=USERS["admin"]),
+            Vote(issue_id=ISSUE_ID, user_id=USERS["staff"], is_upvote=True),
+        ])
+        await session.commit()
+
+
+def explain(db_path, captured):
+    """Return (plan, full scans) for every captured statement"""
+    conn = sqlite3.connect(db_path)
+    try:
+        results = []
+        for label, statement, parameters in captured:
+            plan = [row[3] for row in conn.execute(
+                f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            scans = set()
+            for detail in plan:
+                match = FULL_SCAN.match(detail)
+                if match and match.group(1) in Base.metadata.tables:
+                    scans.add(match.group(1))
+            scans -= ALLOWED_SCANS.get(label, set())
+            results.append((label, statement, plan, scans))
+        return results
+    finally:
+        conn.close()
+
+
+async def run_check(db_path):
+    engine, read_engine = create_engines(f"sqlite:///{db_path}")
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False)
+    read_session_maker = async_sessionmaker(
+        read_engine, class_=AsyncSession, expire_on_commit=False)
+    await run_migrations(engine)
+    await seed(session_maker)
+
+    current = {"label": None}
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        keyword = statement.lstrip().split(None, 1)[0].upper()
+        if current["label"] and not executemany and keyword in (
+                "SELECT", "UPDATE", "DELETE", "INSERT", "WITH"):
+            captured.append((current["label"], statement, parameters))
+
+    for target in {engine, read_engine}:
+        event.listen(target.sync_engine, "before_cursor_execute", capture)
+
+    # In-memory indexes the server loads at startup
+    current["label"] = "load_leaderboard"
+    async with session_maker() as session:
+        await load_leaderboard(session)
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    async def override_get_read_db():
+        async with read_session_maker() as session:
+            yield session
+
+    from main import app
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+
+    errors = []
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://check") as client:
+        headers = {}
+        for role, user_id in USERS.items():
+            current["label"] = "POST /auth/login"
+            response = await client.post(f"{API}/auth/login", json={
+                "email": f"{user_id}@example.com", "password": PASSWORD})
+            response.raise_for_status()
+            body = response.json()
+            headers[role] = {"Authorization": f"Bearer {body['access_token']}"}
+            refresh = body["refresh_token"]
+
+        current["label"] = "POST /auth/refresh"
+        response = await client.post(f"{API}/auth/refresh",
+                                     json={"refresh_token": refresh})
+        current["label"] = "POST /auth/logout"
+        response = await client.post(f"{API}/auth/logout", json={
+            "refresh_token": response.json().get("refresh_token", refresh)})
+
+        for label, method, path, role, kwargs, follow in endpoint_calls():
+            current["label"] = label
+            response = await client.request(
+                method, API + path, headers=headers.get(role), **kwargs)
+            if response.status_code >= 400:
+                errors.append((label, response.status_code, response.text))
+
+            cursor = response.headers.get("X-Next-Cursor")
+            if follow and cursor:
+                current["label"] = f"{label} (next page)"
+                params = dict(kwargs.get("params", {}), cursor=cursor)
+                response = await client.request(
+                    method, API + path, headers=headers.get(role),
+                    params=params)
+                if response.status_code >= 400:
+                    errors.append((current["label"], response.status_code,
+                                   response.text))
+            elif follow:
+                errors.append((label, response.status_code,
+                               "expected a next page cursor"))
+
+        # Points and badges earned by the calls above, applied in the
+        # background by the server
+        current["label"] = "award pipeline"
+        award_pipeline.session_maker = session_maker
+        if not await award_pipeline.flush():
+            errors.append(("award pipeline", None, "no awards applied"))
+        current["label"] = None
+
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
+    await engine.dispose()
+    await read_engine.dispose()
+    return captured, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print the plan of every statement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "plans.db")
+        captured, errors = asyncio.run(run_check(db_path))
+        results = explain(db_path, captured)
+
+    failures = 0
+    for label, statement, plan, scans in results:
+        if scans:
+            failures += 1
+            print(f"FULL SCAN of {', '.join(sorted(scans))} in {label}")
+        if scans or args.verbose:
+            print(f"  {' '.join(statement.split())}")
+            for detail in plan:
+                print(f"    {detail}")
+
+    for label, status_code, detail in errors:
+        print(f"WARNING: {label} returned {status_code}: {detail[:200]}")
+
+    print(f"{len(results)} statements checked, {failures} full table scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
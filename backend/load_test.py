@@ -0,0 +1,418 @@
+"""API load test.
+
+Seeds a scratch SQLite database built from the Alembic migrations with
+citizens, fieldworkers, staff, issues and tasks, logs every user in through
+the API, then runs concurrent virtual users against ``main:app`` in
+process. Each virtual user picks requests from a weighted mix for its role:
+citizens report, list, read, vote and comment on issues, fieldworkers list
+and update their tasks, and staff read the stats endpoints. The request
+sequence is fixed by ``--seed``, so two builds run the same workload.
+
+Reports requests per second and p50/p95/p99 latency per endpoint. With
+``--baseline`` the run is compared with an earlier ``--output`` file and
+the exit status is 1 when an endpoint's p95 or throughput is more than
+``--budget`` percent worse, or when any request fails.
+
+Usage:
+    python load_test.py [--users 40] [--requests 4000] [--concurrency 32]
+                        [--seed 1] [--output results.json]
+                        [--baseline previous.json] [--budget 20]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.database import create_engines, get_db, get_read_db, run_migrations
+from app.models import User, Issue, Task
+from app.auth.security import get_password_hash
+from app.services.clusters import rebuild_clusters
+from app.services.stats import rebuild_stats
+
+API = "/api/v1"
+PASSWORD = "load123"
+CATEGORIES = ["pothole", "streetlight", "garbage", "waterlogging", "other"]
+CENTER = (37.7749, -122.4194)
+
+# Endpoints compared with the baseline need this many samples in both runs;
+# percentiles of a handful of requests are noise
+MIN_SAMPLES = 20
+
+# (endpoint label, weight) per role; labels name the route, not the path
+MIX = {
+    "citizen": [
+        ("POST /issues", 10),
+        ("GET /issues", 30),
+        ("GET /issues/{id}", 15),
+        ("POST /issues/{id}/vote", 15),
+        ("POST /issues/{id}/comments", 10),
+        ("GET /issues/{id}/comments", 10),
+    ],
+    "fieldworker": [
+        ("GET /tasks", 20),
+        ("PUT /tasks/{id}", 10),
+    ],
+    "staff": [
+        ("GET /issues/stats/overview", 10),
+        ("GET /tasks/stats/overview", 10),
+        ("GET /issues?status", 10),
+    ],
+}
+ROLE_SHARE = {"citizen": 0.8, "fieldworker": 0.15, "staff": 0.05}
+
+
+def virtual_roles(concurrency):
+    """Role of each virtual user: one per role, the rest by ROLE_SHARE.
+
+    Seats go one at a time to the role furthest below its share, so every
+    role's mix is exercised however few virtual users there are.
+    """
+    counts = {role: 1 for role in ROLE_SHARE}
+    for _ in range(concurrency - len(counts)):
+        role = max(ROLE_SHARE, key=lambda role:
+                   concurrency * ROLE_SHARE[role] - counts[role])
+        counts[role] += 1
+    return [role for role, count in counts.items() for _ in range(count)]
+
+
+def issue_payload(rng):
+    return {
+        "title": f"Load test issue {rng.randrange(10 ** 6)}",
+        "description": "Reported by the API load test.",
+        "category": rng.choice(CATEGORIES),
+        "urgency": rng.randint(1, 5),
+        "latitude": CENTER[0] + rng.uniform(-0.05, 0.05),
+        "longitude": CENTER[1] + rng.uniform(-0.05, 0.05),
+        "address": f"{rng.randint(1, 999)} Load Street",
+    }
+
+
+def request_for(label, rng, user, fixtures):
+    """(method, path, request kwargs) for one request of ``label``"""
+    issue_id = rng.choice(fixtures["issue_ids"])
+    # Citizens may only open and comment on issues they reported
+    own_issue_id = rng.choice(
+        fixtures["issues_by_reporter"].get(user["id"]) or [issue_id])
+    if label == "POST /issues":
+        return "POST", "/issues/", {"json": issue_payload(rng)}
+    if label == "GET /issues":
+        return "GET", "/issues/", {"params": {"limit": 20}}
+    if label == "GET /issues?status":
+        return "GET", "/issues/", {"params": {
+            "limit": 20, "status": rng.choice(["pending", "assigned"])}}
+    if label == "GET /issues/{id}":
+        return "GET", f"/issues/{own_issue_id}", {}
+    if label == "POST /issues/{id}/vote":
+        return "POST", f"/issues/{issue_id}/vote", {
+            "json": {"is_upvote": rng.random() < 0.8}}
+    if label == "POST /issues/{id}/comments":
+        return "POST", f"/issues/{own_issue_id}/comments", {
+            "json": {"text": "Seen this too, still not fixed."}}
+    if label == "GET /issues/{id}/comments":
+        return "GET", f"/issues/{own_issue_id}/comments", {
+            "params": {"limit": 20}}
+    if label == "GET /tasks":
+        return "GET", "/tasks/", {"params": {"limit": 20}}
+    if label == "PUT /tasks/{id}":
+        task_id = rng.choice(fixtures["tasks_by_assignee"][user["id"]])
+        return "PUT", f"/tasks/{task_id}", {"json": {
+            "status": rng.choice(["accepted", "in_progress"]),
+            "notes": "Updated by the load test."}}
+    if label == "GET /issues/stats/overview":
+        return "GET", "/issues/stats/overview", {}
+    if label == "GET /tasks/stats/overview":
+        return "GET", "/tasks/stats/overview", {}
+    raise ValueError(f"Unknown endpoint {label}")
+
+
+async def seed(session_maker, users, issues, rng):
+    """Insert users of every role, issues and one task per assigned issue"""
+    password = get_password_hash(PASSWORD)
+    now = datetime.now(timezone.utc)
+    fixtures = {"users": [], "issue_ids": [], "issues_by_reporter": {},
+                "tasks_by_assignee": {}}
+
+    counts = {role: max(1, round(users * share))
+              for role, share in ROLE_SHARE.items()}
+    user_rows = []
+    for role, count in counts.items():
+        for i in range(count):
+            user_id = f"load-{role}-{i}"
+            user_rows.append({
+                "id": user_id, "email": f"{user_id}@example.com",
+                "password": password, "name": f"Load {role} {i}",
+                "role": role.upper(), "is_active": True})
+            fixtures["users"].append({"id": user_id, "role": role})
+    citizens = [u["id"] for u in fixtures["users"] if u["role"] == "citizen"]
+    fieldworkers = [u["id"] for u in fixtures["users"]
+                    if u["role"] == "fieldworker"]
+
+    issue_rows, task_rows = [], []
+    for i in range(issues):
+        issue_id = str(uuid.uuid4())
+        payload = issue_payload(rng)
+        reporter = citizens[i % len(citizens)]
+        assignee = fieldworkers[i % len(fieldworkers)] if i % 3 == 0 else None
+        issue_rows.append({
+            **payload, "id": issue_id, "images": "[]",
+            "tracking_id": f"TRK-LOAD-{i}",
+            "reporter_id": reporter,
+            "status": "ASSIGNED" if assignee else "PENDING",
+            "assignee_id": assignee,
+            "reported_at": now - timedelta(minutes=i)})
+        fixtures["issue_ids"].append(issue_id)
+        fixtures["issues_by_reporter"].setdefault(reporter, []).append(issue_id)
+        if assignee:
+            task_rows.append({
+                "id": str(uuid.uuid4()), "title": f"Fix {payload['title']}",
+                "description": payload["description"],
+                "latitude": payload["latitude"],
+                "longitude": payload["longitude"],
+                "address": payload["address"],
+                "category": payload["category"], "images": "[]",
+                "status": "NEW", "priority": "MEDIUM",
+                "due_date": now + timedelta(days=rng.randint(1, 14)),
+                "issue_id": issue_id, "assignee_id": assignee})
+            fixtures["tasks_by_assignee"].setdefault(assignee, []).append(
+                task_rows[-1]["id"])
+
+    async with session_maker() as session:
+        await session.execute(insert(User), user_rows)
+        await session.execute(insert(Issue), issue_rows)
+        if task_rows:
+            await session.execute(insert(Task), task_rows)
+        await session.commit()
+        await rebuild_stats(session)
+        await rebuild_clusters(session)
+        await session.commit()
+    return fixtures
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    """Per-endpoint throughput and latency percentiles in milliseconds"""
+    endpoints = {}
+    for label in sorted(latencies):
+        ordered = sorted(latencies[label])
+        endpoints[label] = {
+            "requests": len(ordered),
+            "errors": errors.get(label, 0),
+            "rps": round(len(ordered) / elapsed, 1),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+    total = sum(len(values) for values in latencies.values())
+    return endpoints, {"requests": total, "errors": sum(errors.values()),
+                       "rps": round(total / elapsed, 1),
+                       "seconds": round(elapsed, 3)}
+
+
+async def run_load(db_path, args):
+    engine, read_engine = create_engines(f"sqlite:///{db_path}")
+    session_maker = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False)
+    read_session_maker = async_sessionmaker(
+        read_engine, class_=AsyncSession, expire_on_commit=False)
+    await run_migrations(engine)
+    fixtures = await seed(session_maker, args.users, args.issues,
+                          random.Random(args.seed))
+
+    async def override_get_db():
+        async with session_maker() as session:
+            yield session
+
+    async def override_get_read_db():
+        async with read_session_maker() as session:
+            yield session
+
+    from main import app
+    from app.auth.hashing import password_hasher
+    # Keep per-request log lines out of the report
+    logging.getLogger().setLevel(logging.WARNING)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    password_hasher.start()
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    failures = []
+
+    async def timed(client, label, method, path, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, API + path, **kwargs)
+        latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors[label] += 1
+            if len(failures) < 10:
+                failures.append((label, response.status_code,
+                                 response.text[:200]))
+        return response
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load",
+                                 timeout=None) as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login(user):
+            async with semaphore:
+                response = await timed(
+                    client, "POST /auth/login", "POST", "/auth/login",
+                    json={"email": f"{user['id']}@example.com",
+                          "password": PASSWORD})
+            response.raise_for_status()
+            user["headers"] = {
+                "Authorization": f"Bearer {response.json()['access_token']}"}
+
+        await asyncio.gather(*(login(user) for user in fixtures["users"]))
+        # Logins are measured but kept out of the mixed-traffic window
+        login_latencies = latencies.pop("POST /auth/login")
+
+        # Spread the requests over the virtual users; every virtual user is
+        # one signed-in user of its role with its own seeded generator
+        rng = random.Random(args.seed)
+        by_role = {role: [user for user in fixtures["users"]
+                          if user["role"] == role] for role in ROLE_SHARE}
+        users = [rng.choice(by_role[role])
+                 for role in virtual_roles(args.concurrency)]
+        shares = [args.requests // len(users)
+                  + (1 if i < args.requests % len(users) else 0)
+                  for i in range(len(users))]
+
+        async def virtual_user(index, user, count):
+            user_rng = random.Random(f"{args.seed}-{index}")
+            mix = [(label, weight) for label, weight in MIX[user["role"]]
+                   if label != "PUT /tasks/{id}"
+                   or user["id"] in fixtures["tasks_by_assignee"]]
+            labels, weights = zip(*mix)
+            for _ in range(count):
+                label = user_rng.choices(labels, weights)[0]
+                method, path, kwargs = request_for(
+                    label, user_rng, user, fixtures)
+                await timed(client, label, method, path,
+                            headers=user["headers"], **kwargs)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(i, user, count)
+                               for i, (user, count)
+                               in enumerate(zip(users, shares))))
+        elapsed = time.perf_counter() - started
+
+    password_hasher.shutdown()
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
+    await engine.dispose()
+    await read_engine.dispose()
+
+    endpoints, total = summarize(latencies, errors, elapsed)
+    login = sorted(login_latencies)
+    return {
+        "config": {"users": len(fixtures["users"]), "issues": args.issues,
+                   "requests": args.requests,
+                   "concurrency": args.concurrency, "seed": args.seed},
+        "environment": {"python": platform.python_version(),
+                        "machine": platform.machine(),
+                        "cpus": os.cpu_count()},
+        "login": {"requests": len(login),
+                  "p50_ms": round(percentile(login, 0.50) * 1000, 2),
+                  "p95_ms": round(percentile(login, 0.95) * 1000, 2)},
+        "total": total,
+        "endpoints": endpoints,
+    }, failures
+
+
+def compare(results, baseline, budget):
+    """Budget violations of ``results`` against ``baseline``"""
+    violations = []
+    limit = 1 + budget / 100
+    for label, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if (previous is None or current["requests"] < MIN_SAMPLES
+                or previous["requests"] < MIN_SAMPLES):
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * limit:
+            violations.append(
+                f"{label}: p95 {current['p95_ms']}ms, "
+                f"baseline {previous['p95_ms']}ms")
+        if current["rps"] * limit < previous["rps"]:
+            violations.append(
+                f"{label}: {current['rps']} req/s, "
+                f"baseline {previous['rps']} req/s")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=40,
+                        help="users to seed across the three roles")
+    parser.add_argument("--issues", type=int, default=2000,
+                        help="issues to seed; a third get a task")
+    parser.add_argument("--requests", type=int, default=4000,
+                        help="requests in the mixed-traffic phase")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="virtual users sending requests at once")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="seed for the data and the request sequence")
+    parser.add_argument("--output", help="write the results to this file")
+    parser.add_argument("--baseline",
+                        help="results of an earlier run to compare with")
+    parser.add_argument("--budget", type=float, default=20,
+                        help="allowed regression against the baseline, in %%")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results, failures = asyncio.run(
+            run_load(os.path.join(tmp, "load.db"), args))
+
+    print(f"{'endpoint':<30} {'reqs':>6} {'err':>4} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, stats in results["endpoints"].items():
+        print(f"{label:<30} {stats['requests']:>6} {stats['errors']:>4} "
+              f"{stats['rps']:>8} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8}")
+    total = results["total"]
+    print(f"{total['requests']} requests in {total['seconds']}s, "
+          f"{total['rps']} req/s, {total['errors']} errors; "
+          f"login p95 {results['login']['p95_ms']}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    for label, status_code, detail in failures:
+        print(f"FAILED: {label} returned {status_code}: {detail}")
+
+    violations = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            violations = compare(results, json.load(f), args.budget)
+        for violation in violations:
+            print(f"REGRESSION: {violation}")
+
+    return 1 if violations or total["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
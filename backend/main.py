@@ -1,15 +1,28 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import uvicorn
 import logging
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import run_migrations, async_session_maker, pool_status
+from app.auth.claims import load_revocations
+from app.auth.hashing import password_hasher
+from app.services.sessions import SessionSweeper
+from app.services.duplicates import duplicate_index, load_duplicate_index
+from app.services.leaderboard import leaderboard, load_leaderboard
+from app.services.awards import award_pipeline
+from app.services.events import event_broker
 from app.api.v1.api import api_router
-from app.core.logging import setup_logging
+from app.core.logging import (
+    setup_logging, RequestIdMiddleware, REQUEST_ID_HEADER, metrics as log_metrics
+)
+from app.core.metrics import (
+    CONTENT_TYPE, MetricsMiddleware, collect_dict, register_collector, render_metrics
+)
+from app.core.pagination import NEXT_CURSOR_HEADER
 
 # Setup logging
 setup_logging()
@@ -23,13 +36,36 @@ async def lifespan(app: FastAPI):
     logger = logging.getLogger(__name__)
     logger.info("Starting Citizen Engagement Backend")
 
-    # Create database tables
-    await create_tables()
+    # Bring the database schema up to date
+    await run_migrations()
+
+    # Tokens are trusted without a user lookup, so load who is revoked
+    async with async_session_maker() as session:
+        await load_revocations(session)
+        # New reports are checked against open issues held in memory
+        await load_duplicate_index(session)
+        # Ranks are answered from an in-memory index of citizens' points
+        await load_leaderboard(session)
+        # Awards committed but not applied before the last shutdown
+        await award_pipeline.replay(session)
+
+    # Keep password hashing off the event loop
+    password_hasher.start()
+
+    # Purge expired refresh tokens in the background
+    sweeper = SessionSweeper(async_session_maker)
+    sweeper.start()
+
+    # Apply points and badges in batches, off the request path
+    award_pipeline.start(async_session_maker)
 
     yield
 
     # Shutdown
     logger.info("Shutting down Citizen Engagement Backend")
+    await sweeper.stop()
+    await award_pipeline.stop()
+    password_hasher.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
@@ -49,6 +85,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REQUEST_ID_HEADER],
 )
 
 # Add trusted host middleware
@@ -57,16 +94,45 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS,
 )
 
+# Per-route latency, status and database statement metrics
+app.add_middleware(MetricsMiddleware)
+
+# Tag log records with a request id; outermost, so every request gets one
+app.add_middleware(RequestIdMiddleware)
+
+# Point-in-time samples reported on every scrape of /metrics
+register_collector(lambda: collect_dict(
+    "password_hash", password_hasher.metrics(),
+    counters=("completed", "rehashed", "wait_seconds")))
+register_collector(lambda: collect_dict(
+    "log_records", log_metrics(),
+    counters=("sampled_out", "queue_full_dropped")))
+register_collector(lambda: collect_dict("db_pool", pool_status()))
+register_collector(lambda: collect_dict(
+    "duplicate_index", duplicate_index.metrics(),
+    counters=("lookups", "matches")))
+register_collector(lambda: collect_dict(
+    "awards", award_pipeline.metrics(),
+    counters=("applied", "batches", "badges_earned")))
+register_collector(lambda: collect_dict(
+    "events", event_broker.metrics(),
+    counters=("published", "delivered", "dropped")))
+register_collector(lambda: collect_dict(
+    "leaderboard", leaderboard.metrics(), counters=("lookups",)))
+
 # Global exception handler
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger = logging.getLogger(__name__)
-    logger.error(f"Global exception: {exc}", exc_info=True)
+    request_id = getattr(request.state, "request_id", None)
+    logger.error("Global exception: %s", exc, exc_info=True,
+                 extra={"request_id": request_id})
     return JSONResponse(
         status_code=500,
-        content={"detail": "Internal server error"}
+        content={"detail": "Internal server error"},
+        headers={REQUEST_ID_HEADER: request_id} if request_id else None
     )
 
 # Health check endpoint
@@ -76,6 +142,13 @@ async def global_exception_handler(request: Request, exc: Exception):
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+# Prometheus scrape endpoint
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
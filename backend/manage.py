@@ -0,0 +1,134 @@
+"""Maintenance commands for the Citizen Engagement backend.
+
+Usage:
+    python manage.py reconcile-votes
+    python manage.py rebuild-clusters
+    python manage.py rebuild-stats
+    python manage.py purge-sessions
+    python manage.py generate [--issues 100000] [--citizens 10000] [--seed 1]
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from app.core.database import async_session_maker, run_migrations
+from app.services.votes import reconcile_vote_counters
+from app.services.clusters import rebuild_clusters as rebuild_issue_grid
+from app.services.stats import rebuild_stats as rebuild_stats_counters
+from app.services.sessions import purge_expired_sessions
+from app.services.dataset import DatasetConfig, generate_dataset
+from app.auth.security import get_password_hash
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_votes(args):
+    """Recompute issue vote counters from the votes table"""
+    async with async_session_maker() as session:
+        fixed = await reconcile_vote_counters(session)
+    print(f"Vote counters reconciled, {fixed} issues corrected")
+
+
+async def rebuild_clusters(args):
+    """Recompute the map clustering grid from the issues table"""
+    async with async_session_maker() as session:
+        written = await rebuild_issue_grid(session)
+    print(f"Issue clusters rebuilt, {written} grid rows written")
+
+
+async def rebuild_stats(args):
+    """Recompute the stats counters from the base tables"""
+    async with async_session_maker() as session:
+        written = await rebuild_stats_counters(session)
+    print(f"Stats counters rebuilt, {written} counter rows written")
+
+
+async def purge_sessions(args):
+    """Delete expired refresh-token sessions"""
+    purged = await purge_expired_sessions(async_session_maker)
+    print(f"Expired sessions purged, {purged} rows deleted")
+
+
+async def generate(args):
+    """Fill the database with a synthetic city for load and scale testing"""
+    config = DatasetConfig(
+        citizens=args.citizens, fieldworkers=args.fieldworkers,
+        staff=args.staff, issues=args.issues, hotspots=args.hotspots,
+        votes_per_issue=args.votes_per_issue,
+        comments_per_issue=args.comments_per_issue, days=args.days,
+        seed=args.seed, batch_size=args.batch_size)
+    started = time.perf_counter()
+
+    def progress(issues):
+        print(f"  {issues}/{config.issues} issues "
+              f"({time.perf_counter() - started:.1f}s)")
+
+    # Every generated account shares one hash instead of paying PBKDF2 each
+    password_hash = get_password_hash(args.password)
+    try:
+        written = await generate_dataset(
+            async_session_maker, config, password_hash, progress)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    # Rows were inserted directly, so derive the rollups from them
+    async with async_session_maker() as session:
+        await rebuild_issue_grid(session)
+        await rebuild_stats_counters(session)
+
+    elapsed = time.perf_counter() - started
+    print(f"Dataset generated in {elapsed:.1f}s: " + ", ".join(
+        f"{count} {table}" for table, count in written.items()))
+
+
+COMMANDS = {
+    "reconcile-votes": reconcile_votes,
+    "rebuild-clusters": rebuild_clusters,
+    "rebuild-stats": rebuild_stats,
+    "purge-sessions": purge_sessions,
+    "generate": generate,
+}
+
+
+async def run(args):
+    await run_migrations()
+    await COMMANDS[args.command](args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("reconcile-votes", help=reconcile_votes.__doc__)
+    subparsers.add_parser("rebuild-clusters", help=rebuild_clusters.__doc__)
+    subparsers.add_parser("rebuild-stats", help=rebuild_stats.__doc__)
+    subparsers.add_parser("purge-sessions", help=purge_sessions.__doc__)
+
+    defaults = DatasetConfig()
+    gen = subparsers.add_parser("generate", help=generate.__doc__)
+    gen.add_argument("--citizens", type=int, default=defaults.citizens)
+    gen.add_argument("--fieldworkers", type=int, default=defaults.fieldworkers)
+    gen.add_argument("--staff", type=int, default=defaults.staff)
+    gen.add_argument("--issues", type=int, default=defaults.issues)
+    gen.add_argument("--hotspots", type=int, default=defaults.hotspots,
+                     help="areas most issues cluster around")
+    gen.add_argument("--votes-per-issue", type=float,
+                     default=defaults.votes_per_issue, help="mean")
+    gen.add_argument("--comments-per-issue", type=float,
+                     default=defaults.comments_per_issue, help="mean")
+    gen.add_argument("--days", type=int, default=defaults.days,
+                     help="issues are reported over this many past days")
+    gen.add_argument("--seed", type=int, default=defaults.seed,
+                     help="the same seed generates the same rows")
+    gen.add_argument("--batch-size", type=int, default=defaults.batch_size,
+                     help="issues inserted per transaction")
+    gen.add_argument("--password", default="password123",
+                     help="password of every generated account")
+
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
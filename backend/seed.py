@@ -1,10 +1,12 @@
 import asyncio
 import logging
 import json
-from app.core.database import async_session_maker, Base, engine
+from app.core.database import async_session_maker, run_migrations
 from app.models import User, Issue
 from app.auth.security import get_password_hash
 from app.core.config import settings
+from app.services.clusters import rebuild_clusters
+from app.services.stats import rebuild_stats
 from sqlalchemy import text
 
 logging.basicConfig(level=logging.INFO)
@@ -13,11 +15,11 @@ logger = logging.getLogger(__name__)
 
 async def seed_database():
     """Seed the database with initial data"""
+    # Bring the database schema up to date
+    await run_migrations()
+
     async with async_session_maker() as session:
         try:
-            # Create tables if they don't exist
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
 
             # Check if data already exists
             result = await session.execute(text("SELECT COUNT(*) FROM users"))
@@ -126,6 +128,10 @@ async def seed_database():
             session.add_all(issues)
 
             await session.commit()
+
+            # Rows were inserted directly, so derive the rollups from them
+            await rebuild_clusters(session)
+            await rebuild_stats(session)
             logger.info("Database seeded successfully!")
 
             print("\n" + "="*50)
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the app's log file out of the tree; settings are read on first import
+os.environ.setdefault("LOG_FILE", os.path.join(tempfile.mkdtemp(), "test.log"))
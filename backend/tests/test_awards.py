@@ -0,0 +1,34 @@
+from app.services.awards import (
+    ACTIVITY_POINTS,
+    COMMENT_POSTED,
+    ISSUE_REPORTED,
+    TASK_COMPLETED,
+    evaluate_badges
+)
+
+
+def test_first_activity_earns_points_and_badge():
+    points, earned = evaluate_badges({}, {ISSUE_REPORTED: 1})
+    assert [badge.id for badge in earned] == ["first-report"]
+    assert points == ACTIVITY_POINTS[ISSUE_REPORTED] + earned[0].points
+
+
+def test_badge_earned_when_a_batch_crosses_its_threshold():
+    points, earned = evaluate_badges({TASK_COMPLETED: 2}, {TASK_COMPLETED: 3})
+    assert [badge.id for badge in earned] == ["team-player"]
+    assert points == 3 * ACTIVITY_POINTS[TASK_COMPLETED] + earned[0].points
+
+
+def test_badge_not_earned_twice():
+    points, earned = evaluate_badges({TASK_COMPLETED: 3}, {TASK_COMPLETED: 1})
+    assert earned == []
+    assert points == ACTIVITY_POINTS[TASK_COMPLETED]
+
+
+def test_several_activities_at_once():
+    points, earned = evaluate_badges(
+        {ISSUE_REPORTED: 24, COMMENT_POSTED: 5},
+        {ISSUE_REPORTED: 1, COMMENT_POSTED: 2, "unknown": 4})
+    assert [badge.id for badge in earned] == ["veteran-reporter"]
+    assert points == (ACTIVITY_POINTS[ISSUE_REPORTED] +
+                      2 * ACTIVITY_POINTS[COMMENT_POSTED] + earned[0].points)
@@ -0,0 +1,33 @@
+from app.services.duplicates import shingles, similarity, text_signature
+
+
+def jaccard(first: str, second: str) -> float:
+    a, b = shingles(first), shingles(second)
+    return len(a & b) / len(a | b)
+
+
+def test_identical_text_is_fully_similar():
+    signature = text_signature("Pothole on Main Street",
+                               "Deep pothole in the left lane")
+    assert similarity(signature, signature) == 1.0
+
+
+def test_unrelated_text_is_dissimilar():
+    first = text_signature("Pothole on Main Street",
+                           "Deep pothole in the left lane")
+    second = text_signature("Broken streetlight",
+                            "Lamp flickering at night near park")
+    assert similarity(first, second) < 0.3
+
+
+def test_similarity_estimates_jaccard():
+    first = ("Flooded underpass", "Water flooding the underpass after rain, "
+             "cars cannot get through")
+    second = ("Flooding in underpass", "The underpass is flooded after the "
+              "rain and cars are stuck")
+    estimate = similarity(text_signature(*first), text_signature(*second))
+    assert abs(estimate - jaccard(" ".join(first), " ".join(second))) < 0.25
+
+
+def test_empty_signatures_are_not_similar():
+    assert similarity(text_signature("", ""), text_signature("", "")) == 0.0
@@ -0,0 +1,46 @@
+import random
+
+from app.services import leaderboard as leaderboard_module
+from app.services.leaderboard import Leaderboard, RankIndex
+
+
+def test_rank_index_matches_sorted_list(monkeypatch):
+    # Small sublists so splits and emptied sublists are exercised
+    monkeypatch.setattr(leaderboard_module, "SUBLIST_SIZE", 4)
+    rng = random.Random(7)
+    keys = {(-rng.randrange(50), f"u{i}") for i in range(40)}
+    index = RankIndex(keys)
+    expected = sorted(keys)
+
+    for step in range(2000):
+        if expected and rng.random() < 0.45:
+            key = expected.pop(rng.randrange(len(expected)))
+            index.remove(key)
+        else:
+            key = (-rng.randrange(50), f"n{step}")
+            expected.append(key)
+            expected.sort()
+            index.add(key)
+
+        assert len(index) == len(expected)
+        probe = (-rng.randrange(50), f"u{rng.randrange(40)}")
+        assert index.bisect_left(probe) == sum(key < probe for key in expected)
+        start = rng.randrange(len(expected) + 1)
+        assert index.slice(start, start + 7) == expected[start:start + 7]
+
+
+def test_leaderboard_shares_ranks_on_ties():
+    board = Leaderboard()
+    board.replace([("a", 30), ("b", 50), ("c", 30), ("d", 10)])
+
+    page = board.page(0, 10)
+    assert [(s.user_id, s.rank, s.position) for s in page] == [
+        ("b", 1, 0), ("a", 2, 1), ("c", 2, 2), ("d", 4, 3)]
+    assert board.standing("c").rank == 2
+
+    board.update("d", 60)
+    board.discard("b")
+    assert [(s.user_id, s.rank) for s in board.page(0, 10)] == [
+        ("d", 1), ("a", 2), ("c", 2)]
+    assert board.standing("b") is None
+    assert board.page(1, 1)[0].rank == 2
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+metadata = MetaData()
+rows_table = Table(
+    "rows", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("score", Integer),
+    Column("name", String),
+)
+
+
+def test_keyset_filter_returns_rows_after_cursor():
+    rng = random.Random(3)
+    rows = [{"id": i, "score": rng.randrange(4), "name": rng.choice("abc")}
+            for i in range(60)]
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    c = rows_table.c
+    keys = [(c.score, True), (c.name, False), (c.id, False)]
+    ordered = sorted(rows, key=lambda row: (-row["score"], row["name"], row["id"]))
+
+    with engine.connect() as conn:
+        conn.execute(rows_table.insert(), rows)
+        for position, row in enumerate(ordered):
+            values = decode_cursor(
+                encode_cursor([row["score"], row["name"], row["id"]]), 3)
+            result = conn.execute(
+                select(c.id).where(keyset_filter(keys, values))
+                .order_by(c.score.desc(), c.name, c.id)
+            ).scalars().all()
+            assert result == [later["id"] for later in ordered[position + 1:]]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor([1]),
+    encode_cursor([[1], [2]]),
+    encode_cursor([{"a": 1}, 2]),
+])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 2)
+    assert error.value.status_code == 400
+
+
+def test_cursor_round_trip():
+    values = ["2025-10-01 09:00:00", 4.5, None]
+    assert decode_cursor(encode_cursor(values), 3) == values
@@ -0,0 +1,18 @@
+import asyncio
+
+from check_query_plans import explain, run_check
+
+
+def test_no_full_table_scans(tmp_path):
+    db_path = str(tmp_path / "plans.db")
+    captured, errors = asyncio.run(run_check(db_path))
+    results = explain(db_path, captured)
+
+    # A failed call issues fewer statements, hiding them from the check
+    assert not errors, "\n".join(
+        f"{label} returned {status_code}: {detail[:200]}"
+        for label, status_code, detail in errors)
+    assert results
+    scans = [f"{label}: {', '.join(sorted(tables))} in {' '.join(statement.split())}"
+             for label, statement, _, tables in results if tables]
+    assert not scans, "\n".join(scans)